@@ -1,13 +1,146 @@
-from flask import Flask, render_template
+import json
+import os
+import queue
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
+from level_store import LevelStore, LevelError, VersionConflict
+from level_events import LevelEvents
+
+KEEPALIVE = 15.0  # seconds between SSE comments so proxies don't drop idle streams
 
 app = Flask(__name__)
+store = LevelStore(os.environ.get("GOOBCUBE_LEVELS_DB", os.path.join(app.root_path, "levels.db")))
+events = LevelEvents()
+store.listeners.append(events.on_save)
+
 
 @app.route('/')
 def editor():
     level = {
-        
+
     }
-    return render_template('editor.html', level)
+    return render_template('editor.html', level=level)
+
+
+# ===== Level API =====
+
+def level_response(row, status=200):
+    # The stored text is already canonical JSON; send it as is
+    resp = Response(row["data"], status=status, mimetype="application/json")
+    resp.set_etag(row["etag"])
+    resp.headers["X-Level-Version"] = str(row["version"])
+    return resp
+
+
+def error(message, status):
+    return jsonify(error=message), status
+
+
+@app.get('/api/levels')
+def list_levels():
+    try:
+        rows = store.search(game=request.args.get("game"), author=request.args.get("author"),
+                            q=request.args.get("q"), limit=request.args.get("limit", 50),
+                            offset=request.args.get("offset", 0))
+    except ValueError:
+        return error("limit and offset must be integers", 400)
+    return jsonify(levels=rows)
+
+
+@app.get('/api/levels/events')
+def level_events():
+    # Server-sent events: one "patch" event per saved level (see level_events.py)
+    game = request.args.get("game")
+    q = events.subscribe()
+
+    def stream():
+        try:
+            yield "retry: 1000\n\n"
+            while True:
+                try:
+                    patch = q.get(timeout=KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if game and patch["game"] != game:
+                    continue
+                yield f"event: patch\ndata: {json.dumps(patch, separators=(',', ':'))}\n\n"
+        finally:
+            events.unsubscribe(q)
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get('/api/levels/<level_id>')
+def get_level(level_id):
+    row = store.get(level_id)
+    if row is None:
+        return error("no such level", 404)
+    return level_response(row).make_conditional(request)
+
+
+@app.get('/api/levels/<level_id>/versions')
+def level_versions(level_id):
+    return jsonify(versions=store.versions(level_id))
+
+
+@app.get('/api/levels/<level_id>/versions/<int:version>')
+def level_version(level_id, version):
+    found = store.get_version(level_id, version)
+    if found is None:
+        return error("no such version", 404)
+    return Response(found["data"], mimetype="application/json")
+
+
+@app.post('/api/levels')
+def create_level():
+    return save_level(None)
+
+
+@app.put('/api/levels/<level_id>')
+def save_level(level_id):
+    level = request.get_json(silent=True)
+    # If-Match: <etag> or X-Level-Version: <n> makes the save fail instead of clobbering
+    # someone else's newer version
+    expect_etag = next(iter(request.if_match), None) if request.if_match else None
+    expect_version = request.headers.get("X-Level-Version", type=int)
+    try:
+        row = store.save(level, level_id, expect_version=expect_version, expect_etag=expect_etag)
+    except LevelError as e:
+        return error(str(e), 400)
+    except VersionConflict as e:
+        return error(str(e), 412)
+    return level_response(row, status=201 if row["version"] == 1 else 200)
+
+
+@app.delete('/api/levels/<level_id>')
+def delete_level(level_id):
+    if not store.delete(level_id):
+        return error("no such level", 404)
+    return "", 204
+
+
+@app.post('/api/levels/import')
+def import_levels():
+    # Either a JSON array or newline-delimited JSON (what /export produces)
+    body = request.get_data(as_text=True)
+    try:
+        if body.lstrip().startswith("["):
+            levels = json.loads(body)
+        else:
+            levels = [json.loads(line) for line in body.splitlines() if line.strip()]
+        count = store.import_levels(levels)
+    except (ValueError, LevelError) as e:
+        return error(str(e), 400)
+    return jsonify(imported=count)
+
+
+@app.get('/api/levels/export')
+def export_levels():
+    lines = (data + "\n" for data in store.export())
+    return Response(lines, mimetype="application/x-ndjson",
+                    headers={"Content-Disposition": 'attachment; filename="levels.ndjson"'})
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
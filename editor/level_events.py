@@ -0,0 +1,91 @@
+import json
+import queue
+import threading
+
+# -----------------------------
+# Live level patches
+# -----------------------------
+# Every save is turned into a small diff against the previous version and
+# pushed to subscribers (the /api/levels/events SSE stream). Running games
+# apply the diff between frames instead of reloading the level, so the work
+# on their side is proportional to what changed.
+#
+# Patch:
+#   {"id", "game", "version", "base",            base = version the diff applies to
+#    "walls": {"add": [[x, y]...], "remove": [[x, y]...]},       snake wall cells
+#    "waves": {"count": n, "set": {"<index>": {wave}}},          asteroids waves
+#    "set": {"name"|"start"|"food"|"obstacles"|"ball_speed"|"paddle_h": value or null}}
+# or {"id", "game", "version", "base", "full": true} when a diff can't describe it
+# (new level, game or grid size changed); clients then fetch the whole level.
+
+SET_KEYS = ("name", "start", "food", "obstacles", "ball_speed", "paddle_h")
+SUBSCRIBER_BACKLOG = 256
+
+
+def wall_cells(doc):
+    cells = {(int(x), int(y)) for x, y in doc.get("walls", ())}
+    for x0, y0, w, h in doc.get("wall_rects", ()):
+        cells.update((x, y) for y in range(y0, y0 + h) for x in range(x0, x0 + w))
+    return cells
+
+
+def level_diff(old, new):
+    """Patch body turning `old` into `new`, {"full": True}, or None if nothing a game cares about changed."""
+    if old is None or any(old.get(k) != new.get(k) for k in ("game", "width", "height")):
+        return {"full": True}
+    patch = {}
+
+    if any(k in old or k in new for k in ("walls", "wall_rects")):
+        before, after = wall_cells(old), wall_cells(new)
+        added, removed = after - before, before - after
+        if added or removed:
+            patch["walls"] = {"add": sorted(added), "remove": sorted(removed)}
+
+    old_waves, new_waves = old.get("waves", []), new.get("waves", [])
+    if old_waves != new_waves:
+        changed = {str(i): w for i, w in enumerate(new_waves) if i >= len(old_waves) or old_waves[i] != w}
+        patch["waves"] = {"count": len(new_waves), "set": changed}
+
+    changed = {k: new.get(k) for k in SET_KEYS if old.get(k) != new.get(k)}
+    if changed:
+        patch["set"] = changed
+    return patch or None
+
+
+class LevelEvents:
+    """Fan-out of level patches to any number of SSE subscribers."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def on_save(self, previous, row):
+        # LevelStore listener: runs right after the save committed
+        new = json.loads(row["data"])
+        body = level_diff(json.loads(previous) if previous else None, new)
+        if body is None:
+            return
+        body.update(id=row["id"], game=row["game"], version=row["version"], base=row["version"] - 1)
+        self.publish(body)
+
+    def publish(self, patch):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(patch)
+            except queue.Full:
+                # A stalled client: drop its backlog and make it resync on the next patch
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait(dict(patch, full=True))
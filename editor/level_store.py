@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# The games' level compiler (src/levels.py), so a save the games can't load is refused
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import levels
+
+# -----------------------------
+# Level store (SQLite, WAL)
+# -----------------------------
+# Levels are JSON documents: {"id", "game", "name", "author", ...anything the
+# game needs}. Every save bumps the level's version and keeps the old one in
+# level_versions. WAL lets readers carry on while someone saves; writes take
+# the lock up front (BEGIN IMMEDIATE) so concurrent saves queue instead of
+# failing halfway. Hot levels are served from an in-process LRU.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS levels (
+    id      TEXT PRIMARY KEY,
+    game    TEXT NOT NULL,
+    name    TEXT NOT NULL COLLATE NOCASE,
+    author  TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    version INTEGER NOT NULL,
+    etag    TEXT NOT NULL,
+    data    TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS level_versions (
+    id      TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    data    TEXT NOT NULL,
+    saved   REAL NOT NULL,
+    PRIMARY KEY (id, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS levels_game_updated ON levels (game, updated DESC);
+CREATE INDEX IF NOT EXISTS levels_author_updated ON levels (author, updated DESC);
+CREATE INDEX IF NOT EXISTS levels_name ON levels (name);
+"""
+
+SUMMARY_COLUMNS = "id, game, name, author, version, etag, updated"
+MAX_PAGE = 200
+LEVEL_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")  # ids become file names (levels/<id>.lvl)
+
+
+class LevelError(ValueError):
+    pass
+
+
+class VersionConflict(Exception):
+    def __init__(self, current):
+        super().__init__(f"level changed (now version {current})")
+        self.current = current
+
+
+def canonical(data):
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+def make_etag(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class LevelStore:
+    def __init__(self, path="levels.db", cache_size=256):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # id -> full row dict
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()  # sqlite connections are per thread
+        # Called after each committed save as listener(previous_data_or_None, row)
+        self.listeners = []
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable enough with WAL, much faster
+            self._local.conn = conn
+        return conn
+
+    # ---------- Cache ----------
+
+    def _cached(self, level_id):
+        with self._cache_lock:
+            row = self._cache.get(level_id)
+            if row is not None:
+                self._cache.move_to_end(level_id)
+            return row
+
+    def _remember(self, row):
+        with self._cache_lock:
+            known = self._cache.get(row["id"])
+            if known is not None and known["version"] > row["version"]:
+                return  # a reader raced a save; keep the newer one
+            self._cache[row["id"]] = row
+            self._cache.move_to_end(row["id"])
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, level_id):
+        with self._cache_lock:
+            self._cache.pop(level_id, None)
+
+    # ---------- Reads ----------
+
+    def get(self, level_id):
+        """Full level row ({id, game, name, author, version, etag, updated, data}) or None."""
+        row = self._cached(level_id)
+        if row is not None:
+            return row
+        found = self._conn().execute(
+            f"SELECT {SUMMARY_COLUMNS}, data FROM levels WHERE id = ?", (level_id,)).fetchone()
+        if found is None:
+            return None
+        row = dict(found)
+        self._remember(row)
+        return row
+
+    def get_version(self, level_id, version):
+        found = self._conn().execute(
+            "SELECT data, saved FROM level_versions WHERE id = ? AND version = ?",
+            (level_id, version)).fetchone()
+        return dict(found) if found is not None else None
+
+    def versions(self, level_id):
+        rows = self._conn().execute(
+            "SELECT version, saved FROM level_versions WHERE id = ? ORDER BY version DESC", (level_id,))
+        return [dict(r) for r in rows]
+
+    def search(self, game=None, author=None, q=None, limit=50, offset=0):
+        """Newest first. q matches the start of the name (case-insensitive, uses the index)."""
+        where, args = [], []
+        if game:
+            where.append("game = ?")
+            args.append(game)
+        if author:
+            where.append("author = ?")
+            args.append(author)
+        if q:
+            where.append("name LIKE ? ESCAPE '\\'")
+            args.append(q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        sql = f"SELECT {SUMMARY_COLUMNS} FROM levels"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY updated DESC LIMIT ? OFFSET ?"
+        args += [max(1, min(int(limit), MAX_PAGE)), max(0, int(offset))]
+        return [dict(r) for r in self._conn().execute(sql, args)]
+
+    def export(self):
+        """Yield every level document; streams, doesn't load the table."""
+        for (data,) in self._conn().execute("SELECT data FROM levels ORDER BY id"):
+            yield data
+
+    # ---------- Writes ----------
+
+    def save(self, level, level_id=None, expect_version=None, expect_etag=None):
+        """Create or update a level. Raises VersionConflict if the expected version/etag is stale."""
+        level_id = self._check(level, level_id)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("SELECT version, etag, data FROM levels WHERE id = ?", (level_id,)).fetchone()
+            if ((expect_version is not None and (current["version"] if current else 0) != expect_version)
+                    or (expect_etag is not None and (current is None or current["etag"] != expect_etag))):
+                raise VersionConflict(current["version"] if current else 0)
+            row = self._write(conn, level, level_id, current["version"] if current else 0)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._remember(row)
+        self._notify([(current["data"] if current else None, row)])
+        return row
+
+    def delete(self, level_id):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = conn.execute("DELETE FROM levels WHERE id = ?", (level_id,)).rowcount
+            conn.execute("DELETE FROM level_versions WHERE id = ?", (level_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._forget(level_id)
+        return deleted > 0
+
+    def import_levels(self, levels):
+        """Save many levels in one transaction (each becomes a new version). Returns the count."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        saved = []
+        try:
+            for level in levels:
+                level_id = self._check(level, None)
+                current = conn.execute("SELECT version, data FROM levels WHERE id = ?", (level_id,)).fetchone()
+                row = self._write(conn, level, level_id, current[0] if current else 0)
+                saved.append((current[1] if current else None, row))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # Only after COMMIT, like save(): cache the rows we wrote, so a reader
+        # that raced the import can't leave an older row behind (version guard)
+        for previous, row in saved:
+            self._remember(row)
+        self._notify(saved)
+        return len(saved)
+
+    def _notify(self, saved):
+        for listener in self.listeners:
+            for previous, row in saved:
+                try:
+                    listener(previous, row)
+                except Exception as e:
+                    print(f"Level listener failed: {e}")
+
+    def _check(self, level, level_id):
+        if not isinstance(level, dict):
+            raise LevelError("level must be a JSON object")
+        level_id = level_id or level.get("id") or uuid.uuid4().hex
+        if not isinstance(level_id, str) or not LEVEL_ID.fullmatch(level_id):
+            raise LevelError("level id must be 1-64 characters of A-Z, a-z, 0-9, '_' or '-'")
+        if not isinstance(level.get("game"), str) or not level["game"]:
+            raise LevelError("level needs a 'game'")
+        try:
+            levels.compile_level(level)
+        except levels.LevelError as e:
+            raise LevelError(str(e)) from e
+        return level_id
+
+    def _write(self, conn, level, level_id, current_version):
+        version = current_version + 1
+        now = time.time()
+        level = dict(level, id=level_id)
+        text = canonical(level)
+        row = {
+            "id": level_id,
+            "game": level["game"],
+            "name": str(level.get("name") or level_id),
+            "author": str(level.get("author") or ""),
+            "version": version,
+            "etag": make_etag(text),
+            "updated": now,
+            "data": text,
+        }
+        conn.execute(
+            "INSERT INTO levels (id, game, name, author, version, etag, data, updated) "
+            "VALUES (:id, :game, :name, :author, :version, :etag, :data, :updated) "
+            "ON CONFLICT(id) DO UPDATE SET game = excluded.game, name = excluded.name, "
+            "author = excluded.author, version = excluded.version, etag = excluded.etag, "
+            "data = excluded.data, updated = excluded.updated", row)
+        conn.execute("INSERT INTO level_versions (id, version, data, saved) VALUES (?, ?, ?, ?)",
+                     (level_id, version, text, now))
+        return row
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
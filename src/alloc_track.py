@@ -0,0 +1,166 @@
+import json
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+
+import pygame
+
+# -----------------------------
+# Per-frame allocation tracker (opt-in)
+# -----------------------------
+# goobcube.py --alloc-track attributes memory churn to (screen, phase), e.g.
+# ("snake", "draw"), for every frame:
+#   py_peak_kb   Python heap high-water above the phase's start (tracemalloc)
+#   py_net_kb    Python heap retained by the phase
+#   surfaces     pygame.Surface(...) calls, and surface_kb of pixels they hold
+#   texts        font.render(...) calls (FONTS), and text_kb of pixels
+# Pixel buffers live in SDL's heap, which tracemalloc can't see, hence the
+# Surface/font hooks. The first WARMUP frames on each screen (caches filling
+# up) are left out, so the report is the steady state per frame.
+#
+# On exit the report is printed and compared with the budget file
+# (GOOBCUBE_ALLOC_BUDGET, default ../alloc_budget.json); anything more than
+# TOLERANCE over budget is flagged. --alloc-save-budget writes the measured
+# numbers as the new budget. Tracking slows the game down; use it to compare,
+# not to judge frame rate.
+
+BUDGET_PATH = os.environ.get("GOOBCUBE_ALLOC_BUDGET", "../alloc_budget.json")
+WARMUP = 60
+TOLERANCE = 0.10
+METRICS = ("py_peak_kb", "py_net_kb", "surfaces", "surface_kb", "texts", "text_kb")
+TOP_SITES = 10
+
+
+class AllocTracker:
+    def __init__(self, budget_path=BUDGET_PATH):
+        self.budget_path = budget_path
+        self.totals = defaultdict(lambda: dict.fromkeys(METRICS, 0.0))  # (screen, phase) -> sums
+        self.frames = defaultdict(int)     # screen -> steady frames counted
+        self._seen = defaultdict(int)      # screen -> frames since first seen
+        self._current = None               # (screen, phase) being measured
+        self._start = 0
+        self._counts = dict.fromkeys(METRICS, 0.0)
+        self._baseline = None
+        tracemalloc.start()
+        self._install_hooks()
+
+    # ---------- Hooks ----------
+
+    def _install_hooks(self):
+        tracker = self
+
+        class CountingSurface(pygame.Surface):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                w, h = self.get_size()
+                tracker._counts["surfaces"] += 1
+                tracker._counts["surface_kb"] += w * h * self.get_bytesize() / 1024.0
+
+        class CountingFont:
+            def __init__(self, font):
+                self._font = font
+
+            def render(self, *args, **kwargs):
+                img = self._font.render(*args, **kwargs)
+                w, h = img.get_size()
+                tracker._counts["texts"] += 1
+                tracker._counts["text_kb"] += w * h * img.get_bytesize() / 1024.0
+                return img
+
+            def __getattr__(self, name):
+                return getattr(self._font, name)
+
+        # Games call pygame.Surface(...) and FONTS[...].render(...) at draw time
+        pygame.Surface = CountingSurface
+        from global_vars import FONTS
+        for name in FONTS.specs:
+            FONTS[name] = CountingFont(FONTS[name])
+
+    # ---------- Per frame ----------
+
+    def phase(self, screen, name):
+        """Close the running phase and start measuring `name` on `screen`."""
+        self._close()
+        self._current = (screen, name)
+        tracemalloc.reset_peak()
+        self._start = tracemalloc.get_traced_memory()[0]
+
+    def frame_done(self):
+        self._close()
+        if self._current is None:
+            return
+        screen = self._current[0]
+        self._current = None
+        self._seen[screen] += 1
+        if self._seen[screen] > WARMUP:
+            self.frames[screen] += 1
+            if self._baseline is None:
+                self._baseline = tracemalloc.take_snapshot()
+
+    def _close(self):
+        if self._current is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        counts = self._counts
+        counts["py_peak_kb"] = max(0, peak - self._start) / 1024.0
+        counts["py_net_kb"] = (current - self._start) / 1024.0
+        screen = self._current[0]
+        if self._seen[screen] >= WARMUP:
+            totals = self.totals[self._current]
+            for key, value in counts.items():
+                totals[key] += value
+        self._counts = dict.fromkeys(METRICS, 0.0)
+
+    # ---------- Report ----------
+
+    def per_frame(self):
+        out = {}
+        for (screen, phase), totals in sorted(self.totals.items()):
+            frames = self.frames[screen]
+            if frames:
+                out[f"{screen}/{phase}"] = {k: round(v / frames, 3) for k, v in totals.items()}
+        return out
+
+    def regressions(self, measured, budget):
+        flagged = []
+        for key, limits in budget.items():
+            got = measured.get(key)
+            if got is None:
+                continue
+            for metric, limit in limits.items():
+                value = got.get(metric, 0.0)
+                if value - limit > max(0.01, abs(limit) * TOLERANCE):
+                    flagged.append((key, metric, value, limit))
+        return flagged
+
+    def report(self, save_budget=False, out=sys.stdout):
+        measured = self.per_frame()
+        print("\nAllocations per frame (steady state):", file=out)
+        print(f"{'screen/phase':<20} {'frames':>7} " + " ".join(f"{m:>11}" for m in METRICS), file=out)
+        for key, values in measured.items():
+            frames = self.frames[key.split("/")[0]]
+            print(f"{key:<20} {frames:>7} " + " ".join(f"{values[m]:>11.2f}" for m in METRICS), file=out)
+
+        if self._baseline is not None:
+            growth = tracemalloc.take_snapshot().compare_to(self._baseline, "lineno")
+            print("\nTop retained growth since steady state:", file=out)
+            for stat in growth[:TOP_SITES]:
+                print(f"  {stat}", file=out)
+
+        budget = {}
+        if os.path.exists(self.budget_path):
+            with open(self.budget_path) as f:
+                budget = json.load(f)
+        flagged = self.regressions(measured, budget)
+        for key, metric, value, limit in flagged:
+            print(f"⚠️ Over budget: {key} {metric} {value:.2f}/frame (budget {limit:.2f})", file=out)
+        if budget and not flagged:
+            print(f"✅ Within budget ({self.budget_path})", file=out)
+        if save_budget:
+            # Merge, so screens not visited this run keep their old budget
+            budget.update(measured)
+            with open(self.budget_path, "w") as f:
+                json.dump(budget, f, indent=2, sort_keys=True)
+            print(f"Saved budget to {self.budget_path}", file=out)
+        return flagged
@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+# Headless + no MIDI hardware: must be set before pygame/game modules load
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ["GOOBCUBE_MIDI_BACKEND"] = "midi_loopback"
+
+import pygame
+import mido
+from mido import Message
+
+pygame.init()
+pygame.mixer.init()
+
+from global_vars import WIDTH, HEIGHT
+from game_piano import PianoMidiGame
+from midi_router import translate
+from stats import LatencyStats
+
+# -----------------------------
+# MIDI throughput benchmark (loopback, CI friendly)
+# -----------------------------
+# Drives a real PianoMidiGame through the in-process loopback backend:
+#   sender -> "Loopback microKEY" -> _midi_listener -> _forward -> output worker
+#          -> "Loopback FluidSynth" -> sink
+# and reports end-to-end latency, what the output worker coalesced on
+# purpose, and anything that went missing. The main thread plays the part
+# of the game loop, draining the input queue (and optionally drawing) at FPS.
+
+STALE = 1.0  # seconds; a send stamp this old can't be the one we just received
+
+
+def make_traffic(i):
+    # note_on / CC1 / note_off / CC1 ..., every message distinct from its neighbours
+    note = 36 + (i // 4) % 48
+    phase = i % 4
+    if phase == 0:
+        return Message('note_on', note=note, velocity=1 + (i * 7) % 127, channel=0)
+    if phase == 2:
+        return Message('note_off', note=note, velocity=0, channel=0)
+    return Message('control_change', control=1, value=(i // 2) % 128, channel=0)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="PianoMidiGame MIDI throughput benchmark")
+    p.add_argument("--rate", type=int, default=20000, help="messages per second to push (default 20000)")
+    p.add_argument("--seconds", type=float, default=3.0, help="how long to push for (default 3)")
+    p.add_argument("--fps", type=int, default=60, help="simulated frame rate for draining input")
+    p.add_argument("--draw", action="store_true", help="also run PianoMidiGame.draw each frame")
+    p.add_argument("--json", help="write the summary as JSON to this path")
+    p.add_argument("--max-lost", type=int, default=None, help="exit 1 if more messages than this are lost")
+    args = p.parse_args(argv)
+
+    game = PianoMidiGame()
+    game.devices.scanned.wait(5.0)
+    if game.midi_input is None or getattr(game.midi_output, "name", "") != "Loopback FluidSynth":
+        print("Loopback ports were not picked up by the game", file=sys.stderr)
+        return 2
+    game.on_enter()
+
+    # Sink: what the game actually sent to its synth
+    pending = defaultdict(deque)  # expected output bytes -> send stamps, FIFO
+    latency = LatencyStats(window=1 << 20)
+    received = [0]
+    stale = [0]  # stamps given up on: coalesced away or lost, settled in the summary
+    lock = threading.Lock()
+
+    def sink(msg):
+        now = time.perf_counter()
+        with lock:
+            received[0] += 1
+            stamps = pending.get(tuple(msg.bytes()))
+            # Same bytes sent earlier but coalesced away (or lost) never arrive;
+            # skip those, but keep count so they still show up in `lost`
+            while stamps and now - stamps[0] > STALE:
+                stamps.popleft()
+                stale[0] += 1
+            if stamps and msg.type == 'pitchwheel':
+                # The worker only keeps the newest pending bend, so this is the
+                # latest send of these bytes; earlier ones were coalesced away
+                latency.add(now - stamps.pop())
+                stale[0] += len(stamps)
+                stamps.clear()
+            elif stamps:
+                latency.add(now - stamps.popleft())
+
+    sink_port = mido.open_input("Loopback FluidSynth", callback=sink)
+    source = mido.open_output("Loopback microKEY")
+    worker = game.output_worker
+    coalesced0, dropped0 = worker.coalesced, worker.dropped
+
+    sent = [0]
+    done = threading.Event()
+
+    def sender():
+        total = int(args.rate * args.seconds)
+        chunk = max(1, args.rate // 1000)  # ~1 ms worth per burst
+        start = time.perf_counter()
+        i = 0
+        while i < total:
+            for _ in range(min(chunk, total - i)):
+                msg = make_traffic(i)
+                expected = translate(msg)
+                with lock:
+                    pending[tuple(expected.bytes())].append(time.perf_counter())
+                source.send(msg)
+                i += 1
+            # Pace to the requested rate
+            ahead = start + i / args.rate - time.perf_counter()
+            if ahead > 0:
+                time.sleep(ahead)
+        sent[0] = i
+        done.set()
+
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    frame_times = LatencyStats(window=1 << 16)
+    t0 = time.perf_counter()
+    threading.Thread(target=sender, daemon=True).start()
+
+    frame = 1.0 / args.fps
+    quiet_since = None
+    last_received = -1
+    while True:
+        f0 = time.perf_counter()
+        game._drain_midi()
+        if args.draw:
+            game.draw(screen)
+        frame_times.add(time.perf_counter() - f0)
+        time.sleep(max(0.0, frame - (time.perf_counter() - f0)))
+        if done.is_set():
+            # Stop once the pipeline has been quiet for a moment
+            if received[0] != last_received:
+                last_received = received[0]
+                quiet_since = time.perf_counter()
+            elif time.perf_counter() - quiet_since > 0.3:
+                break
+    elapsed = time.perf_counter() - t0
+
+    with lock:
+        unmatched = sum(len(v) for v in pending.values()) + stale[0]
+    coalesced = worker.coalesced - coalesced0
+    dropped = worker.dropped - dropped0
+    summary = {
+        "sent": sent[0],
+        "received": received[0],
+        "rate_target": args.rate,
+        "rate_achieved": round(sent[0] / elapsed, 1),
+        "coalesced": coalesced,
+        "dropped_by_queue": dropped,
+        # Not clamped: a negative value means the accounting itself is off
+        "lost": unmatched - coalesced - dropped,
+        "latency_ms": latency.summary(),
+        "drain_latency_ms": game.input_latency.summary(),
+        "frame_ms": frame_times.summary(),
+    }
+
+    sink_port.close()
+    source.close()
+    game.close()
+
+    print(f"sent={summary['sent']} received={summary['received']} "
+          f"coalesced={coalesced} dropped={dropped} lost={summary['lost']} "
+          f"({summary['rate_achieved']:.0f} msg/s)")
+    print(latency.format("end-to-end"))
+    print(game.input_latency.format("input->frame"))
+    print(frame_times.format("frame work"))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.max_lost is not None and summary["lost"] > args.max_lost:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
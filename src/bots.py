@@ -0,0 +1,112 @@
+import math
+
+import pygame
+
+# -----------------------------
+# Game bots
+# -----------------------------
+# Simple players for Asteroids, Snake and Pong, used by the simulation farm
+# (sim_farm.py) and the menu's demo thumbnails (thumbnails.py). A bot is
+# called once per update as bot(game, rng, dt, state): it presses keys
+# through game.handle_event and returns the held keys to pass to
+# update(dt, keys), or None to call update(dt) without them.
+
+
+class BotKeys(frozenset):
+    """Held keys, indexable like pygame.key.get_pressed()."""
+    __getitem__ = frozenset.__contains__
+
+
+def key_event(key):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0)
+
+
+def asteroids_bot(game, rng, dt, state):
+    # Turn toward the nearest rock (with some aim error), shoot when lined up,
+    # thrust when nothing is close
+    if not game.asteroids:
+        return BotKeys()
+    pos = game.ship_pos
+    target = min(game.asteroids, key=lambda ast: (ast["pos"] - pos).length_squared())
+    offset = target["pos"] - pos
+    dist = offset.length()
+    want = math.degrees(math.atan2(offset.y, offset.x)) + rng.gauss(0, 4)
+    diff = (want - game.ship_angle + 180) % 360 - 180
+    held = set()
+    if diff < -4:
+        held.add(pygame.K_LEFT)
+    elif diff > 4:
+        held.add(pygame.K_RIGHT)
+    if dist > 320 and abs(diff) < 30 and game.ship_vel.length() < 120:
+        held.add(pygame.K_UP)
+    if abs(diff) < 10 and dist < 480:
+        game.handle_event(key_event(pygame.K_SPACE))
+    return BotKeys(held)
+
+
+SNAKE_DIRS = {(0, -1): pygame.K_UP, (0, 1): pygame.K_DOWN, (-1, 0): pygame.K_LEFT, (1, 0): pygame.K_RIGHT}
+
+
+def _snake_blocked(game, cell, body):
+    x, y = cell
+    return (not (0 <= x < game.grid_w and 0 <= y < game.grid_h) or cell in body
+            or (game.level is not None and game.level.is_wall(x, y)))
+
+
+def _snake_room(game, start, body, limit):
+    # Flood fill from start, stopping once there's clearly enough room
+    seen, stack = {start}, [start]
+    while stack and len(seen) < limit:
+        x, y = stack.pop()
+        for dx, dy in SNAKE_DIRS:
+            cell = (x + dx, y + dy)
+            if cell not in seen and not _snake_blocked(game, cell, body):
+                seen.add(cell)
+                stack.append(cell)
+    return len(seen)
+
+
+def snake_bot(game, rng, dt, state):
+    # Greedy toward food, but never into a pocket smaller than the snake.
+    # Only decides when the next update() will actually move.
+    if game.move_timer + dt < game.move_interval:
+        return None
+    (hx, hy), (fx, fy) = game.snake[0], game.food
+    body = set(game.snake[:-1])  # the tail moves out of the way
+    need = len(game.snake) + 1
+    best = None
+    for (dx, dy), key in SNAKE_DIRS.items():
+        if (dx, dy) == (-game.direction[0], -game.direction[1]):
+            continue
+        cell = (hx + dx, hy + dy)
+        if _snake_blocked(game, cell, body):
+            continue
+        cramped = _snake_room(game, cell, body, need) < need
+        rank = (cramped, abs(cell[0] - fx) + abs(cell[1] - fy), rng.random())
+        if best is None or rank < best[0]:
+            best = (rank, (dx, dy), key)
+    if best is not None and best[1] != game.direction:
+        game.handle_event(key_event(best[2]))
+    return None
+
+
+def pong_bot(game, rng, dt, state):
+    # Both paddles follow the ball with an aim error redrawn on every return;
+    # the rally ends when one of them misses
+    if "dx" not in state or (game.ball_dx > 0) != (state["dx"] > 0):
+        state["returns"] = state.get("returns", -1) + 1
+        state["dx"] = game.ball_dx
+        state["aim"] = (rng.gauss(0, game.paddle_h * 0.3), rng.gauss(0, game.paddle_h * 0.3))
+    ball = game.ball_y + game.ball_size / 2
+    held = set()
+    for y, aim, up, down in ((game.p1_y, state["aim"][0], pygame.K_w, pygame.K_s),
+                             (game.p2_y, state["aim"][1], pygame.K_UP, pygame.K_DOWN)):
+        diff = ball + aim - (y + game.paddle_h / 2)
+        if diff < -8:
+            held.add(up)
+        elif diff > 8:
+            held.add(down)
+    return BotKeys(held)
+
+
+BOTS = {"asteroids": asteroids_bot, "snake": snake_bot, "pong": pong_bot}
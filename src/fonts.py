@@ -0,0 +1,118 @@
+import json
+import os
+
+import pygame
+
+# -----------------------------
+# Font resolver
+# -----------------------------
+# pygame.font.SysFont enumerates every installed font (fc-list on Linux) the
+# first time it's called, even for the default font, which is a big part of
+# cold start. Instead:
+#   None          -> pygame's bundled default font, no lookup at all
+#   bundled name  -> assets/fonts/<name>.ttf (e.g. "DejaVuSans")
+#   anything else -> path cached on disk from an earlier run, and only on a
+#                    miss pygame.font.match_font (the slow scan); misses are
+#                    cached too, so a missing font costs one scan ever
+# FONTS (global_vars.py) loads each font the first time it's used.
+#
+# Delete the cache (GOOBCUBE_FONT_CACHE, default ~/.cache/goobcube/fonts.json)
+# after installing fonts.
+
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "fonts")
+CACHE_PATH = os.environ.get(
+    "GOOBCUBE_FONT_CACHE",
+    os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "goobcube", "fonts.json"))
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+_bundled = None
+_cache = None
+
+
+def _key(name):
+    return "".join(c for c in name.lower() if c.isalnum())
+
+
+def _bundled_fonts():
+    global _bundled
+    if _bundled is None:
+        _bundled = {}
+        if os.path.isdir(BUNDLED_DIR):
+            for filename in os.listdir(BUNDLED_DIR):
+                stem, ext = os.path.splitext(filename)
+                if ext.lower() in FONT_EXTENSIONS:
+                    _bundled[_key(stem)] = os.path.join(BUNDLED_DIR, filename)
+    return _bundled
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH) as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache():
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        tmp = CACHE_PATH + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(_cache, f, indent=1, sort_keys=True)
+        os.replace(tmp, CACHE_PATH)
+    except OSError as e:
+        print(f"⚠️ Could not write font cache {CACHE_PATH}: {e}")
+
+
+def font_path(name):
+    """Path of the font called `name`, or None for pygame's default font."""
+    if not name:
+        return None
+    key = _key(name)
+    bundled = _bundled_fonts().get(key)
+    if bundled is not None:
+        return bundled
+    cache = _load_cache()
+    if key in cache and (cache[key] is None or os.path.exists(cache[key])):
+        return cache[key]
+    cache[key] = pygame.font.match_font(name)  # the expensive system scan
+    _save_cache()
+    return cache[key]
+
+
+def _forget(name):
+    """Drop a cached path that turned out not to be a usable font."""
+    cache = _load_cache()
+    if cache.pop(_key(name), None) is not None:
+        _save_cache()
+
+
+def load_font(name, size):
+    path = font_path(name)
+    try:
+        font = pygame.font.Font(path, size)
+        # Font() accepts some files that aren't fonts (e.g. a saved HTML
+        # page); the failure only shows up on the first render.
+        font.render("A", True, (255, 255, 255))
+        return font
+    except (OSError, pygame.error) as e:
+        print(f"⚠️ Could not load font {name!r}: {e}; using the default font")
+        if path is not None:
+            _forget(name)
+        return pygame.font.Font(None, size)
+
+
+class LazyFonts(dict):
+    """FONTS["body"] etc.: each font is loaded the first time it's looked up."""
+
+    def __init__(self, specs):
+        super().__init__()
+        self.specs = specs  # key -> (font name or None, size)
+
+    def __missing__(self, key):
+        name, size = self.specs[key]
+        font = self[key] = load_font(name, size)
+        return font
@@ -2,7 +2,21 @@ from global_vars import WIDTH, HEIGHT, FPS, TITLE, Colors, FONTS
 import pygame
 import random
 import math
-from utils import draw_shadowed_text, rounded_rect, WALL_BEEP
+import struct
+from collections import namedtuple
+from utils import draw_shadowed_text, rounded_rect, load_music, WALL_BEEP
+from telemetry import emit
+from game_state import StateReader, StateWriter, level_path, resolve_level
+
+STATE_TAG, STATE_VERSION = 2, 1
+# score, lives, level, alive, ship pos/vel/angle, shot cooldown, respawn and invincibility timers
+STATE = struct.Struct("<IiI?5d3d")
+ROCK = struct.Struct("<6dB")  # pos, vel, angle, rot speed, size; then its verts as an f64 array
+COUNT = struct.Struct("<I")
+
+# What draw needs from one frame, frozen: polygons are already transformed, so
+# rendering never reads the live game (see App --pipelined)
+AsteroidsFrame = namedtuple("AsteroidsFrame", "score lives level asteroids bullets ship invincible alive return_prompt prompt_choice")
 
 # -----------------------------
 # Asteroids mini-game
@@ -32,6 +46,11 @@ class AsteroidsGame:
         self.score = 0
         self.lives = 3
         self.level = 1
+        self.level_data = None  # levels.Level with wave definitions, or None for the built-in waves
+
+        # Tuning (sim_farm.py sweeps these)
+        self.wave_base = 3        # built-in waves have wave_base + level rocks
+        self.shot_interval = 0.18  # seconds between shots
 
         # Timers
         self._shot_cooldown = 0.0
@@ -48,12 +67,19 @@ class AsteroidsGame:
     def on_enter(self):
         if not self._music_loaded:
             try:
-                pygame.mixer.music.load(self.music_path)
+                load_music(self.music_path)
                 self._music_loaded = True
             except Exception as e:
                 print(f"Music load error: {e}")
         pygame.mixer.music.play(-1)
 
+    def new_game(self):
+        # Hard reset: fresh score, lives and wave (game over, or nothing to resume)
+        self.score = 0
+        self.lives = 3
+        self.level = 1
+        self.reset()
+
     def reset(self):
         # Preserve score/lives across deaths; only hard reset on game over
         self._init_player(new_life=True)
@@ -67,12 +93,55 @@ class AsteroidsGame:
         # (Re)start music if needed
         if not self._music_loaded:
             try:
-                pygame.mixer.music.load(self.music_path)
+                load_music(self.music_path)
                 self._music_loaded = True
             except Exception as e:
                 print(f"Music load error: {e}")
         pygame.mixer.music.play(-1)
 
+    # ---------- Suspend/resume ----------
+
+    def save_state(self):
+        w = StateWriter(STATE_TAG, STATE_VERSION)
+        w.text(level_path(self.level_data))
+        w.pack(STATE, self.score, self.lives, self.level, self.alive,
+               *self.ship_pos, *self.ship_vel, self.ship_angle,
+               self._shot_cooldown, self._respawn_timer, self._invincible_timer)
+        w.array("d", [v for b in self.bullets for v in (*b["pos"], *b["vel"], b["life"])])
+        w.pack(COUNT, len(self.asteroids))
+        for ast in self.asteroids:
+            w.pack(ROCK, *ast["pos"], *ast["vel"], ast["angle"], ast["rot_speed"], ast["size"])
+            w.array("d", [c for v in ast["verts"] for c in v])
+        w.rng(self._rng)
+        return w.bytes()
+
+    def load_state(self, data, levels=None):
+        r = StateReader(data, STATE_TAG, STATE_VERSION)
+        self.level_data = resolve_level(r.text(), self.level_data, levels)
+        (self.score, self.lives, self.level, self.alive, px, py, vx, vy, self.ship_angle,
+         self._shot_cooldown, self._respawn_timer, self._invincible_timer) = r.unpack(STATE)
+        self.ship_pos = pygame.Vector2(px, py)
+        self.ship_vel = pygame.Vector2(vx, vy)
+        self.ship_radius = 14
+        flat = r.array("d")
+        self.bullets = [{"pos": pygame.Vector2(flat[i], flat[i + 1]), "vel": pygame.Vector2(flat[i + 2], flat[i + 3]),
+                         "life": flat[i + 4]} for i in range(0, len(flat), 5)]
+        (count,) = r.unpack(COUNT)
+        self.asteroids = []
+        for _ in range(count):
+            px, py, vx, vy, angle, rot_speed, size = r.unpack(ROCK)
+            verts = r.array("d")
+            self.asteroids.append({
+                "pos": pygame.Vector2(px, py),
+                "vel": pygame.Vector2(vx, vy),
+                "verts": [pygame.Vector2(verts[i], verts[i + 1]) for i in range(0, len(verts), 2)],
+                "angle": angle,
+                "rot_speed": rot_speed,
+                "size": size,
+            })
+        r.rng(self._rng)
+        self.return_prompt = False
+
     # ---------- Entities ----------
 
     def _init_player(self, new_life=False):
@@ -84,10 +153,38 @@ class AsteroidsGame:
         self.ship_radius = 14
         self._invincible_timer = 2.0 if new_life else 0.0
 
+    def set_level(self, level):
+        # Takes effect from the next wave
+        self.level_data = level
+
+    def apply_patch(self, patch):
+        # Live edit from the editor: respawn the wave in play only if its definition changed
+        data = self.level_data
+        before = min(self.level, data.wave_count) - 1 if data.wave_count else None
+        data.apply_patch(patch)
+        waves = patch.get("waves")
+        if waves is None or not hasattr(self, "asteroids"):
+            return
+        after = min(self.level, data.wave_count) - 1 if data.wave_count else None
+        if after != before or str(after) in waves.get("set", {}):
+            self.spawn_wave(self.level)
+
     def spawn_wave(self, level):
         # Spawn N asteroids around the edges, avoiding center
         self.asteroids = []
-        n = 3 + level
+        data = self.level_data
+        if data is not None and data.wave_count:
+            # Past the last defined wave, keep repeating it with one more large rock per level
+            index = min(level, data.wave_count) - 1
+            large, medium, small, speed_min, speed_max = data.wave(index)
+            large += level - 1 - index
+            for size, count in ((3, large), (2, medium), (1, small)):
+                for _ in range(count):
+                    pos = self._random_edge_position(margin=32)
+                    vel = self._random_unit() * self._rng.uniform(speed_min, speed_max)
+                    self.asteroids.append(self._make_asteroid(pos, vel, size))
+            return
+        n = self.wave_base + level
         for _ in range(n):
             pos = self._random_edge_position(margin=32)
             vel = self._random_unit() * self._rng.uniform(40, 100)  # px/s
@@ -133,20 +230,19 @@ class AsteroidsGame:
                     self.return_prompt = False
             elif event.key == pygame.K_ESCAPE:
                 self.return_prompt = False
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+            result = "next_level"
         elif self.alive and event.type == pygame.KEYDOWN:
             if event.key in (pygame.K_SPACE, pygame.K_RETURN, pygame.K_KP_ENTER):
                 self._fire_bullet()
         if (not self.alive) and event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
             # Hard restart on game over
-            self.score = 0
-            self.lives = 3
-            self.level = 1
-            self.reset()
+            self.new_game()
         return result
 
     # ---------- Update ----------
 
-    def update(self, dt):
+    def update(self, dt, keys=None):
         if self.return_prompt:
             return
 
@@ -158,8 +254,9 @@ class AsteroidsGame:
         if not self.alive:
             return
 
-        # Keyboard state for continuous controls
-        keys = pygame.key.get_pressed()
+        # Keyboard state for continuous controls (or a bot's, headless)
+        if keys is None:
+            keys = pygame.key.get_pressed()
         turn_speed = 200.0  # deg/s
         thrust_acc = 220.0  # px/s^2
         friction = 0.995
@@ -195,6 +292,7 @@ class AsteroidsGame:
 
         # Advance level if cleared
         if not self.asteroids and self.alive:
+            emit("wave_cleared", game="asteroids", level=self.level, score=self.score)
             self.level += 1
             self.spawn_wave(self.level)
 
@@ -227,6 +325,7 @@ class AsteroidsGame:
                 if self._circle_intersect_asteroid(self.ship_pos, self.ship_radius, ast):
                     self.lives -= 1
                     WALL_BEEP.play()
+                    emit("death", game="asteroids", score=self.score, lives=self.lives, level=self.level)
                     if self.lives <= 0:
                         self.alive = False
                     else:
@@ -236,70 +335,73 @@ class AsteroidsGame:
 
     # ---------- Rendering ----------
 
+    def snapshot(self):
+        return AsteroidsFrame(
+            self.score, self.lives, self.level,
+            tuple(self._asteroid_points(ast) for ast in self.asteroids),
+            tuple((int(b["pos"].x), int(b["pos"].y)) for b in self.bullets),
+            self._ship_points(),
+            self._invincible_timer > 0,
+            self.alive, self.return_prompt, self.prompt_choice,
+        )
+
     def draw(self, surf):
+        self.render(surf, self.snapshot())
+
+    def render(self, surf, frame):
         surf.fill(Colors.BG)
 
         # Header
         draw_shadowed_text(surf, "Asteroids", FONTS["h1"], Colors.HILITE, (28, 20))
         draw_shadowed_text(
             surf,
-            "Left/Right: rotate • Up: thrust • Space: fire • Esc: return",
+            "Left/Right: rotate • Up: thrust • Space: fire • Tab: next level • Esc: return",
             FONTS["body"],
             Colors.MUTED,
             (32, 80),
         )
-        draw_shadowed_text(surf, f"Score: {self.score}", FONTS["body"], Colors.ACCENT, (WIDTH - 220, 20))
-        draw_shadowed_text(surf, f"Lives: {self.lives}  Level: {self.level}", FONTS["body"], Colors.ACCENT, (WIDTH - 220, 48))
+        draw_shadowed_text(surf, f"Score: {frame.score}", FONTS["body"], Colors.ACCENT, (WIDTH - 220, 20))
+        draw_shadowed_text(surf, f"Lives: {frame.lives}  Level: {frame.level}", FONTS["body"], Colors.ACCENT, (WIDTH - 220, 48))
 
         # Playfield
         rounded_rect(surf, Colors.PANEL, self.wall, radius=16)
         pygame.draw.rect(surf, Colors.ACCENT_DIM, self.wall, width=2, border_radius=16)
 
         # Draw asteroids
-        for ast in self.asteroids:
-            self._draw_asteroid(surf, ast)
+        for pts in frame.asteroids:
+            pygame.draw.polygon(surf, Colors.ACCENT_DIM, pts, width=2)
 
         # Draw bullets
-        for b in self.bullets:
-            p = (int(b["pos"].x), int(b["pos"].y))
+        for p in frame.bullets:
             pygame.draw.circle(surf, Colors.HILITE, p, 2)
 
         # Draw ship (blink when invincible)
-        if not self.alive:
-            self._draw_gameover(surf)
+        if not frame.alive:
+            self._draw_gameover(surf, frame.score)
         else:
-            blink = (self._invincible_timer > 0) and (int(pygame.time.get_ticks() * 0.01) % 2 == 0)
+            blink = frame.invincible and (int(pygame.time.get_ticks() * 0.01) % 2 == 0)
             if not blink:
-                self._draw_ship(surf)
+                pygame.draw.polygon(surf, Colors.HILITE, frame.ship, width=2)
 
-        if self.return_prompt:
-            self._draw_prompt(surf)
+        if frame.return_prompt:
+            self._draw_prompt(surf, frame.prompt_choice)
 
-    def _draw_ship(self, surf):
+    def _ship_points(self):
         # Triangle centered on ship_pos, pointing at ship_angle
         ang = math.radians(self.ship_angle)
         tip = pygame.Vector2(math.cos(ang), math.sin(ang)) * (self.ship_radius + 6)
         left = pygame.Vector2(math.cos(ang + 2.5), math.sin(ang + 2.5)) * (self.ship_radius)
         right = pygame.Vector2(math.cos(ang - 2.5), math.sin(ang - 2.5)) * (self.ship_radius)
-        pts = [
-            (self.ship_pos + tip),
-            (self.ship_pos + left),
-            (self.ship_pos + right),
-        ]
-        pygame.draw.polygon(surf, Colors.HILITE, pts, width=2)
-
-    def _draw_asteroid(self, surf, ast):
+        return tuple(tuple(self.ship_pos + v) for v in (tip, left, right))
+
+    def _asteroid_points(self, ast):
         # Transform verts by rotation & translation
         rot = math.radians(ast["angle"])
         ca, sa = math.cos(rot), math.sin(rot)
-        pts = []
-        for v in ast["verts"]:
-            x = v.x * ca - v.y * sa
-            y = v.x * sa + v.y * ca
-            pts.append((ast["pos"].x + x, ast["pos"].y + y))
-        pygame.draw.polygon(surf, Colors.ACCENT_DIM, pts, width=2)
+        px, py = ast["pos"].x, ast["pos"].y
+        return tuple((px + v.x * ca - v.y * sa, py + v.x * sa + v.y * ca) for v in ast["verts"])
 
-    def _draw_prompt(self, surf):
+    def _draw_prompt(self, surf, choice):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 140))
         surf.blit(overlay, (0, 0))
@@ -310,7 +412,7 @@ class AsteroidsGame:
         pygame.draw.rect(surf, Colors.ACCENT_DIM, rect, width=2, border_radius=18)
 
         title = "Return to main menu?"
-        subtitle = "Current game will be reset."
+        subtitle = "Your game will be here when you come back."
         title_img = FONTS["h2"].render(title, True, Colors.HILITE)
         surf.blit(title_img, (rect.centerx - title_img.get_width()//2, rect.y + 24))
         sub_img = FONTS["body"].render(subtitle, True, Colors.MUTED)
@@ -332,10 +434,10 @@ class AsteroidsGame:
         surf.blit(no_text, (no_rect.centerx - no_text.get_width() // 2, no_rect.centery - no_text.get_height() // 2))
         surf.blit(yes_text, (yes_rect.centerx - yes_text.get_width() // 2, yes_rect.centery - yes_text.get_height() // 2))
 
-        sel_rect = yes_rect if self.prompt_choice == 1 else no_rect
+        sel_rect = yes_rect if choice == 1 else no_rect
         pygame.draw.rect(surf, Colors.ACCENT, sel_rect.inflate(6, 6), width=3, border_radius=14)
 
-    def _draw_gameover(self, surf):
+    def _draw_gameover(self, surf, score):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 140))
         surf.blit(overlay, (0, 0))
@@ -346,7 +448,7 @@ class AsteroidsGame:
         pygame.draw.rect(surf, Colors.ACCENT_DIM, rect, width=2, border_radius=18)
 
         title = "Game Over"
-        subtitle = f"Score: {self.score} • Press Enter to restart"
+        subtitle = f"Score: {score} • Press Enter to restart"
         title_img = FONTS["h2"].render(title, True, Colors.HILITE)
         surf.blit(title_img, (rect.centerx - title_img.get_width()//2, rect.y + 24))
         sub_img = FONTS["body"].render(subtitle, True, Colors.ACCENT)
@@ -368,7 +470,7 @@ class AsteroidsGame:
             "life": 0.9,  # seconds
         }
         self.bullets.append(bullet)
-        self._shot_cooldown = 0.18
+        self._shot_cooldown = self.shot_interval
         # Optional feedback
         try:
             WALL_BEEP.play()
@@ -1,8 +1,14 @@
 from global_vars import WIDTH, HEIGHT, FPS, TITLE, Colors
 import pygame
 import math
+import struct
 from utils import (draw_shadowed_text, rounded_rect, WALL_BEEP)
 from global_vars import FONTS
+from game_state import StateReader, StateWriter
+
+STATE_TAG, STATE_VERSION = 4, 1
+STATE = struct.Struct("<4d")  # position, velocity
+
 # -----------------------------
 # Ball mini-game
 # -----------------------------
@@ -22,6 +28,15 @@ class BallGame:
         self.max_speed = 640.0
         self.wall = pygame.Rect(24, 96, WIDTH - 48, HEIGHT - 128)  # playfield
 
+    def save_state(self):
+        w = StateWriter(STATE_TAG, STATE_VERSION)
+        w.pack(STATE, self.x, self.y, self.vx, self.vy)
+        return w.bytes()
+
+    def load_state(self, data, levels=None):
+        self.x, self.y, self.vx, self.vy = StateReader(data, STATE_TAG, STATE_VERSION).unpack(STATE)
+        self.return_prompt = False
+
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
             self.return_prompt = True
@@ -118,7 +133,7 @@ class BallGame:
         pygame.draw.rect(surf, Colors.ACCENT_DIM, rect, width=2, border_radius=18)
 
         title = "Return to main menu?"
-        subtitle = "Current game will be reset."
+        subtitle = "Your game will be here when you come back."
         title_img = FONTS["h2"].render(title, True, Colors.HILITE)
         surf.blit(title_img, (rect.centerx - title_img.get_width()//2, rect.y + 24))
         sub_img = FONTS["body"].render(subtitle, True, Colors.MUTED)
@@ -2,11 +2,31 @@ from global_vars import WIDTH, HEIGHT, FPS, TITLE, Colors, FONTS
 import pygame
 import time
 import mido
-from mido import Message, open_output, open_input, get_output_names, get_input_names
+from mido import Message
 import colorsys
+import os
+import glob
 import random
-import threading
+import queue
+from collections import namedtuple
 from utils import draw_shadowed_text, rounded_rect, WALL_BEEP  # prompt visuals consistent with other games
+from synth import SoftSynth
+from midi_devices import MidiDeviceManager
+from midi_output import MidiOutputWorker
+from stats import LatencyStats
+from midi_scheduler import MidiScheduler
+from midi_file import MidiRecorder, MidiPlayer
+from piano_roll import PianoRoll
+from telemetry import emit
+from fonts import load_font
+
+RECORDINGS_DIR = "../recordings"
+# e.g. GOOBCUBE_MIDI_BACKEND=midi_loopback to run without any MIDI hardware
+MIDI_BACKEND = os.environ.get("GOOBCUBE_MIDI_BACKEND", "mido.backends.rtmidi")
+
+# One frame of render state (see App --pipelined); the keyboard layer is a
+# render-side cache and only ever touched by render()
+PianoFrame = namedtuple("PianoFrame", "notes roll position goob_text goob_pos return_prompt prompt_choice")
 
 # -----------------------------
 # Piano/MIDI mini-game
@@ -18,7 +38,7 @@ class PianoMidiGame:
         self.screen_height = HEIGHT
         self.font_size = self.screen_height // 5
         self.font = None
-        self._load_font()  # Try DejaVuSans.ttf, then default
+        self._load_font()  # Bundled DejaVuSans, then default
 
         self.goob_color = self._random_color()
         self.goob_text = self._render_goob(self.goob_color)
@@ -45,6 +65,19 @@ class PianoMidiGame:
         self.black_keys_map = {
             49: 0.5, 51: 1.5, 54: 3.5, 56: 4.5, 58: 5.5, 61: 7.5, 63: 8.5, 66: 10.5, 68: 11.5, 70: 12.5
         }
+        self.key_rects = self._layout_keys()
+        self.keyboard_top = self.screen_height - int(self.screen_height * 0.4)
+
+        # Precomputed note -> color (the HSV math only runs once per note, here)
+        self.note_colors = [self._note_to_color(n) for n in range(128)]
+
+        # Keyboard is pre-rendered; only keys whose state changed get repainted
+        self._keyboard_surf = pygame.Surface((self.screen_width, self.screen_height - self.keyboard_top))
+        self._keyboard_notes = frozenset()
+        self._render_keyboard(set(self.key_rects))
+
+        # Falling-notes view (F7), plays the newest take
+        self.roll = None
 
         # Timers
         self.last_note_time = time.time()
@@ -55,22 +88,31 @@ class PianoMidiGame:
         self.prompt_choice = 0  # 0=No, 1=Yes
 
         # ---- MIDI setup ----
-        mido.set_backend('mido.backends.rtmidi')
+        mido.set_backend(MIDI_BACKEND)
         self.CURRENT_INSTRUMENT = 80
         self.midi_output = None
         self.midi_input = None
-        self._thread = None
-        self._thread_running = False
+        # Input arrives on rtmidi's callback thread; only the main thread touches
+        # active_notes, by draining this queue once per frame.
+        self._midi_queue = queue.SimpleQueue()
+        self._listening = False
+        self.input_latency = LatencyStats()
+        # All sends are queued to a worker thread so a slow synth can't stall rendering
+        self.output_worker = MidiOutputWorker(lambda: self.midi_output)
+        # Timed note-offs/previews go through here instead of sleeping in handle_event
+        self.scheduler = MidiScheduler(self._forward)
+        # Record (F5) / play back (F6) takes; playback has its own scheduler so
+        # stopping it doesn't cancel preview note-offs
+        self.recorder = MidiRecorder()
+        self.player = None
+        self.playback_scheduler = MidiScheduler(self._playback_send)
         self._init_midi()
 
     # ---------- Lifecycle ----------
 
     def on_enter(self):
-        # Start/ensure MIDI listener
-        if (self.midi_input is not None) and not self._thread_running:
-            self._thread_running = True
-            self._thread = threading.Thread(target=self._midi_listener, daemon=True)
-            self._thread.start()
+        # Start accepting MIDI input (the port callback drops messages otherwise)
+        self._listening = True
         # Make sure any stuck notes are off when entering
         self._all_notes_off()
 
@@ -98,7 +140,16 @@ class PianoMidiGame:
                 if self.prompt_choice == 1:
                     # Confirm return to menu
                     self.return_prompt = False
+                    self._listening = False
+                    self._stop_recording()
+                    self._stop_visualizer()
                     self._all_notes_off()
+                    if self.input_latency.count:
+                        print(self.input_latency.format("🎹 MIDI input latency"))
+                    if self.scheduler.jitter.count:
+                        print(self.scheduler.jitter.format("⏱ MIDI scheduler jitter"))
+                    if self.output_worker.sent:
+                        print("📤 MIDI output:", self.output_worker.format_stats())
                     result = "return_to_menu"
                 else:
                     self.return_prompt = False
@@ -108,7 +159,23 @@ class PianoMidiGame:
         else:
             # Normal controls (preserve original behavior)
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
+                if event.key == pygame.K_F5:
+                    if self.recorder.recording:
+                        self._stop_recording()
+                    else:
+                        self.recorder.start()
+                        print("⏺ Recording...")
+                elif event.key == pygame.K_F6:
+                    if self.player is not None and self.player.playing:
+                        self._stop_visualizer()
+                    else:
+                        self._start_playback()
+                elif event.key == pygame.K_F7:
+                    if self.roll is not None:
+                        self._stop_visualizer()
+                    else:
+                        self._start_visualizer()
+                elif event.key == pygame.K_UP:
                     self.CURRENT_INSTRUMENT = (self.CURRENT_INSTRUMENT + 1) % 128
                     self._program_change(self.CURRENT_INSTRUMENT)
                     self._preview_note(60, 0.1)
@@ -136,6 +203,9 @@ class PianoMidiGame:
     # ---------- Update / Draw ----------
 
     def update(self, dt):
+        self._drain_midi()
+        if self.roll is not None:
+            self._update_visualizer()
         if self.return_prompt:
             return
 
@@ -169,42 +239,44 @@ class PianoMidiGame:
             self.goob_color = self._random_color()
             self.goob_text = self._render_goob(self.goob_color)
 
-    def draw(self, surf):
-        # Keep visuals the same: black background, keyboard at bottom, bouncing text
-        surf.fill((0, 0, 0))
-
-        # --- Draw keyboard (as in original) ---
-        white_width = self.screen_width // len(self.white_keys_order)
-        white_height = int(self.screen_height * 0.4)
-        black_width = int(white_width * 0.6)
-        black_height = int(white_height * 0.6)
-
-        # White keys
-        for i, note in enumerate(self.white_keys_order):
-            x = i * white_width
-            rect = pygame.Rect(x, self.screen_height - white_height, white_width, white_height)
-            color = self._note_to_color(note) if note in self.active_notes else (255, 255, 255)
-            pygame.draw.rect(surf, color, rect)
-            pygame.draw.rect(surf, (0, 0, 0), rect, 2)
+    def snapshot(self):
+        playing = self.roll is not None and self.player is not None
+        return PianoFrame(
+            frozenset(self.active_notes),
+            self.roll if playing else None,
+            self.player.position() if playing else 0.0,
+            self.goob_text, self.goob_rect.topleft,
+            self.return_prompt, self.prompt_choice,
+        )
 
-        # Black keys overlay
-        for note, rel_pos in self.black_keys_map.items():
-            x = int(rel_pos * white_width + white_width / 2 - black_width / 2)
-            rect = pygame.Rect(x, self.screen_height - white_height, black_width, black_height)
-            color = self._note_to_color(note) if note in self.active_notes else (0, 0, 0)
-            pygame.draw.rect(surf, color, rect)
-            pygame.draw.rect(surf, (50, 50, 50), rect, 1)
+    def draw(self, surf):
+        self.render(surf, self.snapshot())
 
-        # Bouncing label
-        surf.blit(self.goob_text, self.goob_rect)
+    def render(self, surf, frame):
+        # Keep visuals the same: black background, keyboard at bottom, bouncing text
+        surf.fill((0, 0, 0), (0, 0, self.screen_width, self.keyboard_top))
+
+        # --- Keyboard: repaint changed keys on the cached surface, then one blit ---
+        if frame.notes != self._keyboard_notes:
+            self._render_keyboard(frame.notes ^ self._keyboard_notes, frame.notes)
+            self._keyboard_notes = frame.notes
+        surf.blit(self._keyboard_surf, (0, self.keyboard_top))
+
+        if frame.roll is not None:
+            # Notes fall onto the top edge of the keyboard
+            frame.roll.draw(surf, frame.position, self.key_rects,
+                            self.note_colors.__getitem__, 0, self.keyboard_top)
+        else:
+            # Bouncing label
+            surf.blit(frame.goob_text, frame.goob_pos)
 
         # Return prompt overlay
-        if self.return_prompt:
-            self._draw_prompt(surf)
+        if frame.return_prompt:
+            self._draw_prompt(surf, frame.prompt_choice)
 
     # ---------- Prompt UI (same style as other games) ----------
 
-    def _draw_prompt(self, surf):
+    def _draw_prompt(self, surf, choice):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 140))
         surf.blit(overlay, (0, 0))
@@ -238,101 +310,201 @@ class PianoMidiGame:
         surf.blit(no_text, (no_rect.centerx - no_text.get_width() // 2, no_rect.centery - no_text.get_height() // 2))
         surf.blit(yes_text, (yes_rect.centerx - yes_text.get_width() // 2, yes_rect.centery - yes_text.get_height() // 2))
 
-        sel_rect = yes_rect if self.prompt_choice == 1 else no_rect
+        sel_rect = yes_rect if choice == 1 else no_rect
         pygame.draw.rect(surf, Colors.ACCENT, sel_rect.inflate(6, 6), width=3, border_radius=14)
 
     # ---------- MIDI helpers ----------
 
     def _init_midi(self):
-        # Output: prefer FluidSynth; fall back to first available; else None
-        out_name = next((n for n in get_output_names() if "fluid" in n.lower()), None)
-        if out_name is None:
-            names = get_output_names()
-            out_name = names[0] if names else None
-        if out_name:
+        # Ports are discovered (and re-discovered on hotplug) off the main thread:
+        # output is FluidSynth, otherwise the built-in synth (the first port on a
+        # Linux box is usually "Midi Through", which plays nothing);
+        # input prefers a microKEY, otherwise none.
+        self._soft_synth = None
+        self.devices = MidiDeviceManager(
+            on_output=self._set_midi_output,
+            on_input=self._set_midi_input,
+            input_callback=self._midi_listener,
+            any_output=False,
+        )
+
+    def _set_midi_output(self, port):
+        # Called from the device manager thread
+        if port is None:
+            port = self._fallback_synth()
+        emit("midi_output", port=getattr(port, "name", None))
+        self.midi_output = port
+        if port is not None:
+            self._program_change(self.CURRENT_INSTRUMENT)
+
+    def _set_midi_input(self, port):
+        self.midi_input = port
+
+    def _fallback_synth(self):
+        # No external synth: use the built-in one so the piano isn't silent
+        if self._soft_synth is None:
             try:
-                self.midi_output = open_output(out_name)
-                self._program_change(self.CURRENT_INSTRUMENT)
+                self._soft_synth = SoftSynth()
+                print("🎹 Using built-in software synth.")
             except Exception as e:
-                print(f"⚠️ Could not open MIDI output '{out_name}': {e}")
-                self.midi_output = None
+                print(f"⚠️ Could not start built-in synth: {e}")
+        return self._soft_synth
+
+    def _midi_listener(self, msg):
+        # Runs on the MIDI backend's callback thread: forward to the synth right
+        # away (that's the latency that matters) and leave UI state to the main loop.
+        if not self._listening:
+            return
+        stamp = time.perf_counter()
+        if msg.type == 'note_on' and msg.velocity > 0:
+            self._send_note_on(msg.note, msg.velocity, channel=getattr(msg, "channel", 0))
+        elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
+            self._send_note_off(msg.note, channel=getattr(msg, "channel", 0))
+        elif msg.type == 'control_change':
+            # Map CC1/CC2 to pitch wheel (like your script)
+            value = int((msg.value / 127) * 8191)
+            if msg.control in (1, 2):
+                self._send_pitchwheel(value, channel=getattr(msg, "channel", 0))
+            return
         else:
-            print("⚠️ No MIDI output devices available.")
+            return
+        self._midi_queue.put((stamp, msg))
 
-        # Input: prefer microKEY; otherwise none (no blocking selection)
-        in_name = next((n for n in get_input_names() if "microkey" in n.lower()), None)
-        if in_name:
+    def _drain_midi(self):
+        # Apply queued note state on the main thread, once per frame
+        now = time.perf_counter()
+        while True:
             try:
-                self.midi_input = open_input(in_name)
-            except Exception as e:
-                print(f"⚠️ Could not open MIDI input '{in_name}': {e}")
-                self.midi_input = None
-        else:
-            self.midi_input = None  # optional
-
-    def _midi_listener(self):
-        while self._thread_running:
-            if self.midi_input:
-                for msg in self.midi_input.iter_pending():
-                    if msg.type == 'note_on' and msg.velocity > 0:
-                        self._forward(msg)
-                        self.active_notes.add(msg.note)
-                        self.last_note_time = time.time()
-                    elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
-                        self._send_note_off(msg.note, channel=getattr(msg, "channel", 0))
-                        self.active_notes.discard(msg.note)
-                    elif msg.type == 'control_change':
-                        # Map CC1/CC2 to pitch wheel (like your script)
-                        value = int((msg.value / 127) * 8191)
-                        if msg.control in (1, 2):
-                            self._send_pitchwheel(value, channel=getattr(msg, "channel", 0))
-            # Light sleep to avoid busy loop
-            time.sleep(0.002)
+                stamp, msg = self._midi_queue.get_nowait()
+            except queue.Empty:
+                break
+            if stamp is not None:
+                self.input_latency.add(now - stamp)
+            if msg.type == 'note_on' and msg.velocity > 0:
+                self.active_notes.add(msg.note)
+                self.last_note_time = time.time()
+            else:
+                self.active_notes.discard(msg.note)
 
     def _forward(self, msg):
-        if self.midi_output:
-            try:
-                self.midi_output.send(msg)
-            except Exception as e:
-                print("MIDI send error:", e)
+        # Never touches the port directly; the worker sends (and coalesces) in bursts
+        self.output_worker.send(msg)
 
     def _program_change(self, program):
-        if self.midi_output:
-            self._forward(Message('program_change', program=program, channel=0))
+        self._send(Message('program_change', program=program, channel=0))
 
     def _preview_note(self, note, dur=0.2):
         if not self.midi_output:
             return
-        try:
-            self._forward(Message('note_on', note=note, velocity=127, channel=0))
-            # Non-blocking-ish preview using short sleep (keeps visuals unchanged)
-            time.sleep(max(0.01, dur))
-        finally:
-            self._forward(Message('note_off', note=note, velocity=0, channel=0))
+        self._forward(Message('note_on', note=note, velocity=127, channel=0))
+        # The note-off is timed by the scheduler thread, so handle_event returns immediately
+        self.scheduler.schedule(max(0.01, dur), Message('note_off', note=note, velocity=0, channel=0))
+
+    def _send(self, msg):
+        # Everything played live (keyboard or MIDI input) goes through here,
+        # so it's what ends up in a recording
+        self.recorder.capture(msg)
+        if self.midi_output:
+            self._forward(msg)
 
     def _send_note_on(self, note, velocity=127, channel=0):
-        if self.midi_output:
-            self._forward(Message('note_on', note=note, velocity=velocity, channel=channel))
+        self._send(Message('note_on', note=note, velocity=velocity, channel=channel))
 
     def _send_note_off(self, note, channel=0):
-        if self.midi_output:
-            self._forward(Message('note_off', note=note, velocity=0, channel=channel))
+        self._send(Message('note_off', note=note, velocity=0, channel=channel))
 
     def _send_pitchwheel(self, value, channel=0):
-        if self.midi_output:
-            self._forward(Message('pitchwheel', pitch=value, channel=channel))
+        self._send(Message('pitchwheel', pitch=value, channel=channel))
 
-    def _all_notes_off(self):
-        if not self.midi_output:
+    # ---------- Recording / playback ----------
+
+    def _stop_recording(self):
+        if not self.recorder.recording:
+            return
+        self.recorder.stop()
+        if not self.recorder.events:
+            print("⏹ Recording stopped (nothing played).")
             return
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        path = os.path.join(RECORDINGS_DIR, time.strftime("take-%Y%m%d-%H%M%S.mid"))
         try:
-            # CC 123 (All Notes Off) is not universally honored; send explicit offs too
-            for n in list(self.active_notes):
-                self._send_note_off(n)
-            self.active_notes.clear()
-            self._forward(Message('control_change', control=123, value=0, channel=0))
-        except Exception:
-            pass
+            n = self.recorder.save(path)
+            print(f"💾 Saved {n} events to {path}")
+        except Exception as e:
+            print(f"⚠️ Could not save recording: {e}")
+
+    def _latest_recording(self):
+        takes = sorted(glob.glob(os.path.join(RECORDINGS_DIR, "*.mid")))
+        return takes[-1] if takes else None
+
+    def _start_playback(self, path=None):
+        path = path or self._latest_recording()
+        if path is None:
+            print("⚠️ No recordings to play yet (F5 to record).")
+            return
+        self._stop_playback()
+        try:
+            self.player = MidiPlayer(path, self.playback_scheduler)
+        except Exception as e:
+            print(f"⚠️ Could not open {path}: {e}")
+            return
+        self.player.start()
+        print(f"▶️ Playing {path}")
+
+    def _stop_playback(self):
+        if self.player is None:
+            return
+        self.player.close()
+        self.player = None
+        # Apply any already-queued playback notes first so none stay lit
+        self._drain_midi()
+        self._all_notes_off()
+
+    def _start_visualizer(self, path=None):
+        path = path or self._latest_recording()
+        if path is None:
+            print("⚠️ No recordings to visualize yet (F5 to record).")
+            return
+        self._stop_visualizer()
+        # The note index builds in the background; playback starts once it's ready
+        self.roll = PianoRoll(path)
+        print(f"🎼 Loading {path}...")
+
+    def _update_visualizer(self):
+        if not self.roll.ready:
+            return
+        if self.roll.error is not None:
+            print(f"⚠️ Could not load {self.roll.path}: {self.roll.error}")
+            self.roll = None
+            return
+        if self.player is None:
+            try:
+                self.player = MidiPlayer(self.roll.path, self.playback_scheduler)
+            except Exception as e:
+                print(f"⚠️ Could not open {self.roll.path}: {e}")
+                self.roll = None
+                return
+            # Lead-in so the first notes have time to fall onto the keys
+            self.player.start(offset=-self.roll.window)
+            print(f"🎼 {len(self.roll.index)} notes")
+        elif not self.player.playing:
+            self._stop_visualizer()
+
+    def _stop_visualizer(self):
+        self.roll = None
+        self._stop_playback()
+
+    def _playback_send(self, msg):
+        # Same output path as live input; notes also light up the keyboard
+        self._forward(msg)
+        if msg.type in ('note_on', 'note_off'):
+            self._midi_queue.put((None, msg))
+
+    def _all_notes_off(self):
+        # The worker knows what is really sounding (keys, MIDI input, playback)
+        # and sends explicit offs for those plus CC 123 as one burst
+        self.active_notes.clear()
+        self.output_worker.all_notes_off()
 
     # ---------- Utility: visuals/color ----------
 
@@ -347,12 +519,47 @@ class PianoMidiGame:
 
     def _load_font(self):
         try:
-            self.font = pygame.font.Font("DejaVuSans.ttf", self.font_size)
+            self.font = load_font("DejaVuSans", self.font_size)  # ships in assets/fonts
         except Exception:
-            try:
-                self.font = pygame.font.Font(None, self.font_size)
-            except Exception:
-                self.font = None
+            self.font = None
+
+    def _layout_keys(self):
+        # note -> on-screen key rect, same geometry draw() uses
+        white_width = self.screen_width // len(self.white_keys_order)
+        white_height = int(self.screen_height * 0.4)
+        black_width = int(white_width * 0.6)
+        black_height = int(white_height * 0.6)
+        top = self.screen_height - white_height
+        rects = {}
+        for i, note in enumerate(self.white_keys_order):
+            rects[note] = pygame.Rect(i * white_width, top, white_width, white_height)
+        for note, rel_pos in self.black_keys_map.items():
+            x = int(rel_pos * white_width + white_width / 2 - black_width / 2)
+            rects[note] = pygame.Rect(x, top, black_width, black_height)
+        return rects
+
+    def _render_keyboard(self, notes, lit=frozenset()):
+        # Repaint the given keys on the cached keyboard surface. A white key
+        # repaint covers the edges of its black neighbours, so those go too.
+        # `lit` is the set of notes drawn as pressed.
+        white = [n for n in self.white_keys_order if n in notes]
+        black = {n for n in self.black_keys_map if n in notes}
+        for note in white:
+            rect = self.key_rects[note]
+            for b in self.black_keys_map:
+                if self.key_rects[b].colliderect(rect):
+                    black.add(b)
+        top = self.keyboard_top
+        for note in white:
+            rect = self.key_rects[note].move(0, -top)
+            color = self.note_colors[note] if note in lit else (255, 255, 255)
+            pygame.draw.rect(self._keyboard_surf, color, rect)
+            pygame.draw.rect(self._keyboard_surf, (0, 0, 0), rect, 2)
+        for note in black:
+            rect = self.key_rects[note].move(0, -top)
+            color = self.note_colors[note] if note in lit else (0, 0, 0)
+            pygame.draw.rect(self._keyboard_surf, color, rect)
+            pygame.draw.rect(self._keyboard_surf, (50, 50, 50), rect, 1)
 
     def _note_to_name_octave(self, n):
         name = self.NOTE_NAMES[n % 12]
@@ -370,17 +577,17 @@ class PianoMidiGame:
 
     # ---------- Optional cleanup (if you ever need it) ----------
     def close(self):
-        # Stop listener thread
-        self._thread_running = False
+        # Stop accepting input and timed events
+        self._listening = False
+        self._stop_recording()
+        self._stop_visualizer()
+        self.scheduler.close()
+        self.playback_scheduler.close()
         # Ensure notes are off
         self._all_notes_off()
-        try:
-            if self.midi_input:
-                self.midi_input.close()
-        except Exception:
-            pass
-        try:
-            if self.midi_output:
-                self.midi_output.close()
-        except Exception:
-            pass
+        self.output_worker.close()
+        self.devices.close()
+        self.midi_input = None
+        self.midi_output = None
+        if self._soft_synth is not None:
+            self._soft_synth.close()
@@ -1,7 +1,13 @@
 import pygame
 import random
+import struct
 from global_vars import WIDTH, HEIGHT, FPS, Colors, FONTS
 from utils import draw_shadowed_text, rounded_rect, WALL_BEEP
+from telemetry import emit
+from game_state import StateReader, StateWriter, level_path, resolve_level
+
+STATE_TAG, STATE_VERSION = 3, 1
+STATE = struct.Struct("<6dII?")  # paddles, ball position and velocity, score, alive
 
 class PongGame:
     def __init__(self):
@@ -9,23 +15,57 @@ class PongGame:
         self.ball_size = 20
         self.paddle_speed = 320
         self.ball_speed = 320
+        self.obstacles = []  # pygame.Rects from the current level
+        self.level = None
+        self._rng = random.Random()
         self.reset()
         self.return_prompt = False
         self.prompt_choice = 0
 
+    def set_level(self, level):
+        # Arena shape and tuning from a compiled level (None = the classic empty court)
+        self.level = level
+        params = level.params if level is not None else {}
+        self.ball_speed = params.get("bspd", 320)
+        self.paddle_h = int(params.get("padh", 100))
+        self.obstacles = [pygame.Rect(r) for r in level.rects()] if level is not None else []
+
+    def apply_patch(self, patch):
+        # Live edit from the editor: new obstacles/tuning apply to the rally in progress
+        self.level.apply_patch(patch)
+        self.set_level(self.level)
+
     def reset(self):
         self.p1_y = HEIGHT // 2 - self.paddle_h // 2
         self.p2_y = HEIGHT // 2 - self.paddle_h // 2
         self.ball_x = WIDTH // 2 - self.ball_size // 2
         self.ball_y = HEIGHT // 2 - self.ball_size // 2
-        angle = random.choice([random.uniform(-0.3, 0.3), random.uniform(2.8, 3.4)])
-        self.ball_dx = self.ball_speed * (1 if random.random() < 0.5 else -1)
-        self.ball_dy = self.ball_speed * random.uniform(-0.5, 0.5)
+        rng = self._rng
+        angle = rng.choice([rng.uniform(-0.3, 0.3), rng.uniform(2.8, 3.4)])
+        self.ball_dx = self.ball_speed * (1 if rng.random() < 0.5 else -1)
+        self.ball_dy = self.ball_speed * rng.uniform(-0.5, 0.5)
         self.score = [0, 0]
         self.alive = True
         self.return_prompt = False  # Clear exit menu flag
         self.prompt_choice = 0      # Reset prompt selection
 
+    def save_state(self):
+        w = StateWriter(STATE_TAG, STATE_VERSION)
+        w.text(level_path(self.level))
+        w.pack(STATE, self.p1_y, self.p2_y, self.ball_x, self.ball_y, self.ball_dx, self.ball_dy,
+               *self.score, self.alive)
+        w.rng(self._rng)
+        return w.bytes()
+
+    def load_state(self, data, levels=None):
+        r = StateReader(data, STATE_TAG, STATE_VERSION)
+        self.set_level(resolve_level(r.text(), self.level, levels))
+        (self.p1_y, self.p2_y, self.ball_x, self.ball_y, self.ball_dx, self.ball_dy,
+         s1, s2, self.alive) = r.unpack(STATE)
+        self.score = [s1, s2]
+        r.rng(self._rng)
+        self.return_prompt = False
+
     def handle_event(self, event):
         result = None
         if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
@@ -40,6 +80,8 @@ class PongGame:
                     self.return_prompt = False
             elif event.key == pygame.K_ESCAPE:
                 self.return_prompt = False
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+            result = "next_level"
         elif not self.alive and event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
             self.reset()
         return result
@@ -83,6 +125,19 @@ class PongGame:
             self.ball_x = p2_rect.left - self.ball_size
             WALL_BEEP.play()
 
+        # Arena obstacles: bounce off whichever side we went in least
+        for rect in self.obstacles:
+            if ball_rect.colliderect(rect):
+                clip = ball_rect.clip(rect)
+                if clip.width < clip.height:
+                    self.ball_dx *= -1
+                    self.ball_x += -clip.width if ball_rect.centerx < rect.centerx else clip.width
+                else:
+                    self.ball_dy *= -1
+                    self.ball_y += -clip.height if ball_rect.centery < rect.centery else clip.height
+                WALL_BEEP.play()
+                break
+
         # Ball out of bounds
         if self.ball_x < 0:
             self.score[1] += 1
@@ -90,11 +145,13 @@ class PongGame:
         elif self.ball_x > WIDTH:
             self.score[0] += 1
             self.alive = False
+        if not self.alive:
+            emit("point", game="pong", score=list(self.score))
 
     def draw(self, surf):
         surf.fill(Colors.BG)
         draw_shadowed_text(surf, "Pong", FONTS["h1"], Colors.HILITE, (28, 20))
-        draw_shadowed_text(surf, "W/S: left paddle • Up/Down: right paddle • Esc: menu", FONTS["body"], Colors.MUTED, (32, 80))
+        draw_shadowed_text(surf, "W/S: left paddle • Up/Down: right paddle • Tab: next level • Esc: menu", FONTS["body"], Colors.MUTED, (32, 80))
         draw_shadowed_text(surf, f"{self.score[0]} : {self.score[1]}", FONTS["h2"], Colors.ACCENT, (WIDTH//2 - 40, 20))
 
         # Playfield
@@ -106,6 +163,9 @@ class PongGame:
         for y in range(96, HEIGHT - 128, 32):
             pygame.draw.rect(surf, Colors.ACCENT_DIM, (WIDTH//2 - 4, y, 8, 16), border_radius=4)
 
+        for rect in self.obstacles:
+            pygame.draw.rect(surf, Colors.ACCENT_DIM, rect, border_radius=6)
+
         # Paddles
         pygame.draw.rect(surf, Colors.HILITE, (32, self.p1_y, self.paddle_w, self.paddle_h), border_radius=8)
         pygame.draw.rect(surf, Colors.HILITE, (WIDTH - 32 - self.paddle_w, self.p2_y, self.paddle_w, self.paddle_h), border_radius=8)
@@ -127,7 +187,7 @@ class PongGame:
         rounded_rect(surf, (28, 32, 44), rect, radius=18)
         pygame.draw.rect(surf, Colors.ACCENT_DIM, rect, width=2, border_radius=18)
         title = "Return to main menu?"
-        subtitle = "Current game will be reset."
+        subtitle = "Your game will be here when you come back."
         title_img = FONTS["h2"].render(title, True, Colors.HILITE)
         surf.blit(title_img, (rect.centerx - title_img.get_width()//2, rect.y + 24))
         sub_img = FONTS["body"].render(subtitle, True, Colors.MUTED)
@@ -1,55 +1,173 @@
 from global_vars import WIDTH, HEIGHT, FPS, TITLE, Colors, FONTS
 import pygame
 import random
-from utils import draw_shadowed_text, rounded_rect, WALL_BEEP
+import struct
+from collections import namedtuple
+from utils import draw_shadowed_text, rounded_rect, load_music, WALL_BEEP
+from telemetry import emit
+from game_state import StateError, StateReader, StateWriter, level_path, resolve_level
+
+STATE_TAG, STATE_VERSION = 1, 1
+FOOD_TRIES = 64  # random probes before falling back to a list of the free cells
+STATE = struct.Struct("<bbHHIIId??")  # direction, food, food index, grow, score, move timer, alive, direction changed
+
+# One frame of render state (see App --pipelined). `walls` is the pre-drawn wall
+# layer; once a frame holds it, it's copied before being edited again.
+SnakeFrame = namedtuple("SnakeFrame", "score snake food alive area cell_size level_name walls return_prompt prompt_choice")
 
 # -----------------------------
 # Snake mini-game
 # -----------------------------
 class SnakeGame:
     def __init__(self):
-        self.cell_size = 24
-        self.grid_w = (WIDTH - 48) // self.cell_size
-        self.grid_h = (HEIGHT - 128) // self.cell_size
-        self.wall = pygame.Rect(24, 96, self.grid_w * self.cell_size, self.grid_h * self.cell_size)
+        self.level = None  # levels.Level, or None for the plain box
+        self._walls_surf = None
+        self._walls_shared = False  # a frame references _walls_surf
+        self._food_index = 0
+        self.move_interval = 0.13  # seconds per step
+        self._rng = random.Random()
+        self._layout()
         self.music_path = "../assets/music/NES.mp3"
         self._music_loaded = False
         # self.reset()
         self.return_prompt = False
         self.prompt_choice = 0  # 0 = No, 1 = Yes
 
+    def _layout(self):
+        # Fit the grid into the playfield area; levels may use a different grid size
+        area_w, area_h = WIDTH - 48, HEIGHT - 128
+        if self.level is None:
+            self.cell_size = 24
+            self.grid_w = area_w // self.cell_size
+            self.grid_h = area_h // self.cell_size
+        else:
+            self.grid_w, self.grid_h = self.level.grid_w, self.level.grid_h
+            self.cell_size = max(4, min(area_w // self.grid_w, area_h // self.grid_h))
+        self.wall = pygame.Rect(24, 96, self.grid_w * self.cell_size, self.grid_h * self.cell_size)
+
+    def set_level(self, level):
+        # Takes effect on the next reset()
+        self.level = level
+        self._layout()
+        self._walls_surf = None
+
+    def apply_patch(self, patch):
+        # Live edit from the editor: only the changed cells are redrawn
+        added, removed = self.level.apply_patch(patch)
+        if self._walls_surf is not None and (added or removed):
+            if self._walls_shared:
+                self._walls_surf = self._walls_surf.copy()
+                self._walls_shared = False
+            cs = self.cell_size
+            for x, y in removed:
+                self._walls_surf.fill((0, 0, 0, 0), (x * cs, y * cs, cs, cs))
+            for x, y in added:
+                pygame.draw.rect(self._walls_surf, Colors.MUTED, (x * cs, y * cs, cs, cs), border_radius=4)
+        if not hasattr(self, "snake"):
+            return  # not started yet; reset() picks everything up
+        if "food" in patch.get("set", {}):
+            self._food_index = 0
+            self.spawn_food()
+        elif self.level.is_wall(*self.food):
+            self.spawn_food()
+
+    def _render_walls(self):
+        # Walls never move: draw them once per level, blit every frame
+        surf = pygame.Surface(self.wall.size, pygame.SRCALPHA)
+        cs = self.cell_size
+        for x, y in self.level.wall_cells():
+            pygame.draw.rect(surf, Colors.MUTED, (x * cs, y * cs, cs, cs), border_radius=4)
+        return surf
+
     def on_enter(self):
         # Call this when the minigame is loaded/activated
         if not self._music_loaded:
             print("Loading music in on_enter")
-            pygame.mixer.music.load(self.music_path)
+            load_music(self.music_path)
             self._music_loaded = True
         print("Playing music in on_enter")
         pygame.mixer.music.play(-1)
 
     def reset(self):
         self.direction = (1, 0)
-        self.snake = [(self.grid_w // 2, self.grid_h // 2)]
+        start = (self.grid_w // 2, self.grid_h // 2)
+        if self.level is not None:
+            start = (int(self.level.params.get("strx", start[0])), int(self.level.params.get("stry", start[1])))
+        self.snake = [start]
         self.grow = 0
-        self.spawn_food()
+        self.move_timer = 0.0
+        self._food_index = 0
         self.alive = True
+        self.spawn_food()
         self.score = 0
         self.direction_changed = False
         # Play music
         if not self._music_loaded:
             print("Loading music in reset")
-            pygame.mixer.music.load(self.music_path)
+            load_music(self.music_path)
             self._music_loaded = True
         print("Playing music in reset")
         pygame.mixer.music.play(-1)
 
+    def save_state(self):
+        w = StateWriter(STATE_TAG, STATE_VERSION)
+        w.text(level_path(self.level))
+        w.pack(STATE, *self.direction, *self.food, self._food_index, self.grow, self.score,
+               self.move_timer, self.alive, self.direction_changed)
+        w.array("H", [v for cell in self.snake for v in cell])
+        w.rng(self._rng)
+        return w.bytes()
+
+    def load_state(self, data, levels=None):
+        r = StateReader(data, STATE_TAG, STATE_VERSION)
+        level = resolve_level(r.text(), self.level, levels)
+        if level is not self.level:
+            self.set_level(level)
+        dx, dy, fx, fy, self._food_index, self.grow, self.score, self.move_timer, self.alive, \
+            self.direction_changed = r.unpack(STATE)
+        self.direction, self.food = (dx, dy), (fx, fy)
+        cells = r.array("H")
+        self.snake = list(zip(cells[::2], cells[1::2]))
+        r.rng(self._rng)
+        self.return_prompt = False
+        # The level may have been edited live while the game was suspended
+        if any(not self._open_cell(cell) for cell in self.snake):
+            raise StateError("the snake no longer fits its level")
+        if not self._open_cell(self.food):
+            self.spawn_food()
+
+    def _open_cell(self, cell):
+        x, y = cell
+        if not (0 <= x < self.grid_w and 0 <= y < self.grid_h):
+            return False
+        return self.level is None or not self.level.is_wall(x, y)
+
     def spawn_food(self):
-        while True:
-            fx = random.randint(0, self.grid_w - 1)
-            fy = random.randint(0, self.grid_h - 1)
-            if (fx, fy) not in self.snake:
+        level = self.level
+        # Scripted food first (skipping spots the snake is on), then random
+        while level is not None and self._food_index < level.food_count:
+            i = self._food_index * 2
+            self._food_index += 1
+            spot = (level.food[i], level.food[i + 1])
+            if spot not in self.snake and not level.is_wall(*spot):
+                self.food = spot
+                return
+        for _ in range(FOOD_TRIES):
+            fx = self._rng.randint(0, self.grid_w - 1)
+            fy = self._rng.randint(0, self.grid_h - 1)
+            if (fx, fy) not in self.snake and not (level is not None and level.is_wall(fx, fy)):
                 self.food = (fx, fy)
-                break
+                return
+        # Crowded board: pick from what's actually free
+        body = set(self.snake)
+        free = [(x, y) for y in range(self.grid_h) for x in range(self.grid_w)
+                if (x, y) not in body and not (level is not None and level.is_wall(x, y))]
+        if free:
+            self.food = self._rng.choice(free)
+        else:
+            # Nowhere left to put food: the board is full, game over
+            self.food = self.snake[0]
+            self.alive = False
 
     def handle_event(self, event):
         result = None
@@ -69,6 +187,8 @@ class SnakeGame:
                     self.return_prompt = False
             elif event.key == pygame.K_ESCAPE:
                 self.return_prompt = False
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+            result = "next_level"
         elif self.alive and event.type == pygame.KEYDOWN:
             if not self.direction_changed:
                 if event.key == pygame.K_UP and self.direction != (0, 1):
@@ -91,12 +211,9 @@ class SnakeGame:
         if self.return_prompt or not self.alive:
             return
         # Move every fixed time step
-        if not hasattr(self, "move_timer"):
-            self.move_timer = 0.0
         self.move_timer += dt
-        move_interval = 0.13
-        if self.move_timer >= move_interval:
-            self.move_timer -= move_interval
+        if self.move_timer >= self.move_interval:
+            self.move_timer -= self.move_interval
             self._move_snake()
             self.direction_changed = False  # Reset after each move
 
@@ -107,9 +224,12 @@ class SnakeGame:
         # Check wall collision
         if (new_head[0] < 0 or new_head[0] >= self.grid_w or
             new_head[1] < 0 or new_head[1] >= self.grid_h or
-            new_head in self.snake):
+            new_head in self.snake or
+            (self.level is not None and self.level.is_wall(*new_head))):
             self.alive = False
             WALL_BEEP.play()
+            emit("death", game="snake", score=self.score, length=len(self.snake),
+                 level=self.level.id if self.level is not None else None)
             return
         self.snake.insert(0, new_head)
         if new_head == self.food:
@@ -122,43 +242,53 @@ class SnakeGame:
         else:
             self.snake.pop()
 
+    def snapshot(self):
+        if self.level is not None and self._walls_surf is None:
+            self._walls_surf = self._render_walls()
+        self._walls_shared = self._walls_surf is not None
+        return SnakeFrame(
+            self.score, tuple(self.snake), self.food, self.alive, self.wall.copy(), self.cell_size,
+            self.level.name if self.level is not None else None, self._walls_surf,
+            self.return_prompt, self.prompt_choice,
+        )
+
     def draw(self, surf):
+        self.render(surf, self.snapshot())
+
+    def render(self, surf, frame):
+        area, cs = frame.area, frame.cell_size
         surf.fill(Colors.BG)
         # Header
         draw_shadowed_text(surf, "Snake", FONTS["h1"], Colors.HILITE, (28, 20))
-        draw_shadowed_text(surf, "Arrows: move • Esc: return to main menu", FONTS["body"], Colors.MUTED, (32, 80))
-        draw_shadowed_text(surf, f"Score: {self.score}", FONTS["body"], Colors.ACCENT, (WIDTH - 180, 20))
+        draw_shadowed_text(surf, "Arrows: move • Tab: next level • Esc: return to main menu", FONTS["body"], Colors.MUTED, (32, 80))
+        draw_shadowed_text(surf, f"Score: {frame.score}", FONTS["body"], Colors.ACCENT, (WIDTH - 180, 20))
 
         # Playfield
-        rounded_rect(surf, Colors.PANEL, self.wall, radius=16)
-        pygame.draw.rect(surf, Colors.ACCENT_DIM, self.wall, width=2, border_radius=16)
+        rounded_rect(surf, Colors.PANEL, area, radius=16)
+        pygame.draw.rect(surf, Colors.ACCENT_DIM, area, width=2, border_radius=16)
+        if frame.walls is not None:
+            surf.blit(frame.walls, area.topleft)
+        if frame.level_name is not None:
+            draw_shadowed_text(surf, frame.level_name, FONTS["body"], Colors.MUTED, (WIDTH - 180, 48))
 
         # Draw food
-        fx, fy = self.food
-        food_rect = pygame.Rect(
-            self.wall.x + fx * self.cell_size,
-            self.wall.y + fy * self.cell_size,
-            self.cell_size, self.cell_size
-        )
+        fx, fy = frame.food
+        food_rect = pygame.Rect(area.x + fx * cs, area.y + fy * cs, cs, cs)
         pygame.draw.rect(surf, Colors.ACCENT, food_rect, border_radius=8)
 
         # Draw snake
-        for i, (sx, sy) in enumerate(self.snake):
-            snake_rect = pygame.Rect(
-                self.wall.x + sx * self.cell_size,
-                self.wall.y + sy * self.cell_size,
-                self.cell_size, self.cell_size
-            )
+        for i, (sx, sy) in enumerate(frame.snake):
+            snake_rect = pygame.Rect(area.x + sx * cs, area.y + sy * cs, cs, cs)
             color = Colors.HILITE if i == 0 else Colors.ACCENT_DIM
             pygame.draw.rect(surf, color, snake_rect, border_radius=8)
             pygame.draw.rect(surf, Colors.ACCENT, snake_rect, width=2, border_radius=8)
 
-        if self.return_prompt:
-            self._draw_prompt(surf)
-        elif not self.alive:
-            self._draw_gameover(surf)
+        if frame.return_prompt:
+            self._draw_prompt(surf, frame.prompt_choice)
+        elif not frame.alive:
+            self._draw_gameover(surf, frame.score)
 
-    def _draw_prompt(self, surf):
+    def _draw_prompt(self, surf, choice):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 140))
         surf.blit(overlay, (0, 0))
@@ -169,7 +299,7 @@ class SnakeGame:
         pygame.draw.rect(surf, Colors.ACCENT_DIM, rect, width=2, border_radius=18)
 
         title = "Return to main menu?"
-        subtitle = "Current game will be reset."
+        subtitle = "Your game will be here when you come back."
         title_img = FONTS["h2"].render(title, True, Colors.HILITE)
         surf.blit(title_img, (rect.centerx - title_img.get_width()//2, rect.y + 24))
         sub_img = FONTS["body"].render(subtitle, True, Colors.MUTED)
@@ -192,10 +322,10 @@ class SnakeGame:
         surf.blit(no_text, (no_rect.centerx - no_text.get_width() // 2, no_rect.centery - no_text.get_height() // 2))
         surf.blit(yes_text, (yes_rect.centerx - yes_text.get_width() // 2, yes_rect.centery - yes_text.get_height() // 2))
 
-        sel_rect = yes_rect if self.prompt_choice == 1 else no_rect
+        sel_rect = yes_rect if choice == 1 else no_rect
         pygame.draw.rect(surf, Colors.ACCENT, sel_rect.inflate(6, 6), width=3, border_radius=14)
 
-    def _draw_gameover(self, surf):
+    def _draw_gameover(self, surf, score):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 140))
         surf.blit(overlay, (0, 0))
@@ -206,7 +336,7 @@ class SnakeGame:
         pygame.draw.rect(surf, Colors.ACCENT_DIM, rect, width=2, border_radius=18)
 
         title = "Game Over"
-        subtitle = f"Score: {self.score} • Press Enter to restart"
+        subtitle = f"Score: {score} • Press Enter to restart"
         title_img = FONTS["h2"].render(title, True, Colors.HILITE)
         surf.blit(title_img, (rect.centerx - title_img.get_width()//2, rect.y + 24))
         sub_img = FONTS["body"].render(subtitle, True, Colors.ACCENT)
@@ -1,4 +1,5 @@
 import pygame
+from fonts import LazyFonts
 
 WIDTH, HEIGHT = 960, 600
 FPS = 60
@@ -21,14 +22,17 @@ MIXER_CHANNELS = 1
 MIXER_BUFFER = 512
 
 
-# Fonts
+# Fonts: (name, size); None is pygame's default font. Loaded on first use (fonts.py)
+FONT_SPECS = {
+    "h1": (None, 64),
+    "h2": (None, 40),
+    "body": (None, 28),
+    "mono": ("couriernew", 22),
+}
+
+
 def make_fonts():
-    return {
-        "h1": pygame.font.SysFont(None, 64),
-        "h2": pygame.font.SysFont(None, 40),
-        "body": pygame.font.SysFont(None, 28),
-        "mono": pygame.font.SysFont("couriernew", 22)
-    }
+    return LazyFonts(FONT_SPECS)
 
 
 FONTS = make_fonts()
@@ -1,6 +1,10 @@
 # goobcube.py
+import atexit
 import math
+import os
+import queue
 import sys
+import threading
 import time
 import pygame
 from array import array
@@ -20,6 +24,7 @@ from utils import (
     make_beep_sound,
     rounded_rect,
     draw_shadowed_text,
+    load_music,
     WALL_BEEP
 )
 from game_ball import BallGame
@@ -27,6 +32,17 @@ from game_snake import SnakeGame
 from game_pong import PongGame
 from game_asteroids import AsteroidsGame  # 1. Import AsteroidsGame
 from game_piano import PianoMidiGame  # 1. Import PianoGame
+from levels import LevelLibrary, LEVELS_DIR
+from level_live import LiveLevels
+from game_state import StateStore, StateError, SAVES_DIR
+from stats import LatencyStats
+from alloc_track import AllocTracker
+from input_latency import LatencyProbe
+import wire3d
+from thumbnails import Thumbnails, Demo
+from bots import asteroids_bot, pong_bot, snake_bot
+import telemetry
+from telemetry import emit
 
 
 # -----------------------------
@@ -36,9 +52,14 @@ from game_piano import PianoMidiGame  # 1. Import PianoGame
 pygame.mixer.pre_init(MIXER_FREQ, MIXER_SIZE, MIXER_CHANNELS, MIXER_BUFFER)
 pygame.mixer.init()
 
+# Usage/performance events to ../telemetry (see telemetry.py)
+if "--telemetry" in sys.argv or os.environ.get("GOOBCUBE_TELEMETRY") == "1":
+    telemetry.start()
+FRAME_REPORT_SECONDS = 10.0
+
 # Load menu music
 MENU_MUSIC_PATH = "../assets/music/goldeneye.mp3"
-pygame.mixer.music.load(MENU_MUSIC_PATH)
+load_music(MENU_MUSIC_PATH)
 
 # Fullscreen by default, unless --windowed is supplied
 windowed = "--windowed" in sys.argv
@@ -61,24 +82,7 @@ def loading_animation_3d(duration=1.7):
     sub_font = FONTS["body"]
     cube_size = 100
     cx, cy = WIDTH // 2, HEIGHT // 2 + 40
-
-    # Define cube vertices (centered at origin)
-    half = cube_size // 2
-    vertices = [
-        [-half, -half, -half],
-        [ half, -half, -half],
-        [ half,  half, -half],
-        [-half,  half, -half],
-        [-half, -half,  half],
-        [ half, -half,  half],
-        [ half,  half,  half],
-        [-half,  half,  half],
-    ]
-    edges = [
-        (0,1), (1,2), (2,3), (3,0),
-        (4,5), (5,6), (6,7), (7,4),
-        (0,4), (1,5), (2,6), (3,7)
-    ]
+    cube = wire3d.cube(cube_size)
 
     # Random rotation speeds (slowed down)
     rot_speed_x = 0.5 + random.random() * 0.5   # was 1.5 + random.random() * 1.5
@@ -104,34 +108,9 @@ def loading_animation_3d(duration=1.7):
             (WIDTH // 2 - 100, HEIGHT // 2 - 130)
         )
 
-        # Rotation angles
-        angle_x = t * rot_speed_x
-        angle_y = t * rot_speed_y
-        angle_z = t * rot_speed_z
-
-        # Projected vertices
-        projected = []
-        for x, y, z in vertices:
-            # Rotate in 3D
-            # X rotation
-            y, z = (y*math.cos(angle_x) - z*math.sin(angle_x),
-                    y*math.sin(angle_x) + z*math.cos(angle_x))
-            # Y rotation
-            x, z = (x*math.cos(angle_y) + z*math.sin(angle_y),
-                    -x*math.sin(angle_y) + z*math.cos(angle_y))
-            # Z rotation
-            x, y = (x*math.cos(angle_z) - y*math.sin(angle_z),
-                    x*math.sin(angle_z) + y*math.cos(angle_z))
-
-            # Perspective projection
-            dist = 3 * half
-            f = dist / (z + dist + 1e-5)  # avoid div by zero
-            px, py = int(cx + x*f), int(cy + y*f)
-            projected.append((px, py))
-
-        # Draw cube edges
-        for i,j in edges:
-            pygame.draw.line(screen, Colors.ACCENT, projected[i], projected[j], 3)
+        # Rotate and project the cube (see wire3d.py), back edges first
+        matrix = wire3d.rotation(t * rot_speed_x, t * rot_speed_y, t * rot_speed_z)
+        wire3d.draw(screen, cube, matrix, (cx, cy), Colors.ACCENT, width=3, dist=1.5 * cube_size)
 
         # Progress bar (move down for more spacing)
         bar_w, bar_h = 360, 10
@@ -199,7 +178,7 @@ def loading_animation(duration=1.7):
 # Menu
 # -----------------------------
 class Menu:
-    def __init__(self):
+    def __init__(self, previews=None):
         self.icons = self._make_icons()
         self.columns = 4
         self.icon_size = (150, 150)
@@ -209,6 +188,11 @@ class Menu:
         self.selected = 0
         self.confirm_exit = False
         self.confirm_choice = 0  # 0 = No, 1 = Yes
+        # Live miniature of each game at the top of its card (see thumbnails.py)
+        self.thumbnails = None
+        if previews:
+            thumb_w = self.icon_size[0] - 22
+            self.thumbnails = Thumbnails(previews, (thumb_w, thumb_w * HEIGHT // WIDTH))
 
     def _make_icons(self):
         # Add "Asteroids" and "Piano" to the menu
@@ -226,7 +210,17 @@ class Menu:
             "Asteroids",
             "Piano"
         ]
-        return [{"label": lbl, "color": col} for lbl, col in zip(labels, colors)]
+        names = ["ball", "snake", "pong", "asteroids", "piano"]  # App states
+        # Spinning wireframe per card, under the thumbnail (wire3d.py caches the meshes)
+        meshes = [
+            wire3d.octahedron(28),
+            wire3d.box(11, 11, 30),
+            wire3d.box(8, 30, 8),
+            wire3d.tetrahedron(34),
+            wire3d.box(32, 8, 14),
+        ]
+        return [{"name": name, "label": lbl, "color": col, "mesh": mesh, "spin": 0.5 + 0.15 * i}
+                for i, (name, lbl, col, mesh) in enumerate(zip(names, labels, colors, meshes))]
 
     def handle_event(self, event):
         if self.confirm_exit:
@@ -235,7 +229,7 @@ class Menu:
                     self.confirm_choice = 1 - self.confirm_choice
                 elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
                     if self.confirm_choice == 1:
-                        pygame.quit(); sys.exit()
+                        return "quit"  # App shuts down (session_end, telemetry)
                     else:
                         self.confirm_exit = False
                 elif event.key == pygame.K_ESCAPE:
@@ -292,6 +286,9 @@ class Menu:
         total_icon_w = cols * iw + (cols - 1) * self.icon_padding
         start_x = self.margin_side + (grid_w - total_icon_w) // 2
         start_y = self.margin_top
+        t = time.perf_counter()
+        if self.thumbnails is not None:
+            self.thumbnails.update(t)  # at most one per frame
 
         for idx, icon in enumerate(self.icons):
             row = idx // cols
@@ -304,6 +301,17 @@ class Menu:
             rounded_rect(surf, Colors.PANEL, rect, radius=20)
             inner = rect.inflate(-14, -14)
             rounded_rect(surf, icon["color"], inner, radius=18)
+            icon_center = inner.center
+            thumb = self.thumbnails.get(icon["name"]) if self.thumbnails is not None else None
+            if thumb is not None:
+                surf.blit(thumb, (inner.x + 4, inner.y + 4))
+                icon_center = (inner.centerx, (inner.y + 4 + thumb.get_height() + inner.bottom) // 2)
+
+            # 3D icon; the selected one spins faster
+            spin = icon["spin"] * (2.0 if idx == self.selected else 1.0)
+            matrix = wire3d.rotation(0.5 + 0.4 * t * spin, t * spin, 0.2 * t * spin)
+            mesh = icon["mesh"]
+            wire3d.draw(surf, mesh, matrix, icon_center, Colors.PANEL, width=2, dist=4 * mesh.radius, cull=True)
 
             # Label
             label_img = FONTS["body"].render(icon["label"], True, Colors.TEXT)
@@ -369,11 +377,52 @@ class App:
 
     def __init__(self):
         self.state = "loading"
-        self.menu = Menu()
         self.ball = BallGame()
         self.snake = SnakeGame()
         self.asteroids = AsteroidsGame()
         self.piano = PianoMidiGame()  # 4. Instantiate PianoGame
+        self.pong = PongGame()
+        # Menu cards play their own bot-driven copies of the games; the piano draws as is
+        self.menu = Menu(previews={
+            App.BALL: Demo(BallGame),
+            App.SNAKE: Demo(SnakeGame, snake_bot),
+            App.PONG: Demo(PongGame, pong_bot),
+            App.ASTEROIDS: Demo(AsteroidsGame, asteroids_bot),
+            App.PIANO: self.piano,
+        })
+        # Games you leave are suspended and resumed on re-entry (see game_state.py)
+        persist = "--persist" in sys.argv or os.environ.get("GOOBCUBE_PERSIST") == "1"
+        self.saved = StateStore(SAVES_DIR if persist else None)
+        # Frame times, reported to telemetry every FRAME_REPORT_SECONDS
+        self.frame_times = LatencyStats()
+        self._frames_since = time.perf_counter()
+        self._entered_at = 0.0
+        # Compiled levels (../levels/*.lvl); Tab in a game cycles through them
+        self.levels = LevelLibrary(LEVELS_DIR)
+        self.pong_level = None
+        # Levels saved in the editor show up in the running game (see level_live.py)
+        live = "--live-levels" in sys.argv or os.environ.get("GOOBCUBE_LIVE_LEVELS") == "1"
+        self.live_levels = LiveLevels() if live else None
+        # Simulate the next frame on a worker thread while this one is drawn
+        self.pipelined = "--pipelined" in sys.argv or os.environ.get("GOOBCUBE_PIPELINED") == "1"
+        # Reports printed (and sent to telemetry) on exit, before telemetry stops
+        self._exit_reports = []
+        atexit.register(self._run_exit_reports)
+        # Per-frame allocation report on exit (see alloc_track.py)
+        self.alloc = None
+        if "--alloc-track" in sys.argv or os.environ.get("GOOBCUBE_ALLOC_TRACK") == "1":
+            if self.pipelined:
+                print("Allocation tracking needs one thread per frame; running without --pipelined")
+                self.pipelined = False
+            self.alloc = AllocTracker()
+            save_budget = "--alloc-save-budget" in sys.argv
+            self._exit_reports.append(lambda: self.alloc.report(save_budget=save_budget))
+        # Press -> frame / sound latency per game, reported on exit (see input_latency.py)
+        self.latency = None
+        if "--latency" in sys.argv or os.environ.get("GOOBCUBE_LATENCY") == "1":
+            self.latency = LatencyProbe()
+            self.latency.install(self.piano)
+            self._exit_reports.append(self.latency.report)
 
     def run(self):
         # Loading animation once
@@ -381,109 +430,312 @@ class App:
         self.state = App.MENU
 
         # Play menu music when menu loads
-        pygame.mixer.music.load(MENU_MUSIC_PATH)
+        load_music(MENU_MUSIC_PATH)
         pygame.mixer.music.play(-1)  # Loop indefinitely
 
+        emit("session_start", pipelined=self.pipelined, windowed=windowed, persist=bool(self.saved.directory))
+        if self.pipelined:
+            self._run_pipelined()
+            return
+
+        alloc = self.alloc
+        latency = self.latency
         while True:
             dt = clock.tick(FPS) / 1000.0
-            action = None
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit(); sys.exit()
-
-                if self.state == App.MENU:
-                    action = self.menu.handle_event(event)
-                elif self.state == App.BALL:
-                    action = self.ball.handle_event(event)
-                elif self.state == App.SNAKE:
-                    action = self.snake.handle_event(event)
-                elif self.state == App.ASTEROIDS:  # 5. Handle asteroids events
-                    action = self.asteroids.handle_event(event)
-                elif self.state == App.PIANO:  # 5. Handle piano events
-                    action = self.piano.handle_event(event)
-
+            if alloc is not None:
+                alloc.phase(self.state, "update")
+            events = self._poll_events()
+            stamps = latency.arrived(events, self.state) if latency is not None else ()
+            if latency is not None:
+                latency.begin_step(stamps)
+            action = self._step(events, dt)
+            if latency is not None:
+                latency.end_step()
+            if action == "quit":
+                self._shutdown()
+            if action == "start_pong":
+                stamps = ()  # Pong runs its own loop; its first frame isn't this one
+                self._run_pong()
+            if alloc is not None:
+                alloc.phase(self.state, "draw")
+            self._draw(self._frame())
+            if alloc is not None:
+                alloc.phase(self.state, "flip")
+            pygame.display.flip()
+            if latency is not None:
+                latency.flipped(stamps)
+            if alloc is not None:
+                alloc.frame_done()
+            self._frame_done(dt)
+
+    def _run_pipelined(self):
+        # Two stages: the worker simulates frame N+1 (events, update) while this
+        # thread draws and flips frame N. They only share the frame snapshots,
+        # which are immutable, so there is no locking around game state. Screens
+        # without snapshot() (menu, ball) and Pong run in sequence as usual.
+        jobs, results = queue.Queue(maxsize=1), queue.Queue(maxsize=1)
+        latency = self.latency
+
+        def step(events, dt, stamps):
+            if latency is None:
+                return self._step(events, dt)
+            latency.begin_step(stamps)
+            try:
+                return self._step(events, dt)
+            finally:
+                latency.end_step()
+
+        def simulate():
+            while True:
+                events, dt, stamps = jobs.get()
+                try:
+                    results.put((step(events, dt, stamps), self._frame(), None))
+                except BaseException as e:
+                    results.put((None, None, e))
+
+        threading.Thread(target=simulate, name="sim", daemon=True).start()
+        frame = self._frame()
+        shown = []  # presses handled by `frame`, first on screen at its flip
+        while True:
+            dt = clock.tick(FPS) / 1000.0
+            events = self._poll_events()  # SDL wants events pumped on the main thread
+            stamps = latency.arrived(events, self.state) if latency is not None else []
+            if frame[1] is None:
+                action = step(events, dt, stamps)
+                frame = self._frame()
+                self._draw(frame)
+                pygame.display.flip()
+                if latency is not None:
+                    latency.flipped(shown + stamps)
+                shown = []
+            else:
+                jobs.put((events, dt, stamps))
+                self._draw(frame)
+                pygame.display.flip()
+                if latency is not None:
+                    latency.flipped(shown)
+                action, frame, error = results.get()
+                if error is not None:
+                    raise error
+                shown = stamps
+            self._frame_done(dt)
+            if action == "quit":
+                self._shutdown()
+            if action == "start_pong":
+                shown = []
+                self._run_pong()
+                frame = self._frame()
+
+    def _poll_events(self):
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                self._shutdown()
+        return events
+
+    def _shutdown(self):
+        # Every way out of the app (window closed, Exit in the menu) ends up here
+        if self.state != App.MENU:
+            self._leave_game(self.state, self._screen())
+        emit("session_end")
+        self._run_exit_reports()
+        telemetry.stop()
+        pygame.quit(); sys.exit()
+
+    def _run_exit_reports(self):
+        # Once: from _shutdown, or from atexit on any other way out
+        while self._exit_reports:
+            self._exit_reports.pop(0)()
+
+    def _frame_done(self, dt, screen_name=None):
+        self.frame_times.add(dt)
+        now = time.perf_counter()
+        if now - self._frames_since >= FRAME_REPORT_SECONDS:
+            s = self.frame_times.summary()
+            emit("frames", screen=screen_name or self.state, frames=s["count"],
+                 fps=round(s["count"] / (now - self._frames_since), 1),
+                 p50_ms=round(s["p50"], 2), p95_ms=round(s["p95"], 2), p99_ms=round(s["p99"], 2),
+                 max_ms=round(s["max"], 2))
+            self.frame_times.clear()
+            self._frames_since = now
+
+    def _start_game(self, name, game):
+        resumed = hasattr(game, "load_state") and self._resume(name, game)
+        if not resumed:
+            # Nothing to resume (or it had ended): start a whole new game
+            game.new_game() if hasattr(game, "new_game") else game.reset()
+        self._entered(name, resumed)
+
+    def _entered(self, name, resumed):
+        self._entered_at = time.perf_counter()
+        emit("game_enter", game=name, resumed=resumed)
+
+    def _leave_game(self, name, game):
+        emit("game_exit", game=name, seconds=round(time.perf_counter() - self._entered_at, 1),
+             score=getattr(game, "score", None), alive=getattr(game, "alive", None))
+        if hasattr(game, "save_state"):
+            self._suspend(name, game)
+
+    def _suspend(self, name, game):
+        # Keep a game you walk away from; a finished one starts fresh next time
+        if getattr(game, "alive", True):
+            self.saved.put(name, game.save_state())
+        else:
+            self.saved.drop(name)
+
+    def _resume(self, name, game):
+        data = self.saved.take(name)
+        if data is None:
+            return False
+        try:
+            game.load_state(data, self.levels)
+        except StateError as e:
+            print(f"⚠️ Could not resume {name}: {e}")
+            return False
+        return True
+
+    def _frame(self):
+        # (state, immutable render snapshot or None if the screen draws from live state)
+        game = self._screen()
+        return self.state, game.snapshot() if hasattr(game, "snapshot") else None
+
+    def _screen(self, state=None):
+        return {
+            App.MENU: self.menu,
+            App.BALL: self.ball,
+            App.SNAKE: self.snake,
+            App.ASTEROIDS: self.asteroids,
+            App.PIANO: self.piano,
+        }[state or self.state]
+
+    def _draw(self, frame):
+        state, snapshot = frame
+        if snapshot is None:
+            self._screen(state).draw(screen)
+        else:
+            self._screen(state).render(screen, snapshot)
+
+    def _step(self, events, dt):
+        # Input, state changes and update for one frame; no drawing. Returns
+        # "start_pong" when Pong should take over the main loop, "quit" to exit.
+        action = None
+        for event in events:
             if self.state == App.MENU:
-                # Always reset to menu music before drawing menu
-                if not pygame.mixer.music.get_busy() or pygame.mixer.music.get_pos() == -1:
-                    pygame.mixer.music.load(MENU_MUSIC_PATH)
-                    pygame.mixer.music.play(-1)
-
-                if action == "start_ball":
-                    pygame.mixer.music.stop()
-                    self.ball.reset()
-                    self.state = App.BALL
-                elif action == "start_snake":
-                    pygame.mixer.music.stop()
-                    pygame.mixer.music.load(SNAKE_MUSIC_PATH)
-                    pygame.mixer.music.play(-1)
-                    self.snake.reset()
-                    self.state = App.SNAKE
-                elif action == "start_pong":
-                    pygame.mixer.music.stop()
-                    self._run_pong()
-                    self.state = App.MENU
-                elif action == "start_asteroids":
-                    pygame.mixer.music.stop()
-                    pygame.mixer.music.load(ASTEROIDS_MUSIC_PATH)
-                    pygame.mixer.music.play(-1)
-                    self.asteroids.reset()
-                    self.state = App.ASTEROIDS
-                elif action == "start_piano":
-                    pygame.mixer.music.stop()
-                    self.piano.reset()
-                    self.state = App.PIANO
-                self.menu.draw(screen)
-
+                action = self.menu.handle_event(event)
             elif self.state == App.BALL:
-                if action == "return_to_menu":
-                    pygame.mixer.music.load(MENU_MUSIC_PATH)
-                    pygame.mixer.music.play(-1)
-                    self.state = App.MENU
-                else:
-                    self.ball.update(dt)
-                self.ball.draw(screen)
-
+                action = self.ball.handle_event(event)
             elif self.state == App.SNAKE:
-                if action == "return_to_menu":
-                    pygame.mixer.music.stop()
-                    pygame.mixer.music.load(MENU_MUSIC_PATH)
-                    pygame.mixer.music.play(-1)
-                    self.state = App.MENU
-                else:
-                    self.snake.update(dt)
-                self.snake.draw(screen)
-
-            elif self.state == App.ASTEROIDS:
-                if action == "return_to_menu":
-                    pygame.mixer.music.stop()
-                    pygame.mixer.music.load(MENU_MUSIC_PATH)
-                    pygame.mixer.music.play(-1)
-                    self.state = App.MENU
-                else:
-                    self.asteroids.update(dt)
-                self.asteroids.draw(screen)
-
-            elif self.state == App.PIANO:
-                if action == "return_to_menu":
-                    pygame.mixer.music.load(MENU_MUSIC_PATH)
-                    pygame.mixer.music.play(-1)
-                    self.state = App.MENU
-                else:
-                    self.piano.update(dt)
-                self.piano.draw(screen)
-
-            pygame.display.flip()
+                action = self.snake.handle_event(event)
+            elif self.state == App.ASTEROIDS:  # 5. Handle asteroids events
+                action = self.asteroids.handle_event(event)
+            elif self.state == App.PIANO:  # 5. Handle piano events
+                action = self.piano.handle_event(event)
+
+        if self.live_levels is not None:
+            self._apply_live_patches()
+
+        if self.state == App.MENU:
+            # Always reset to menu music before drawing menu
+            if not pygame.mixer.music.get_busy() or pygame.mixer.music.get_pos() == -1:
+                load_music(MENU_MUSIC_PATH)
+                pygame.mixer.music.play(-1)
+
+            if action == "quit":
+                return "quit"
+            elif action == "start_ball":
+                pygame.mixer.music.stop()
+                self._start_game(App.BALL, self.ball)
+                self.state = App.BALL
+            elif action == "start_snake":
+                pygame.mixer.music.stop()
+                load_music(SNAKE_MUSIC_PATH)
+                pygame.mixer.music.play(-1)
+                self._start_game(App.SNAKE, self.snake)
+                self.state = App.SNAKE
+            elif action == "start_pong":
+                pygame.mixer.music.stop()
+                return "start_pong"
+            elif action == "start_asteroids":
+                pygame.mixer.music.stop()
+                load_music(ASTEROIDS_MUSIC_PATH)
+                pygame.mixer.music.play(-1)
+                self._start_game(App.ASTEROIDS, self.asteroids)
+                self.state = App.ASTEROIDS
+            elif action == "start_piano":
+                pygame.mixer.music.stop()
+                self._start_game(App.PIANO, self.piano)
+                self.piano.on_enter()
+                self.state = App.PIANO
+
+        elif self.state == App.BALL:
+            if action == "return_to_menu":
+                self._leave_game(App.BALL, self.ball)
+                load_music(MENU_MUSIC_PATH)
+                pygame.mixer.music.play(-1)
+                self.state = App.MENU
+            else:
+                self.ball.update(dt)
+
+        elif self.state == App.SNAKE:
+            if action == "return_to_menu":
+                self._leave_game(App.SNAKE, self.snake)
+                pygame.mixer.music.stop()
+                load_music(MENU_MUSIC_PATH)
+                pygame.mixer.music.play(-1)
+                self.state = App.MENU
+            elif action == "next_level":
+                self.snake.set_level(self.levels.next("snake", self.snake.level))
+                self.snake.reset()
+            else:
+                self.snake.update(dt)
+
+        elif self.state == App.ASTEROIDS:
+            if action == "return_to_menu":
+                self._leave_game(App.ASTEROIDS, self.asteroids)
+                pygame.mixer.music.stop()
+                load_music(MENU_MUSIC_PATH)
+                pygame.mixer.music.play(-1)
+                self.state = App.MENU
+            elif action == "next_level":
+                self.asteroids.set_level(self.levels.next("asteroids", self.asteroids.level_data))
+                self.asteroids.new_game()
+            else:
+                self.asteroids.update(dt)
+
+        elif self.state == App.PIANO:
+            if action == "return_to_menu":
+                self._leave_game(App.PIANO, self.piano)
+                load_music(MENU_MUSIC_PATH)
+                pygame.mixer.music.play(-1)
+                self.state = App.MENU
+            else:
+                self.piano.update(dt)
+        return None
 
     def _run_pong(self):
-        game = PongGame()
+        game = self.pong
+        resumed = self._resume(App.PONG, game)
+        if resumed:
+            self.pong_level = game.level
+        else:
+            game.set_level(self.pong_level)
+            game.reset()
+        self._entered(App.PONG, resumed)
         clock = pygame.time.Clock()
         running = True
+        alloc = self.alloc
+        latency = self.latency
         pygame.mixer.music.stop()
         while running:
             dt = clock.tick(FPS) / 1000.0
+            if alloc is not None:
+                alloc.phase(App.PONG, "update")
             keys = pygame.key.get_pressed()
-            for event in pygame.event.get():
+            events = pygame.event.get()
+            stamps = latency.arrived(events, App.PONG) if latency is not None else ()
+            if latency is not None:
+                latency.begin_step(stamps)
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                     break
@@ -491,12 +743,78 @@ class App:
                 if result == "return_to_menu":
                     running = False
                     break
+                if result == "next_level":
+                    self.pong_level = self.levels.next("pong", game.level)
+                    game.set_level(self.pong_level)
+                    game.reset()
+            if self.live_levels is not None:
+                self._apply_live_patches(game)
             game.update(dt, keys)
+            if latency is not None:
+                latency.end_step()
+            if alloc is not None:
+                alloc.phase(App.PONG, "draw")
             game.draw(screen)
+            if alloc is not None:
+                alloc.phase(App.PONG, "flip")
             pygame.display.flip()
-        pygame.mixer.music.load(MENU_MUSIC_PATH)
+            if latency is not None:
+                latency.flipped(stamps)
+            if alloc is not None:
+                alloc.frame_done()
+            self._frame_done(dt, App.PONG)
+        self._leave_game(App.PONG, game)
+        load_music(MENU_MUSIC_PATH)
         pygame.mixer.music.play(-1)
 
+    def _apply_live_patches(self, pong=None):
+        # Between frames: patch the level in play in place, no reset(). These
+        # run on every screen; a game that isn't in play only gets its level
+        # swapped, and _resume() checks its saved state against it later.
+        in_play = App.PONG if pong is not None else self.state
+        playing = {"snake": (self.snake, self.snake.level),
+                   "asteroids": (self.asteroids, self.asteroids.level_data),
+                   "pong": (pong, self.pong_level)}
+        for patch in self.live_levels.drain():
+            game, current = playing.get(patch["game"], (None, None))
+            if patch["type"] == "full":
+                # LiveLevels already recompiled the file; swap it in if it's the one being played
+                try:
+                    level = self.levels.open(patch["path"])
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Could not reload level {patch['id']}: {e}")
+                    continue
+                level.version = patch["version"]
+                if current is not None and current.id == patch["id"]:
+                    self._swap_level(patch["game"], game, level, patch["game"] == in_play)
+                continue
+            targets = self.levels.cached(patch["id"])
+            if current is not None and current.id == patch["id"] and current not in targets:
+                targets.append(current)
+            for level in targets:
+                if level is current and game is not None:
+                    game.apply_patch(patch)  # also redraws/respawns what the patch touched
+                else:
+                    level.apply_patch(patch)
+
+    def _swap_level(self, name, game, level, in_play):
+        if name == "snake" and not in_play:
+            # No reset() here: it would start the snake music over whatever is playing
+            game.set_level(level)
+        elif name == "snake":
+            resize = (level.grid_w, level.grid_h) != (game.grid_w, game.grid_h)
+            game.set_level(level)
+            if resize:
+                game.reset()
+            elif hasattr(game, "food") and level.is_wall(*game.food):
+                game.spawn_food()
+        elif name == "asteroids":
+            game.set_level(level)
+        elif name == "pong":
+            self.pong_level = level
+            if game is not None:
+                game.set_level(level)
+
 # -----------------------------
 # Entry point
 # -----------------------------
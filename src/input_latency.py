@@ -0,0 +1,174 @@
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import pygame
+
+from global_vars import MIXER_BUFFER, MIXER_FREQ
+from stats import LatencyStats
+from telemetry import emit
+
+# -----------------------------
+# Input latency harness (opt-in)
+# -----------------------------
+# goobcube.py --latency (or GOOBCUBE_LATENCY=1) stamps every key/button press
+# when pygame.event.get() hands it over and follows the stamp through the frame:
+#   frame    press -> display.flip() returned for the first frame that handled it
+#   sound    press -> first WALL_BEEP.play() / piano _send_note_on() in the step
+#            (handle_event + update) that handled it, made on the thread running
+#            that step (MIDI input and playback threads also send notes);
+#            presses whose step plays nothing don't count
+# frame is split into to_step (waiting for the step: pipelining), step
+# (handle_event + update) and to_flip (draw, flip and any vsync wait).
+#
+# What it can't see: the time a press sat in SDL's queue before the poll (up
+# to a frame while clock.tick sleeps), the display's scan-out, and the mixer
+# buffer; the report adds the mixer's MIXER_BUFFER / MIXER_FREQ as an estimate
+# for sound. On exit: percentiles and a histogram per game, printed and
+# emitted to telemetry.
+
+INPUT_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.JOYBUTTONDOWN)
+METRICS = ("frame", "to_step", "step", "to_flip", "sound")
+BUCKETS_MS = (2, 4, 8, 12, 16, 20, 25, 33, 50, 67, 100, 150, 250, 500)
+BAR_WIDTH = 40
+
+
+class Stamp:
+    __slots__ = ("screen", "t_input", "t_step", "t_stepped")
+
+    def __init__(self, screen, t_input):
+        self.screen = screen
+        self.t_input = t_input
+        self.t_step = self.t_stepped = None
+
+
+class TimedSound:
+    """Stands in for a pygame Sound and tells the probe when it's played."""
+
+    def __init__(self, sound, probe):
+        self._sound = sound
+        self._probe = probe
+
+    def play(self, *args, **kwargs):
+        self._probe.sound()
+        return self._sound.play(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._sound, name)
+
+
+class LatencyProbe:
+    def __init__(self):
+        self.stats = defaultdict(LatencyStats)        # (screen, metric) -> seconds
+        self.hist = defaultdict(lambda: [0] * (len(BUCKETS_MS) + 1))
+        self._current = []                            # stamps of the step in progress
+        self._step_thread = None                      # thread running that step
+        self._sounded = False                         # that step already recorded a sound
+
+    # ---------- Hooks ----------
+
+    def install(self, piano=None):
+        # Same idea as alloc_track.py: swap the shared beep for a wrapper in
+        # every module that imported it, and wrap the piano's note-on
+        import utils
+        original = utils.WALL_BEEP
+        beep = TimedSound(original, self)
+        for module in list(sys.modules.values()):
+            if getattr(module, "WALL_BEEP", None) is original:
+                module.WALL_BEEP = beep
+        if piano is not None:
+            note_on = piano._send_note_on
+
+            def timed_note_on(*args, **kwargs):
+                self.sound()
+                return note_on(*args, **kwargs)
+            piano._send_note_on = timed_note_on
+
+    # ---------- Per frame ----------
+
+    def arrived(self, events, screen):
+        """Stamp the presses in a batch fresh from pygame.event.get()."""
+        now = time.perf_counter()
+        return [Stamp(screen, now) for e in events if e.type in INPUT_EVENTS]
+
+    def begin_step(self, stamps):
+        now = time.perf_counter()
+        for stamp in stamps:
+            stamp.t_step = now
+        self._step_thread = threading.get_ident()
+        self._current = stamps
+        self._sounded = False
+
+    def end_step(self):
+        now = time.perf_counter()
+        for stamp in self._current:
+            stamp.t_stepped = now
+        self._current = []
+
+    def sound(self):
+        # First sound of the step: attribute it to every press the step handled
+        if self._sounded or not self._current or threading.get_ident() != self._step_thread:
+            return
+        now = time.perf_counter()
+        for stamp in self._current:
+            self._add(stamp.screen, "sound", now - stamp.t_input)
+        self._sounded = True  # keep _current: end_step still has to stamp these
+
+    def flipped(self, stamps):
+        """display.flip() just returned for the frame that handled `stamps`."""
+        now = time.perf_counter()
+        for stamp in stamps:
+            self._add(stamp.screen, "frame", now - stamp.t_input)
+            if stamp.t_stepped is not None:
+                self._add(stamp.screen, "to_step", stamp.t_step - stamp.t_input)
+                self._add(stamp.screen, "step", stamp.t_stepped - stamp.t_step)
+                self._add(stamp.screen, "to_flip", now - stamp.t_stepped)
+
+    def _add(self, screen, metric, seconds):
+        self.stats[(screen, metric)].add(seconds)
+        ms = seconds * 1000.0
+        bucket = 0
+        while bucket < len(BUCKETS_MS) and ms > BUCKETS_MS[bucket]:
+            bucket += 1
+        self.hist[(screen, metric)][bucket] += 1
+
+    # ---------- Report ----------
+
+    def report(self, out=sys.stdout):
+        if not self.stats:
+            return
+        mixer_ms = MIXER_BUFFER / MIXER_FREQ * 1000.0
+        print("\nInput latency (press -> effect):", file=out)
+        for screen in sorted({screen for screen, _ in self.stats}):
+            print(f"\n[{screen}]", file=out)
+            for metric in METRICS:
+                stats = self.stats.get((screen, metric))
+                if stats is None:
+                    continue
+                print("  " + stats.format(metric), file=out)
+                s = stats.summary()
+                emit("input_latency", game=screen, metric=metric, n=s["count"],
+                     p50_ms=round(s["p50"], 2), p95_ms=round(s["p95"], 2),
+                     p99_ms=round(s["p99"], 2), max_ms=round(s["max"], 2),
+                     hist=self.hist[(screen, metric)])
+            for metric in ("frame", "sound"):
+                if (screen, metric) in self.hist:
+                    self._print_hist(screen, metric, out)
+            sound = self.stats.get((screen, "sound"))
+            if sound is not None:
+                print(f"  audible (mixer sounds) ~ sound + {mixer_ms:.1f}ms buffer "
+                      f"(MIXER_BUFFER={MIXER_BUFFER} @ {MIXER_FREQ} Hz): "
+                      f"p50~{sound.summary()['p50'] + mixer_ms:.1f}ms", file=out)
+
+    def _print_hist(self, screen, metric, out):
+        counts = self.hist[(screen, metric)]
+        peak = max(counts) or 1
+        print(f"  {metric} histogram:", file=out)
+        low = 0
+        for n, count in enumerate(counts):
+            label = f"{low}-{BUCKETS_MS[n]}ms" if n < len(BUCKETS_MS) else f">{low}ms"
+            if count:
+                print(f"    {label:>11} {'#' * max(1, count * BAR_WIDTH // peak):<{BAR_WIDTH}} {count}", file=out)
+            if n < len(BUCKETS_MS):
+                low = BUCKETS_MS[n]
@@ -0,0 +1,143 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from levels import LEVELS_DIR, write_level
+
+# -----------------------------
+# Live level patches from the editor
+# -----------------------------
+# Listens to the editor's /api/levels/events stream (server-sent events) on a
+# background thread and queues the patches; the game drains the queue between
+# frames and applies them to the level it's playing (Level.apply_patch).
+# If we've never seen the level, a patch doesn't follow the version we have,
+# or the editor says the diff can't be expressed, the game gets the whole level
+# instead ({"type": "full"}). Either way this thread also fetches the saved
+# level and recompiles ../levels/<id>.lvl, so edits to levels that aren't open
+# are there the next time they are. Ids are limited to [A-Za-z0-9_-] (as in
+# the editor's store) since they become file names.
+#
+# Start the game with --live-levels (or GOOBCUBE_LIVE_LEVELS=1) and run the
+# editor alongside it; GOOBCUBE_EDITOR_URL points at a different editor.
+
+EDITOR_URL = os.environ.get("GOOBCUBE_EDITOR_URL", "http://127.0.0.1:5000")
+RETRY_DELAY = 1.0
+LEVEL_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class LiveLevels:
+    def __init__(self, url=EDITOR_URL, directory=LEVELS_DIR):
+        self.url = url.rstrip("/")
+        self.directory = directory
+        self.patches = queue.Queue()
+        self._versions = {}  # level id -> last version seen
+        self._running = True
+        self._response = None
+        self._thread = threading.Thread(target=self._run, name="level-live", daemon=True)
+        self._thread.start()
+
+    def drain(self):
+        """Patches received since the last call, oldest first."""
+        out = []
+        while True:
+            try:
+                out.append(self.patches.get_nowait())
+            except queue.Empty:
+                return out
+
+    def close(self):
+        self._running = False
+        response = self._response
+        if response is not None:
+            try:
+                response.close()
+            except OSError:
+                pass
+
+    # ---------- Background thread ----------
+
+    def _run(self):
+        while self._running:
+            try:
+                with urllib.request.urlopen(self.url + "/api/levels/events") as response:
+                    self._response = response
+                    print(f"🔌 Live levels from {self.url}")
+                    self._read(response)
+            except (OSError, ValueError) as e:
+                if self._running:
+                    print(f"⚠️ Live levels unavailable ({e}), retrying")
+            except AttributeError:
+                # close() shut the response under us and http.client trips over
+                # its emptied socket; anything else is a real bug
+                if self._running:
+                    raise
+            self._response = None
+            if self._running:
+                time.sleep(RETRY_DELAY)
+
+    def _read(self, response):
+        event, data = None, []
+        for raw in response:
+            if not self._running:
+                return
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if not line:
+                if event == "patch" and data:
+                    try:
+                        self._on_patch(json.loads("\n".join(data)))
+                    except (KeyError, TypeError, ValueError) as e:
+                        # One bad patch mustn't end the stream for every later save
+                        print(f"⚠️ Skipping live patch: {e!r}")
+                event, data = None, []
+            elif line.startswith(":"):
+                continue  # keepalive
+            else:
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field == "event":
+                    event = value
+                elif field == "data":
+                    data.append(value)
+
+    def _on_patch(self, patch):
+        level_id = patch["id"]
+        if not isinstance(level_id, str) or not LEVEL_ID.fullmatch(level_id):
+            print(f"⚠️ Ignoring live patch for bad level id {level_id!r}")
+            return
+        # The file on disk follows every save, open level or not
+        fetched = self._fetch(level_id)
+        if fetched is None:
+            return
+        doc, version = fetched
+        path = os.path.join(self.directory, f"{level_id}.lvl")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_level(doc, path)
+        except (OSError, ValueError) as e:  # LevelError is a ValueError
+            print(f"⚠️ Could not write level {level_id}, skipping it: {e}")
+            return
+
+        known = self._versions.get(level_id)
+        if patch.get("full") or known is None or known != patch["base"]:
+            patch = {"type": "full", "id": level_id, "game": patch["game"],
+                     "version": version or patch["version"], "path": path}
+        else:
+            patch = dict(patch, type="patch")
+        self._versions[level_id] = patch["version"]
+        self.patches.put(patch)
+
+    def _fetch(self, level_id):
+        """(level doc, version) as the editor has it now, or None."""
+        try:
+            with urllib.request.urlopen(f"{self.url}/api/levels/{urllib.parse.quote(level_id)}") as response:
+                version = response.headers.get("X-Level-Version")
+                return json.load(response), int(version) if version else None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not fetch level {level_id}: {e}")
+            return None
@@ -0,0 +1,418 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+
+# -----------------------------
+# Compiled binary levels
+# -----------------------------
+# Levels are edited as JSON (editor/level_store.py) and compiled into a small
+# binary file that the games map with mmap. Nothing is parsed up front: walls,
+# food, waves etc. are read through memoryviews straight out of the mapping,
+# and wall collisions are a single bit test in the occupancy bitmap.
+#
+# Layout (little-endian, sections 8-byte aligned):
+#   header   "GOOBLVL\0", u16 version, u16 game, u16 grid_w, u16 grid_h, u32 sections
+#   table    per section: 4-byte tag, u32 offset, u32 count, u32 record size
+#   NAME     utf-8 name                              (record size 1)
+#   WALL     u16 x, u16 y per wall cell              (snake)
+#   OCCB     grid_w * grid_h bits, row-major         (snake, wall occupancy)
+#   FOOD     u16 x, u16 y: food spawns in this order (snake)
+#   WAVE     u16 large, medium, small, pad, f32 speed min, max   (asteroids)
+#   RECT     i16 x, y, w, h obstacles in screen px   (pong)
+#   PARM     4-byte key, f32 value                   (any)
+#
+# JSON accepted by compile_level():
+#   {"game": "snake", "name": ..., "width": 38, "height": 19,
+#    "walls": [[x, y], ...], "wall_rects": [[x, y, w, h], ...], "food": [[x, y], ...],
+#    "start": [x, y]}
+#   {"game": "asteroids", "waves": [{"large": 3, "medium": 1, "small": 0, "speed": [40, 100]}, ...]}
+#   {"game": "pong", "obstacles": [[x, y, w, h], ...], "ball_speed": 320, "paddle_h": 100}
+#
+# A mapped level can also take live patches from the editor (level_live.py):
+# apply_patch() keeps the changes in a small overlay on top of the mapping, so
+# applying one costs as much as the diff, not the level.
+#
+#   python levels.py compile level.json [out.lvl]
+#   python levels.py export levels.ndjson out_dir/     (editor bulk export -> .lvl files)
+#   python levels.py dump out.lvl
+
+LEVELS_DIR = "../levels"
+MAGIC = b"GOOBLVL\0"
+VERSION = 1
+GAMES = {"snake": 1, "asteroids": 2, "pong": 3}
+GAME_NAMES = {v: k for k, v in GAMES.items()}
+
+HEADER = struct.Struct("<8sHHHHI")
+SECTION = struct.Struct("<4sIII")
+CELL = struct.Struct("<HH")
+WAVE = struct.Struct("<HHHHff")
+RECT = struct.Struct("<hhhh")
+PARAM = struct.Struct("<4sf")
+
+
+class LevelError(ValueError):
+    pass
+
+
+# ---------- Compiler (JSON -> bytes) ----------
+
+def _cells(pairs, w, h, what):
+    out = array("H")
+    for pair in pairs:
+        x, y = int(pair[0]), int(pair[1])
+        if not (0 <= x < w and 0 <= y < h):
+            raise LevelError(f"{what} cell ({x}, {y}) is outside the {w}x{h} grid")
+        out.extend((x, y))
+    return out
+
+
+def compile_level(doc):
+    try:
+        return _compile(doc)
+    except LevelError:
+        raise
+    except (AttributeError, KeyError, TypeError, ValueError, OverflowError, struct.error) as e:
+        # Wrong shapes or types anywhere in the JSON, e.g. a wave "speed" that isn't a pair
+        raise LevelError(f"malformed level: {e}") from e
+
+
+def _compile(doc):
+    game = GAMES.get(doc.get("game"))
+    if game is None:
+        raise LevelError(f"Unknown game: {doc.get('game')!r}")
+    w = int(doc.get("width", 0))
+    h = int(doc.get("height", 0))
+    sections = [(b"NAME", str(doc.get("name", "")).encode(), 1)]
+    params = []
+
+    if doc["game"] == "snake":
+        if not (0 < w < 65536 and 0 < h < 65536):
+            raise LevelError("snake levels need a width and height")
+        walls = _cells(doc.get("walls", []), w, h, "wall")
+        for x0, y0, rw, rh in doc.get("wall_rects", []):
+            walls.extend(_cells(((x, y) for y in range(y0, y0 + rh) for x in range(x0, x0 + rw)), w, h, "wall"))
+        bitmap = bytearray((w * h + 7) // 8)
+        unique = array("H")
+        for i in range(0, len(walls), 2):
+            bit = walls[i + 1] * w + walls[i]
+            if not bitmap[bit >> 3] & (1 << (bit & 7)):
+                bitmap[bit >> 3] |= 1 << (bit & 7)
+                unique.extend(walls[i:i + 2])
+        sections += [(b"WALL", unique.tobytes(), CELL.size),
+                     (b"OCCB", bytes(bitmap), 1),
+                     (b"FOOD", _cells(doc.get("food", []), w, h, "food").tobytes(), CELL.size)]
+        if "start" in doc:
+            sx, sy = _cells([doc["start"]], w, h, "start")
+            bit = sy * w + sx
+            if bitmap[bit >> 3] & (1 << (bit & 7)):
+                raise LevelError(f"start cell ({sx}, {sy}) is a wall")
+            params += [(b"strx", sx), (b"stry", sy)]
+    elif doc["game"] == "asteroids":
+        waves = b"".join(
+            WAVE.pack(int(wave.get("large", 0)), int(wave.get("medium", 0)), int(wave.get("small", 0)), 0,
+                      *map(float, wave.get("speed", (40, 100))))
+            for wave in doc.get("waves", []))
+        sections.append((b"WAVE", waves, WAVE.size))
+    elif doc["game"] == "pong":
+        rects = b"".join(RECT.pack(*map(int, r)) for r in doc.get("obstacles", []))
+        sections.append((b"RECT", rects, RECT.size))
+        for key, name in ((b"bspd", "ball_speed"), (b"padh", "paddle_h")):
+            if name in doc:
+                params.append((key, doc[name]))
+
+    sections.append((b"PARM", b"".join(PARAM.pack(k, float(v)) for k, v in params), PARAM.size))
+
+    offset = HEADER.size + SECTION.size * len(sections)
+    table, blobs = [], []
+    for tag, blob, size in sections:
+        offset += -offset % 8
+        table.append(SECTION.pack(tag, offset, len(blob) // size, size))
+        blobs.append((offset, blob))
+        offset += len(blob)
+
+    out = bytearray(offset)
+    HEADER.pack_into(out, 0, MAGIC, VERSION, game, w, h, len(sections))
+    out[HEADER.size:HEADER.size + len(table) * SECTION.size] = b"".join(table)
+    for start, blob in blobs:
+        out[start:start + len(blob)] = blob
+    return bytes(out)
+
+
+def write_level(doc, path):
+    data = compile_level(doc)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)  # never leave a half-written file for a game to map
+
+
+# ---------- Loader (mmap, zero-copy) ----------
+
+class Level:
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise LevelError("compiled levels are little-endian")
+        self.path = path
+        self.id = os.path.splitext(os.path.basename(path))[0]  # editor level id for exported levels
+        self.version = None  # editor version once a live patch was applied
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mm)
+        self._views = []
+        magic, version, game, self.grid_w, self.grid_h, count = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise LevelError(f"{path} is not a version {VERSION} goobcube level")
+        self.game = GAME_NAMES.get(game)
+        self.sections = {}
+        for i in range(count):
+            tag, offset, n, size = SECTION.unpack_from(self._buf, HEADER.size + i * SECTION.size)
+            self.sections[tag] = (offset, n, size)
+        self.name = bytes(self._section(b"NAME")).decode() or os.path.basename(path)
+        self.walls = self._section(b"WALL", "H")    # flat x0, y0, x1, y1, ...
+        self.food = self._section(b"FOOD", "H")
+        self._bitmap = self._section(b"OCCB")
+        self.params = {k.decode(): v for k, v in PARAM.iter_unpack(self._section(b"PARM"))}
+        # Live patch overlay
+        self._added = set()
+        self._removed = set()
+        self._waves = {}
+        self._wave_count = None
+        self._rects = None
+
+    def _section(self, tag, fmt=None):
+        offset, n, size = self.sections.get(tag, (0, 0, 1))
+        view = self._buf[offset:offset + n * size]
+        if fmt is not None:
+            view = view.cast(fmt)
+        self._views.append(view)
+        return view
+
+    @property
+    def wall_count(self):
+        return len(self.walls) // 2 + len(self._added) - len(self._removed)
+
+    @property
+    def food_count(self):
+        return len(self.food) // 2
+
+    def _mapped_wall(self, x, y):
+        if not self._bitmap or not (0 <= x < self.grid_w and 0 <= y < self.grid_h):
+            return False
+        bit = y * self.grid_w + x
+        return bool(self._bitmap[bit >> 3] & (1 << (bit & 7)))
+
+    def is_wall(self, x, y):
+        if self._added or self._removed:
+            if (x, y) in self._added:
+                return True
+            if (x, y) in self._removed:
+                return False
+        return self._mapped_wall(x, y)
+
+    def wall_cells(self):
+        walls, removed = self.walls, self._removed
+        for i in range(0, len(walls), 2):
+            cell = (walls[i], walls[i + 1])
+            if cell not in removed:
+                yield cell
+        yield from self._added
+
+    @property
+    def wave_count(self):
+        if self._wave_count is not None:
+            return self._wave_count
+        return self.sections.get(b"WAVE", (0, 0, 0))[1]
+
+    def wave(self, index):
+        """(large, medium, small, speed_min, speed_max) for the index-th wave."""
+        if index in self._waves:
+            return self._waves[index]
+        offset, n, size = self.sections[b"WAVE"]
+        large, medium, small, _, lo, hi = WAVE.unpack_from(self._buf, offset + index * size)
+        return large, medium, small, lo, hi
+
+    def rects(self):
+        if self._rects is not None:
+            return iter(self._rects)
+        offset, n, size = self.sections.get(b"RECT", (0, 0, RECT.size))
+        return RECT.iter_unpack(self._buf[offset:offset + n * size])
+
+    def apply_patch(self, patch):
+        """Apply a live patch (editor/level_events.py). Returns the wall cells that really
+        changed as (added, removed) so callers can redraw just those."""
+        added, removed = [], []
+        walls = patch.get("walls", {})
+        for x, y in walls.get("add", ()):
+            cell = (x, y)
+            if 0 <= x < self.grid_w and 0 <= y < self.grid_h and not self.is_wall(x, y):
+                self._removed.discard(cell)
+                if not self._mapped_wall(x, y):
+                    self._added.add(cell)
+                added.append(cell)
+        for x, y in walls.get("remove", ()):
+            cell = (x, y)
+            if self.is_wall(x, y):
+                self._added.discard(cell)
+                if self._mapped_wall(x, y):
+                    self._removed.add(cell)
+                removed.append(cell)
+
+        waves = patch.get("waves")
+        if waves is not None:
+            for index, wave in waves.get("set", {}).items():
+                self._waves[int(index)] = (int(wave.get("large", 0)), int(wave.get("medium", 0)),
+                                           int(wave.get("small", 0)), *map(float, wave.get("speed", (40, 100))))
+            self._wave_count = waves["count"]
+
+        changed = patch.get("set", {})
+        if "name" in changed:
+            self.name = str(changed["name"] or self.id)
+        if "food" in changed:
+            self.food = array("H", [int(v) for cell in changed["food"] or () for v in cell])
+        if "start" in changed:
+            start = changed["start"]
+            for key, value in zip(("strx", "stry"), start or ()):
+                self.params[key] = float(value)
+            if not start:
+                self.params.pop("strx", None)
+                self.params.pop("stry", None)
+        if "obstacles" in changed:
+            self._rects = [tuple(map(int, r)) for r in changed["obstacles"] or ()]
+        for key, name in (("bspd", "ball_speed"), ("padh", "paddle_h")):
+            if name in changed:
+                if changed[name] is None:
+                    self.params.pop(key, None)
+                else:
+                    self.params[key] = float(changed[name])
+        if "version" in patch:
+            self.version = patch["version"]
+        return added, removed
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._buf.release()
+        self._mm.close()
+
+
+class LevelLibrary:
+    """All levels in a directory, grouped by game. Recently opened levels stay mapped (LRU)."""
+
+    def __init__(self, directory=LEVELS_DIR, cache_size=8):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._open = OrderedDict()  # path -> Level
+        self._index = {}            # path -> (mtime, game)
+
+    def paths(self, game):
+        if not os.path.isdir(self.directory):
+            return []
+        self._build_stale()
+        found = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".lvl"):
+                continue
+            path = os.path.join(self.directory, name)
+            mtime = os.path.getmtime(path)
+            cached = self._index.get(path)
+            if cached is None or cached[0] != mtime:
+                # Only the header is read to sort levels by game
+                with open(path, "rb") as f:
+                    head = f.read(HEADER.size)
+                ok = len(head) == HEADER.size and head[:8] == MAGIC
+                cached = self._index[path] = (mtime, GAME_NAMES.get(HEADER.unpack(head)[2]) if ok else None)
+            if cached[1] == game:
+                found.append(path)
+        return found
+
+    def _build_stale(self):
+        # Compile JSON sources sitting next to the .lvl files when they're newer
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            src = os.path.join(self.directory, name)
+            dst = src[:-5] + ".lvl"
+            if not os.path.exists(dst) or os.path.getmtime(dst) < os.path.getmtime(src):
+                try:
+                    with open(src) as f:
+                        write_level(json.load(f), dst)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    print(f"⚠️ Could not compile level {src}: {e}")
+
+    def open(self, path):
+        level = self._open.get(path)
+        if level is not None and self._index.get(path, (None,))[0] == os.path.getmtime(path):
+            self._open.move_to_end(path)
+            return level
+        # Evicted or outdated levels aren't closed here: a game may still be playing
+        # one. The mapping goes away with the last reference.
+        level = Level(path)
+        self._open[path] = level
+        self._open.move_to_end(path)
+        while len(self._open) > self.cache_size:
+            self._open.popitem(last=False)
+        return level
+
+    def cached(self, level_id):
+        """Mapped levels with this id (live patches go to these; others are reloaded from disk)."""
+        return [level for level in self._open.values() if level.id == level_id]
+
+    def next(self, game, current=None):
+        """The level after `current` (None = built-in layout), cycling back to None."""
+        paths = self.paths(game)
+        if not paths:
+            return None
+        try:
+            i = paths.index(current.path) + 1 if current is not None else 0
+        except ValueError:
+            i = 0
+        return self.open(paths[i]) if i < len(paths) else None
+
+    def first(self, game):
+        return self.next(game, None)
+
+    def close(self):
+        for level in self._open.values():
+            level.close()
+        self._open.clear()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) >= 2 and argv[0] == "compile":
+        src = argv[1]
+        dst = argv[2] if len(argv) > 2 else os.path.splitext(src)[0] + ".lvl"
+        with open(src) as f:
+            write_level(json.load(f), dst)
+        print(f"Wrote {dst}")
+    elif len(argv) == 3 and argv[0] == "export":
+        os.makedirs(argv[2], exist_ok=True)
+        count = 0
+        with open(argv[1]) as f:
+            for line in f:
+                if line.strip():
+                    doc = json.loads(line)
+                    if doc.get("game") in GAMES:
+                        write_level(doc, os.path.join(argv[2], f"{doc.get('id', count)}.lvl"))
+                        count += 1
+        print(f"Compiled {count} levels into {argv[2]}")
+    elif len(argv) == 2 and argv[0] == "dump":
+        level = Level(argv[1])
+        print(f"{level.name}: {level.game} {level.grid_w}x{level.grid_h}, {level.wall_count} walls, "
+              f"{level.food_count} food, {level.wave_count} waves, {sum(1 for _ in level.rects())} rects, "
+              f"params {level.params}")
+        level.close()
+    else:
+        print("usage: levels.py compile in.json [out.lvl] | export levels.ndjson out_dir | dump in.lvl")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
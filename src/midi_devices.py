@@ -0,0 +1,146 @@
+import threading
+
+import mido
+
+# -----------------------------
+# Background MIDI port discovery + hotplug
+# -----------------------------
+# Port enumeration (rtmidi) can be slow and only ran once at startup, so a
+# keyboard plugged in later was never seen. This scans on its own thread,
+# caches the port names, and (re)connects the preferred devices when they
+# show up or go away. Owners get told through on_output/on_input, called
+# from the scan thread with the newly opened port (or None when it's gone).
+
+class MidiDeviceManager:
+    def __init__(self, on_output, on_input, input_callback=None,
+                 prefer_output=("fluid",), prefer_input=("microkey",),
+                 any_output=True, interval=2.0):
+        self.on_output = on_output
+        self.on_input = on_input
+        self.input_callback = input_callback
+        self.prefer_output = prefer_output
+        self.prefer_input = prefer_input
+        self.any_output = any_output  # fall back to the first output if nothing preferred
+        self.interval = interval
+
+        # Cached results of the last scan
+        self.output_names = []
+        self.input_names = []
+        self.output = None
+        self.input = None
+        self.scanned = threading.Event()
+        self._scan_error = None
+        self._open_failed = set()  # ports that wouldn't open; retried every scan, reported once
+
+        self._running = True
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def rescan(self):
+        """Ask for a scan now instead of at the next poll."""
+        self._wake.set()
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        for port in (self.input, self.output):
+            try:
+                if port is not None:
+                    port.close()
+            except Exception:
+                pass
+        self.input = None
+        self.output = None
+
+    # ---------- Scan thread ----------
+
+    def _run(self):
+        while self._running:
+            try:
+                self._scan()
+                self._scan_error = None
+            except Exception as e:
+                # No backend at all (e.g. no libasound or /dev/snd/seq): say so
+                # once, and on the first scan still report "no output" so the
+                # owner can fall back instead of waiting forever
+                if str(e) != self._scan_error:
+                    print(f"⚠️ MIDI device scan failed: {e}")
+                    self._scan_error = str(e)
+                if not self.scanned.is_set():
+                    self.on_output(None)
+            self.scanned.set()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _scan(self):
+        outputs = mido.get_output_names()
+        inputs = mido.get_input_names()
+        first = not self.scanned.is_set()
+        if (not first and not self._open_failed
+                and outputs == self.output_names and inputs == self.input_names):
+            return  # nothing plugged or unplugged: the common, cheap case
+        self.output_names = outputs
+        self.input_names = inputs
+        self._update_output(outputs, first)
+        self._update_input(inputs)
+
+    def _pick(self, names, prefer):
+        return next((n for n in names if any(p in n.lower() for p in prefer)), None)
+
+    def _update_output(self, names, first):
+        current = self.output.name if self.output is not None else None
+        wanted = self._pick(names, self.prefer_output)
+        if wanted is None and self.any_output:
+            # Keep whatever we have if it's still there, else the first real port
+            # (ALSA's "Midi Through" just echoes to nobody)
+            names = [n for n in names if "midi through" not in n.lower()]
+            wanted = current if current in names else (names[0] if names else None)
+        # The first scan always reports, so the owner can set up a fallback
+        if wanted == current and not first:
+            return
+
+        new = self._open(mido.open_output, wanted, "output")
+        if new is None and self.output is None and not first:
+            return  # still nothing: the owner already has its fallback
+        # Hand over the new port before closing the old one, so sends never hit a closed port
+        old, self.output = self.output, new
+        self.on_output(new)
+        self._close(old, "output")
+
+    def _update_input(self, names):
+        current = self.input.name if self.input is not None else None
+        wanted = self._pick(names, self.prefer_input)
+        if wanted == current:
+            return
+
+        new = self._open(mido.open_input, wanted, "input", callback=self.input_callback)
+        if new is None and self.input is None:
+            return
+        old, self.input = self.input, new
+        self.on_input(new)
+        self._close(old, "input")
+
+    def _open(self, opener, name, kind, **kwargs):
+        if name is None:
+            return None
+        try:
+            port = opener(name, **kwargs)
+        except Exception as e:
+            # Busy or half-enumerated ports often open a moment later
+            if (kind, name) not in self._open_failed:
+                print(f"⚠️ Could not open MIDI {kind} '{name}': {e}")
+                self._open_failed.add((kind, name))
+            return None
+        self._open_failed.discard((kind, name))
+        print(f"🎛 MIDI {kind} '{name}' connected.")
+        return port
+
+    def _close(self, port, kind):
+        if port is None:
+            return
+        print(f"🎛 MIDI {kind} '{port.name}' disconnected.")
+        try:
+            port.close()
+        except Exception:
+            pass
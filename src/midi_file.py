@@ -0,0 +1,289 @@
+import heapq
+import struct
+import threading
+import time
+import mido
+from mido import Message, MetaMessage, MidiFile, MidiTrack
+
+# -----------------------------
+# Recording + lazy .mid playback for the Piano game
+# -----------------------------
+
+DEFAULT_TEMPO = 500000  # µs per beat (120 bpm)
+RECORD_TPB = 960         # ~0.5 ms per tick at the default tempo
+
+RECORDED_TYPES = ("note_on", "note_off", "pitchwheel", "program_change", "control_change")
+
+
+class MidiRecorder:
+    def __init__(self):
+        self.events = []
+        self.recording = False
+        self._start = 0.0
+
+    def start(self):
+        self.events = []
+        self._start = time.perf_counter()
+        self.recording = True
+
+    def stop(self):
+        self.recording = False
+
+    def capture(self, msg, stamp=None):
+        # Called from the main thread (keyboard) and the MIDI callback thread;
+        # list.append is atomic, ordering is fixed up by sorting on save.
+        if self.recording and msg.type in RECORDED_TYPES:
+            stamp = time.perf_counter() if stamp is None else stamp
+            self.events.append((stamp - self._start, msg.copy(time=0)))
+
+    def save(self, path, ticks_per_beat=RECORD_TPB, tempo=DEFAULT_TEMPO):
+        mid = MidiFile(type=0, ticks_per_beat=ticks_per_beat)
+        track = MidiTrack()
+        mid.tracks.append(track)
+        track.append(MetaMessage("set_tempo", tempo=tempo, time=0))
+        last_tick = 0
+        for seconds, msg in sorted(self.events, key=lambda e: e[0]):
+            tick = int(round(mido.second2tick(max(0.0, seconds), ticks_per_beat, tempo)))
+            track.append(msg.copy(time=tick - last_tick))
+            last_tick = tick
+        mid.save(path)
+        return len(self.events)
+
+
+# -----------------------------
+# Streaming Standard MIDI File reader
+# -----------------------------
+# mido.MidiFile parses everything up front. This reader only walks the chunk
+# headers on open, then decodes events lazily as the generator is consumed,
+# keeping a tempo map and a sparse seek index as it goes.
+
+class _TrackCursor:
+    __slots__ = ("start", "end", "pos", "tick", "status", "buf", "buf_pos", "saved")
+
+    def __init__(self, start, length):
+        self.start = start
+        self.end = start + length
+        self.pos = start
+        self.tick = 0
+        self.status = 0
+        self.buf = b""
+        self.buf_pos = start
+        self.saved = (start, 0, 0)
+
+    def state(self):
+        return (self.pos, self.tick, self.status)
+
+    def restore(self, state):
+        self.pos, self.tick, self.status = state
+
+
+class StreamingMidiFile:
+    BLOCK = 4096
+
+    def __init__(self, path, index_interval=2.0):
+        self.path = path
+        self._f = open(path, "rb")
+        self.index_interval = index_interval
+
+        if self._f.read(4) != b"MThd":
+            raise ValueError(f"{path}: not a standard MIDI file")
+        hlen, self.format, ntracks, division = struct.unpack(">IHHH", self._f.read(10))
+        if division & 0x8000:
+            raise ValueError(f"{path}: SMPTE time division is not supported")
+        self.ticks_per_beat = division
+        self._f.seek(8 + hlen)
+
+        # Only chunk headers are read here, so opening is O(number of tracks)
+        self.tracks = []
+        while len(self.tracks) < ntracks:
+            header = self._f.read(8)
+            if len(header) < 8:
+                break
+            kind, length = struct.unpack(">4sI", header)
+            if kind == b"MTrk":
+                self.tracks.append((self._f.tell(), length))
+            self._f.seek(length, 1)
+
+        # (tick, seconds, tempo) at each tempo change seen so far
+        self.tempo_map = [(0, 0.0, DEFAULT_TEMPO)]
+        # (seconds, tick, tempo state, per-track cursor states), appended while playing
+        self.seek_index = []
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._f.close()
+
+    # ---------- Low-level decoding ----------
+
+    def _read(self, cur, n):
+        # Per-track read-ahead window over the shared file handle
+        off = cur.pos - cur.buf_pos
+        if off < 0 or off + n > len(cur.buf):
+            with self._lock:
+                self._f.seek(cur.pos)
+                cur.buf = self._f.read(max(n, min(self.BLOCK, cur.end - cur.pos)))
+            cur.buf_pos = cur.pos
+            off = 0
+        data = cur.buf[off:off + n]
+        if len(data) < n:
+            raise ValueError(f"{self.path}: truncated track at byte {cur.pos}")
+        cur.pos += n
+        return data
+
+    def _varlen(self, cur):
+        value = 0
+        while True:
+            b = self._read(cur, 1)[0]
+            value = (value << 7) | (b & 0x7F)
+            if not b & 0x80:
+                return value
+
+    def _next_event(self, cur):
+        """Return (abs_tick, kind, payload) or None at end of track."""
+        cur.saved = cur.state()
+        while cur.pos < cur.end:
+            cur.tick += self._varlen(cur)
+            status = self._read(cur, 1)[0]
+            if status == 0xFF:
+                meta = self._read(cur, 1)[0]
+                data = self._read(cur, self._varlen(cur))
+                if meta == 0x2F:
+                    return None
+                if meta == 0x51 and len(data) == 3:
+                    return (cur.tick, "tempo", (data[0] << 16) | (data[1] << 8) | data[2])
+                continue
+            if status in (0xF0, 0xF7):
+                self._read(cur, self._varlen(cur))
+                continue
+            if status & 0x80:
+                cur.status = status
+                first = self._read(cur, 1)
+            else:
+                # Running status: the byte we just read is already data
+                first = bytes((status,))
+                status = cur.status
+            kind = status & 0xF0
+            rest = b"" if kind in (0xC0, 0xD0) else self._read(cur, 1)
+            return (cur.tick, "msg", bytes((status,)) + first + rest)
+        return None
+
+    # ---------- Public API ----------
+
+    def _checkpoint_for(self, start):
+        best = None
+        for cp in self.seek_index:
+            if cp[0] <= start:
+                best = cp
+            else:
+                break
+        return best
+
+    def events(self, start=0.0):
+        """Yield (seconds, mido.Message) lazily, beginning at `start` seconds."""
+        cursors = [_TrackCursor(off, length) for off, length in self.tracks]
+        tick0, sec0, tempo = 0, 0.0, DEFAULT_TEMPO
+
+        cp = self._checkpoint_for(start)
+        if cp is not None:
+            _, tick0, (sec0, tempo), states = cp
+            for cur, state in zip(cursors, states):
+                cur.restore(state)
+
+        heap = []
+        for i, cur in enumerate(cursors):
+            ev = self._next_event(cur)
+            if ev is not None:
+                heapq.heappush(heap, (ev[0], i, ev))
+
+        tpb = self.ticks_per_beat
+        next_index = (self.seek_index[-1][0] + self.index_interval) if self.seek_index else 0.0
+        while heap:
+            tick, i, ev = heapq.heappop(heap)
+            seconds = sec0 + (tick - tick0) * tempo / (tpb * 1e6)
+
+            if seconds >= next_index and (not self.seek_index or seconds > self.seek_index[-1][0]):
+                # Cursor states from *before* each pending lookahead, so a resume re-reads them
+                states = [cur.saved for cur in cursors]
+                self.seek_index.append((seconds, tick0, (sec0, tempo), states))
+                next_index = seconds + self.index_interval
+
+            nxt = self._next_event(cursors[i])
+            if nxt is not None:
+                heapq.heappush(heap, (nxt[0], i, nxt))
+
+            if ev[1] == "tempo":
+                tick0, sec0, tempo = tick, seconds, ev[2]
+                if tick > self.tempo_map[-1][0]:
+                    self.tempo_map.append((tick, seconds, tempo))
+                continue
+            try:
+                msg = Message.from_bytes(ev[2])
+            except ValueError:
+                continue
+            # When seeking, still pass along channel state (instrument, controllers, bend)
+            if seconds < start and msg.type not in ("program_change", "control_change", "pitchwheel"):
+                continue
+            yield seconds, msg
+
+
+# -----------------------------
+# Playback through a MidiScheduler
+# -----------------------------
+class MidiPlayer:
+    def __init__(self, path, scheduler, lookahead=0.25):
+        self.reader = StreamingMidiFile(path)
+        self.scheduler = scheduler
+        self.lookahead = lookahead
+        self._stop = threading.Event()
+        self._thread = None
+        self._t0 = 0.0
+        self.playing = False
+
+    def start(self, offset=0.0):
+        """Start at `offset` seconds into the file; a negative offset gives a lead-in."""
+        self.stop()
+        self._stop.clear()
+        self.playing = True
+        self._t0 = time.perf_counter() - offset
+        self._thread = threading.Thread(target=self._pump, args=(offset,), daemon=True)
+        self._thread.start()
+
+    def position(self):
+        """Seconds into the file right now, on the same clock the events are scheduled with."""
+        return time.perf_counter() - self._t0
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.scheduler.cancel_all()
+        self.playing = False
+
+    def close(self):
+        self.stop()
+        self.reader.close()
+
+    def _pump(self, offset):
+        # Feed the scheduler a short window ahead of the clock; the scheduler
+        # thread does the precise timing, this one just keeps it topped up.
+        t0 = self._t0
+        due = t0
+        try:
+            for seconds, msg in self.reader.events(start=offset):
+                due = t0 + max(seconds, offset)
+                wait = due - self.lookahead - time.perf_counter()
+                if wait > 0 and self._stop.wait(wait):
+                    return
+                if self._stop.is_set():
+                    return
+                self.scheduler.schedule_at(due, msg)
+            # Let the tail ring out before reporting that we're done
+            remaining = due - time.perf_counter()
+            if remaining > 0 and self._stop.wait(remaining):
+                return
+        except ValueError as e:
+            # Corrupt file: play what decoded, then stop instead of killing the thread
+            print(f"⚠️ Playback stopped: {e}")
+        finally:
+            self.playing = False
@@ -0,0 +1,116 @@
+import os
+import queue
+import threading
+from mido.ports import BaseInput, BaseOutput
+
+# -----------------------------
+# In-process loopback backend for mido
+# -----------------------------
+# Lets PianoMidiGame, midi_router.py etc. run with no MIDI hardware at all:
+#
+#   mido.set_backend('midi_loopback')        # or GOOBCUBE_MIDI_BACKEND=midi_loopback
+#
+# Every bus appears both as an output and an input with the same name;
+# whatever is sent to the output comes out of every input opened on that bus.
+# The default buses are named so the game's device matching finds them:
+# "Loopback microKEY" (feed it like a keyboard) and "Loopback FluidSynth"
+# (listen on it to see what the game played). GOOBCUBE_LOOPBACK_PORTS
+# overrides the list (comma separated).
+
+DEFAULT_BUSES = "Loopback microKEY,Loopback FluidSynth"
+
+_lock = threading.Lock()
+_buses = {}
+
+
+class _Bus:
+    def __init__(self, name):
+        self.name = name
+        self.inputs = []
+
+    def deliver(self, msg):
+        for port in list(self.inputs):
+            port._deliver(msg)
+
+
+def _bus_names():
+    names = os.environ.get("GOOBCUBE_LOOPBACK_PORTS", DEFAULT_BUSES)
+    return [n.strip() for n in names.split(",") if n.strip()]
+
+
+def get_bus(name):
+    with _lock:
+        bus = _buses.get(name)
+        if bus is None:
+            bus = _buses[name] = _Bus(name)
+        return bus
+
+
+def get_devices(**kwargs):
+    names = list(dict.fromkeys(_bus_names() + list(_buses)))
+    return [{"name": n, "is_input": True, "is_output": True} for n in names]
+
+
+class Input(BaseInput):
+    def _open(self, callback=None, virtual=False, **kwargs):
+        if self.name is None:
+            self.name = _bus_names()[0]
+        self._bus = get_bus(self.name)
+        self._callback = None
+        self._inbox = None
+        self._thread = None
+        self.callback = callback
+        with _lock:
+            self._bus.inputs.append(self)
+
+    # Like rtmidi, callbacks run on a backend thread, never on the sender's
+    @property
+    def callback(self):
+        return self._callback
+
+    @callback.setter
+    def callback(self, func):
+        self._callback = func
+        if func is not None and self._thread is None:
+            self._inbox = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._dispatch, daemon=True)
+            self._thread.start()
+
+    def _deliver(self, msg):
+        if self._callback is not None:
+            self._inbox.put(msg)
+        else:
+            with self._lock:
+                self._messages.append(msg)
+
+    def _dispatch(self):
+        while True:
+            msg = self._inbox.get()
+            if msg is None:
+                return
+            func = self._callback
+            if func is not None:
+                func(msg)
+
+    def _receive(self, block=True):
+        return None
+
+    def _close(self):
+        with _lock:
+            if self in self._bus.inputs:
+                self._bus.inputs.remove(self)
+        if self._inbox is not None:
+            self._inbox.put(None)
+
+
+class Output(BaseOutput):
+    def _open(self, virtual=False, **kwargs):
+        if self.name is None:
+            self.name = _bus_names()[-1]
+        self._bus = get_bus(self.name)
+
+    def _send(self, msg):
+        self._bus.deliver(msg)
+
+    def _close(self):
+        pass
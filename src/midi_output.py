@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import deque
+from mido import Message
+from stats import LatencyStats
+
+# -----------------------------
+# Asynchronous MIDI output
+# -----------------------------
+# port.send() can block for a while on a slow or stalled synth. Producers
+# (main loop, MIDI callback, schedulers) only enqueue here; one worker thread
+# drains the queue in bursts and does the actual sends. Redundant traffic is
+# dropped or merged on the way in:
+#   - note_off for a note that isn't sounding
+#   - pitchwheel repeating the last value on that channel
+#   - pitchwheel updates still waiting in the queue (latest value wins)
+
+class MidiOutputWorker:
+    def __init__(self, get_port, maxsize=512):
+        # get_port is called per burst, so the port can be swapped underneath us
+        self._get_port = get_port
+        self.maxsize = maxsize
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._sounding = set()       # (channel, note) as of the last enqueue
+        self._last_bend = {}         # channel -> last pitch enqueued
+        self._pending_bend = {}      # channel -> queued [stamp, msg] cell, still unsent
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.latency = LatencyStats()  # enqueue -> actually sent
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # ---------- Producer side (any thread, never blocks on the port) ----------
+
+    def send(self, msg):
+        with self._cond:
+            if self._enqueue(msg):
+                self._cond.notify()
+
+    def send_many(self, msgs):
+        with self._cond:
+            queued = False
+            for msg in msgs:
+                queued = self._enqueue(msg) or queued
+            if queued:
+                self._cond.notify()
+
+    def all_notes_off(self, channel=0):
+        # Explicit offs for what's actually sounding (CC 123 isn't honored everywhere)
+        with self._cond:
+            for ch, note in sorted(self._sounding):
+                self._enqueue(Message('note_off', note=note, velocity=0, channel=ch))
+            self._enqueue(Message('control_change', control=123, value=0, channel=channel))
+            self._cond.notify()
+
+    def _enqueue(self, msg):
+        kind = msg.type
+        channel = getattr(msg, "channel", 0)
+        if kind == 'note_on' and msg.velocity == 0:
+            kind = 'note_off'
+
+        if kind == 'note_off':
+            key = (channel, msg.note)
+            if key not in self._sounding:
+                self.coalesced += 1
+                return False
+            # Always accepted: bounded by 16*128 anyway, and a lost note-off means a stuck note
+            self._sounding.discard(key)
+        elif kind == 'pitchwheel':
+            if self._last_bend.get(channel) == msg.pitch:
+                self.coalesced += 1
+                return False
+            self._last_bend[channel] = msg.pitch
+            cell = self._pending_bend.get(channel)
+            if cell is not None:
+                cell[1] = msg
+                self.coalesced += 1
+                return False
+        elif len(self._queue) >= self.maxsize:
+            self.dropped += 1
+            return False
+        elif kind == 'note_on':
+            self._sounding.add((channel, msg.note))
+
+        cell = [time.perf_counter(), msg]
+        if kind == 'pitchwheel':
+            self._pending_bend[channel] = cell
+        self._queue.append(cell)
+        return True
+
+    # ---------- Worker ----------
+
+    def flush(self, timeout=1.0):
+        """Wait until the worker has picked up everything queued so far."""
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while self._queue and time.perf_counter() < deadline:
+                self._cond.wait(0.01)
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                # Take the whole burst in one go
+                batch = list(self._queue)
+                self._queue.clear()
+                self._pending_bend.clear()
+                self._cond.notify_all()  # wake flush()
+
+            port = self._get_port()
+            for stamp, msg in batch:
+                if port is None:
+                    continue
+                try:
+                    port.send(msg)
+                    self.sent += 1
+                except Exception as e:
+                    print("MIDI send error:", e)
+                self.latency.add(time.perf_counter() - stamp)
+
+    def format_stats(self):
+        return (f"sent={self.sent} coalesced={self.coalesced} dropped={self.dropped} "
+                + self.latency.format("queue->port"))
@@ -0,0 +1,128 @@
+import argparse
+import os
+import sys
+import threading
+import time
+import mido
+from mido import Message
+from stats import LatencyStats
+
+# -----------------------------
+# Headless MIDI router (piano.py without the window)
+# -----------------------------
+# Forwards a controller (microKEY by default) into a synth (FluidSynth by
+# default) with the same CC1/CC2 -> pitch wheel mapping as piano.py, but no
+# pygame, no display and no interactive prompts. Input is callback-driven, so
+# the process sleeps between notes. Usage:
+#
+#   python midi_router.py --input microkey --output fluid --report-every 10
+#   python piano.py --headless ...same options...
+
+
+def translate(msg):
+    """Map an incoming message to what the synth should get (or None to ignore it)."""
+    if msg.type == 'note_on' and msg.velocity > 0:
+        return msg
+    if msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
+        return Message('note_off', note=msg.note, velocity=0, channel=msg.channel)
+    if msg.type == 'control_change' and msg.control in (1, 2):
+        # value is 0-127, scale to 0..8191 (bend up only, like piano.py)
+        return Message('pitchwheel', pitch=int((msg.value / 127) * 8191), channel=msg.channel)
+    return None
+
+
+def find_port(names, patterns):
+    for pattern in patterns:
+        for name in names:
+            if pattern.lower() in name.lower():
+                return name
+    return None
+
+
+class MidiRouter:
+    def __init__(self, output):
+        self.output = output
+        self.latency = LatencyStats(window=65536)
+        self.routed = 0
+        self.ignored = 0
+        self.errors = 0
+
+    def on_message(self, msg):
+        # Runs on the backend's callback thread; send straight away, no extra hops
+        start = time.perf_counter()
+        out = translate(msg)
+        if out is None:
+            self.ignored += 1
+            return
+        try:
+            self.output.send(out)
+        except Exception as e:
+            self.errors += 1
+            print("MIDI send error:", e, file=sys.stderr)
+            return
+        self.routed += 1
+        self.latency.add(time.perf_counter() - start)
+
+    def report(self):
+        print(self.latency.format(f"routed={self.routed} ignored={self.ignored} errors={self.errors}"),
+              flush=True)
+
+
+def parse_args(argv):
+    p = argparse.ArgumentParser(description="Headless microKEY -> FluidSynth router")
+    p.add_argument("--input", action="append", default=None,
+                   help="substring of the input port name (repeatable, first match wins; default: microkey)")
+    p.add_argument("--output", action="append", default=None,
+                   help="substring of the output port name (repeatable; default: fluid)")
+    p.add_argument("--program", type=int, default=80, help="program change sent on startup (default: 80)")
+    p.add_argument("--report-every", type=float, default=0.0,
+                   help="print latency percentiles every N seconds (default: only on exit)")
+    p.add_argument("--backend", default=os.environ.get("GOOBCUBE_MIDI_BACKEND", "mido.backends.rtmidi"),
+                   help="mido backend module (default: $GOOBCUBE_MIDI_BACKEND or rtmidi)")
+    p.add_argument("--list", action="store_true", help="list ports and exit")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    mido.set_backend(args.backend)
+
+    output_names = mido.get_output_names()
+    input_names = mido.get_input_names()
+    if args.list:
+        print("Outputs:", *output_names, sep="\n  ")
+        print("Inputs:", *input_names, sep="\n  ")
+        return 0
+
+    out_name = find_port(output_names, args.output or ["fluid"])
+    in_name = find_port(input_names, args.input or ["microkey"])
+    if out_name is None:
+        print(f"No MIDI output matching {args.output or ['fluid']}; have: {output_names}", file=sys.stderr)
+        return 1
+    if in_name is None:
+        print(f"No MIDI input matching {args.input or ['microkey']}; have: {input_names}", file=sys.stderr)
+        return 1
+
+    output = mido.open_output(out_name)
+    output.send(Message('program_change', program=args.program % 128, channel=0))
+    router = MidiRouter(output)
+    midi_input = mido.open_input(in_name, callback=router.on_message)
+    print(f"Routing '{in_name}' -> '{out_name}' (Ctrl+C to stop)", flush=True)
+
+    stop = threading.Event()
+    try:
+        while not stop.wait(args.report_every if args.report_every > 0 else 3600):
+            if args.report_every > 0:
+                router.report()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        midi_input.close()
+        output.send(Message('control_change', control=123, value=0, channel=0))
+        output.close()
+        router.report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import heapq
+import itertools
+import threading
+import time
+from stats import LatencyStats
+
+# -----------------------------
+# Timed MIDI events off the render thread
+# -----------------------------
+# A priority queue of (due, seq, message) serviced by one timer thread.
+# The thread sleeps on a condition until just before the next deadline and
+# then yields in a tight loop for the last stretch, which gets well under a
+# millisecond of lateness without burning a core while idle.
+
+class MidiScheduler:
+    def __init__(self, send, spin=0.001):
+        self._send = send
+        self.spin = spin
+        self._heap = []
+        self._seq = itertools.count()  # tie-breaker keeps same-time events in order
+        self._cond = threading.Condition()
+        self._running = True
+        # How late each message actually went out, relative to its due time
+        self.jitter = LatencyStats()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # ---------- Public API ----------
+
+    def schedule(self, delay, msg):
+        """Send msg `delay` seconds from now."""
+        self.schedule_at(time.perf_counter() + max(0.0, delay), msg)
+
+    def schedule_at(self, when, msg):
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._seq), msg))
+            # Only wake the timer if this is the new earliest deadline
+            if self._heap[0][2] is msg:
+                self._cond.notify()
+
+    def schedule_sequence(self, events, start=None):
+        """Queue many (offset_seconds, msg) pairs relative to `start` in one go."""
+        base = time.perf_counter() if start is None else start
+        with self._cond:
+            for offset, msg in events:
+                heapq.heappush(self._heap, (base + offset, next(self._seq), msg))
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    def cancel_all(self):
+        with self._cond:
+            self._heap.clear()
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._heap.clear()
+            self._cond.notify()
+
+    # ---------- Timer thread ----------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    remaining = self._heap[0][0] - time.perf_counter()
+                    if remaining <= self.spin:
+                        break
+                    self._cond.wait(remaining - self.spin)
+                if not self._running:
+                    return
+                due = self._heap[0][0]
+
+            # Last stretch: yield-spin instead of trusting the OS sleep granularity
+            while time.perf_counter() < due:
+                time.sleep(0)
+
+            batch = []
+            with self._cond:
+                now = time.perf_counter()
+                while self._heap and self._heap[0][0] <= now:
+                    batch.append(heapq.heappop(self._heap))
+
+            for when, _, msg in batch:
+                self.jitter.add(time.perf_counter() - when)
+                try:
+                    self._send(msg)
+                except Exception as e:
+                    print("MIDI scheduler send error:", e)
@@ -1,11 +1,19 @@
+import sys
+
+# No screen on the synth box? Route the keyboard without pygame at all.
+if "--headless" in sys.argv:
+    from midi_router import main
+    sys.exit(main([a for a in sys.argv[1:] if a != "--headless"]))
+
+import os
 import pygame
 import time
 import mido
-from mido import Message, open_output, open_input, get_output_names, get_input_names
+from mido import Message
 import colorsys
 import random
 
-mido.set_backend('mido.backends.rtmidi')
+mido.set_backend(os.environ.get("GOOBCUBE_MIDI_BACKEND", 'mido.backends.rtmidi'))
 
 CURRENT_INSTRUMENT = 80
 
@@ -23,24 +31,24 @@ NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
 
 
 
-midi_out_name = next((name for name in get_output_names() if "fluid" in name.lower()), None)
+midi_out_name = next((name for name in mido.get_output_names() if "fluid" in name.lower()), None)
 if not midi_out_name:
     raise RuntimeError("Could not find FluidSynth MIDI output device.")
 
-midi_output = open_output(midi_out_name)
+midi_output = mido.open_output(midi_out_name)
 midi_output.send(Message('program_change', program=CURRENT_INSTRUMENT, channel=0))
 
 
 # by default select first MIDI input device containing "microKEY"
 # otherwise show selection menu
 
-input_names = get_input_names()
+input_names = mido.get_input_names()
 midi_input_name = next((name for name in input_names if "microkey" in name.lower()), None)
 if midi_input_name:
-    midi_input = open_input(midi_input_name)
+    midi_input = mido.open_input(midi_input_name)
 else:
     print("\n🎛 Available MIDI output ports:")
-    for port in get_output_names():
+    for port in mido.get_output_names():
         print(f"  {port}")
 
     print("\n🎛 Available MIDI input ports:")
@@ -52,7 +60,7 @@ else:
     if selection:
         idx = int(selection) - 1
         if 0 <= idx < len(input_names):
-            midi_input = open_input(input_names[idx])
+            midi_input = mido.open_input(input_names[idx])
 
 
 
@@ -0,0 +1,128 @@
+import threading
+from array import array
+import pygame
+from midi_file import StreamingMidiFile
+
+# -----------------------------
+# Falling-notes ("Synthesia") view for the Piano game
+# -----------------------------
+
+class NoteIndex:
+    """Note spans from a .mid file, bucketed by time so a frame only touches visible notes."""
+
+    def __init__(self, path, bucket=0.5):
+        self.bucket = bucket
+        self.starts = array("d")
+        self.ends = array("d")
+        self.notes = array("B")
+        self.buckets = []
+        self._build(path)
+
+    def _build(self, path):
+        reader = StreamingMidiFile(path)
+        held = {}  # (channel, note) -> [start times], so overlapping repeats pair up FIFO
+        spans = []
+        last = 0.0
+        try:
+            for seconds, msg in reader.events():
+                last = seconds
+                if msg.type == "note_on" and msg.velocity > 0:
+                    held.setdefault((msg.channel, msg.note), []).append(seconds)
+                elif msg.type in ("note_on", "note_off"):
+                    starts = held.get((msg.channel, msg.note))
+                    if starts:
+                        spans.append((starts.pop(0), seconds, msg.note))
+        finally:
+            reader.close()
+        # Anything never released runs to the end of the file
+        for (channel, note), starts in held.items():
+            for start in starts:
+                spans.append((start, last, note))
+        spans.sort()
+
+        for start, end, note in spans:
+            self.starts.append(start)
+            self.ends.append(max(end, start))
+            self.notes.append(note)
+
+        # Each note is listed in every bucket its span touches; arrays keep
+        # tens of thousands of notes compact
+        n_buckets = int(last / self.bucket) + 2 if spans else 1
+        self.buckets = [array("I") for _ in range(n_buckets)]
+        for i in range(len(self.starts)):
+            b0 = int(self.starts[i] / self.bucket)
+            b1 = int(self.ends[i] / self.bucket)
+            for b in range(b0, b1 + 1):
+                self.buckets[b].append(i)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def query(self, t0, t1):
+        """Yield indices of notes overlapping [t0, t1], each exactly once."""
+        if not self.buckets or t1 < 0:
+            return
+        first = max(0, int(t0 / self.bucket))
+        last = min(len(self.buckets) - 1, int(t1 / self.bucket))
+        starts, ends, size = self.starts, self.ends, self.bucket
+        for b in range(first, last + 1):
+            for i in self.buckets[b]:
+                # Emit from the first queried bucket the note appears in
+                if max(first, int(starts[i] / size)) != b:
+                    continue
+                if starts[i] <= t1 and ends[i] >= t0:
+                    yield i
+
+
+class PianoRoll:
+    def __init__(self, path, window=3.0):
+        self.path = path
+        self.window = window  # seconds of upcoming music visible above the keys
+        self.index = None
+        self.error = None
+        self.ready = False
+        self._strips = {}  # (color, width, height) -> solid bar surface, cut down per note
+        # Parsing a dense file can take a moment; don't hold up the render loop
+        self._thread = threading.Thread(target=self._load, daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        try:
+            self.index = NoteIndex(self.path)
+        except Exception as e:
+            self.error = e
+        self.ready = True
+
+    def draw(self, surf, now, key_rects, color_for, top, bottom):
+        """Draw bars for notes in [now, now + window] falling onto the keys at `bottom`."""
+        if self.index is None:
+            return 0
+        height = bottom - top
+        scale = height / self.window
+        index = self.index
+
+        # Every bar is a piece of a cached full-height strip in its note's
+        # color, so the whole roll goes out in a single blits() call
+        blits = []
+        strips = self._strips
+        for i in index.query(now, now + self.window):
+            note = index.notes[i]
+            key = key_rects.get(note)
+            if key is None:
+                continue  # outside the on-screen keyboard
+            y_start = bottom - (index.starts[i] - now) * scale
+            y_end = bottom - (index.ends[i] - now) * scale
+            y0 = max(top, int(y_end))
+            y1 = min(bottom, int(y_start))
+            if y1 - y0 < 2:
+                y0 = y1 - 2
+            width = key.width - 4
+            color = color_for(note)
+            strip = strips.get((color, width, height))
+            if strip is None:
+                strip = strips[(color, width, height)] = pygame.Surface((width, max(2, height)))
+                strip.fill(color)
+            blits.append((strip, (key.x + 2, y0), (0, 0, width, y1 - y0)))
+
+        surf.blits(blits, doreturn=False)
+        return len(blits)
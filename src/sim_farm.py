@@ -0,0 +1,268 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import time
+from collections import defaultdict
+
+# Headless: must be set before pygame/game modules load (also in pool workers)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# Leave SIGINT/SIGTERM alone so Pool.terminate() and Ctrl-C still stop workers
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import pygame
+
+from bots import BOTS
+from global_vars import FPS
+
+# -----------------------------
+# Headless simulation farm (difficulty tuning)
+# -----------------------------
+# Plays thousands of games with simple bots across a process pool and
+# aggregates them into survival curves and score distributions per parameter
+# setting. Games run on a fixed timestep with no display or sleeping, so a
+# minute of play costs a few ms. Every episode is one JSON line, written as it
+# finishes; --resume skips episodes already in the file.
+#
+# Episode i uses seed --seed + i for every parameter setting (common random
+# numbers), so settings are compared on the same asteroid fields / food spots.
+#
+#   python sim_farm.py asteroids -p wave_base=2,3,4 -p shot_interval=0.12,0.18 -n 500 -o ast.jsonl
+#   python sim_farm.py snake -p move_interval=0.08,0.1,0.13 --summary snake.json
+#   python sim_farm.py summarize ast.jsonl
+#
+# Run from src/ (the games load their music relative to it).
+#
+# Only the workers initialize pygame, and they're spawned rather than forked:
+# forking a parent whose SDL audio thread is running can leave a child stuck
+# on a lock that thread held.
+
+TUNABLES = {
+    "asteroids": ("wave_base", "shot_interval"),
+    "snake": ("move_interval",),
+    "pong": ("ball_speed", "paddle_speed", "paddle_h"),
+}
+CURVE_POINTS = 20
+HIST_BINS = 10
+
+
+# ---------- Episodes (run in pool workers) ----------
+
+_games = {}  # one instance per game per worker, reused between episodes
+_classes = {}  # filled in by _init_worker
+
+
+def _game(name):
+    game = _games.get(name)
+    if game is None:
+        game = _games[name] = _classes[name]()
+    return game
+
+
+def _start(name, game, params, seed):
+    game._rng.seed(seed)
+    for key, value in params.items():
+        setattr(game, key, value)
+    if name == "asteroids":
+        game.new_game()
+    else:
+        game.reset()
+
+
+def _score(name, game, state):
+    if name == "asteroids":
+        return game.score, {"level": game.level, "lives": game.lives}
+    if name == "snake":
+        return game.score, {"length": len(game.snake)}
+    winner = None if game.alive else (1 if game.score[0] else 2)
+    return state.get("returns", 0), {"winner": winner}
+
+
+def _init_worker():
+    # The games print on every reset; thousands of those would bury the progress lines
+    sys.stdout = open(os.devnull, "w")
+    pygame.init()
+    pygame.mixer.init()
+    # The game modules build sounds at import, so they need the mixer first
+    from game_asteroids import AsteroidsGame
+    from game_snake import SnakeGame
+    from game_pong import PongGame
+    _classes.update(asteroids=AsteroidsGame, snake=SnakeGame, pong=PongGame)
+
+
+def run_episode(task):
+    name, params, seed, max_seconds, fps = task
+    game = _game(name)
+    _start(name, game, params, seed)
+    bot, rng, state = BOTS[name], random.Random(seed ^ 0x5EED), {}
+    dt = 1.0 / fps
+    frames, limit = 0, int(max_seconds * fps)
+    while game.alive and frames < limit:
+        keys = bot(game, rng, dt, state)
+        if keys is None:
+            game.update(dt)
+        else:
+            game.update(dt, keys)
+        frames += 1
+    score, extra = _score(name, game, state)
+    return dict(game=name, params=params, seed=seed, survived=round(frames * dt, 4),
+                censored=game.alive, score=score, **extra)
+
+
+# ---------- Aggregation ----------
+
+def _quantile(values, q):
+    i = (len(values) - 1) * q
+    lo = int(i)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (i - lo)
+
+
+def summarize(records, max_seconds=None):
+    """Per parameter setting: survival curve S(t), median survival and score distribution."""
+    groups = defaultdict(list)
+    for r in records:
+        groups[json.dumps(r["params"], sort_keys=True)].append(r)
+    horizon = max_seconds or max(r["survived"] for r in records)
+    out = []
+    for key in sorted(groups):
+        rows = groups[key]
+        n = len(rows)
+        survived = sorted(r["survived"] for r in rows)
+        scores = sorted(r["score"] for r in rows)
+        curve = []
+        for i in range(CURVE_POINTS + 1):
+            t = horizon * i / CURVE_POINTS
+            alive = n - sum(1 for s in survived if s < t)  # censored runs count as alive to the end
+            curve.append((round(t, 3), round(alive / n, 4)))
+        lo, hi = scores[0], scores[-1]
+        width = (hi - lo) / HIST_BINS or 1
+        counts = [0] * HIST_BINS
+        for s in scores:
+            counts[min(HIST_BINS - 1, int((s - lo) / width))] += 1
+        out.append({
+            "params": json.loads(key),
+            "episodes": n,
+            "censored": sum(1 for r in rows if r["censored"]),
+            "median_survival": round(_quantile(survived, 0.5), 3),
+            "survival": curve,
+            "score": {
+                "mean": round(sum(scores) / n, 3),
+                "p10": _quantile(scores, 0.1), "p50": _quantile(scores, 0.5), "p90": _quantile(scores, 0.9),
+                "hist": {"edges": [round(lo + width * i, 3) for i in range(HIST_BINS + 1)], "counts": counts},
+            },
+        })
+    return out
+
+
+def print_summary(game, summary):
+    print(f"\n{game}: {sum(s['episodes'] for s in summary)} episodes")
+    print(f"{'params':<40} {'n':>6} {'median s':>9} {'S(end)':>7} {'score p10/p50/p90':>20} {'mean':>8}")
+    for s in summary:
+        params = " ".join(f"{k}={v}" for k, v in s["params"].items()) or "(defaults)"
+        sc = s["score"]
+        print(f"{params:<40} {s['episodes']:>6} {s['median_survival']:>9.1f} {s['survival'][-1][1]:>7.2f} "
+              f"{sc['p10']:>6.0f}/{sc['p50']:>6.0f}/{sc['p90']:>6.0f} {sc['mean']:>8.1f}")
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ---------- CLI ----------
+
+def parse_param(game, spec):
+    name, _, values = spec.partition("=")
+    if name not in TUNABLES[game] or not values:
+        raise argparse.ArgumentTypeError(
+            f"expected NAME=v1,v2,... with NAME one of {', '.join(TUNABLES[game])}")
+    try:
+        return name, [float(v) if any(c in v for c in ".eE") else int(v) for v in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{name}: values must be numbers")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["summarize"]:
+        p = argparse.ArgumentParser(prog="sim_farm.py summarize")
+        p.add_argument("results", help="JSONL written by a previous run")
+        p.add_argument("--summary", help="write the aggregate as JSON to this path")
+        args = p.parse_args(argv[1:])
+        records = read_records(args.results)
+        if not records:
+            print("No episodes in", args.results)
+            return 1
+        summary = summarize(records)
+        print_summary(records[0]["game"], summary)
+        if args.summary:
+            with open(args.summary, "w") as f:
+                json.dump({"game": records[0]["game"], "configs": summary}, f, indent=2)
+        return 0
+
+    p = argparse.ArgumentParser(description="Headless bot games for difficulty tuning")
+    p.add_argument("game", choices=sorted(TUNABLES))
+    p.add_argument("-p", "--param", action="append", default=[],
+                   help="NAME=v1,v2,... (repeatable; the sweep is every combination)")
+    p.add_argument("-n", "--episodes", type=int, default=200, help="episodes per setting (default 200)")
+    p.add_argument("--seed", type=int, default=1, help="seed of episode 0 (default 1)")
+    p.add_argument("--max-seconds", type=float, default=300.0, help="cut episodes off after this much game time")
+    p.add_argument("--fps", type=int, default=FPS, help=f"simulation rate (default {FPS})")
+    p.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="processes (default: all cores)")
+    p.add_argument("-o", "--out", default=None, help="episode JSONL (default <game>-farm.jsonl)")
+    p.add_argument("--resume", action="store_true", help="keep --out and only run missing episodes")
+    p.add_argument("--summary", help="write the aggregate as JSON to this path")
+    args = p.parse_args(argv)
+
+    try:
+        sweep = [parse_param(args.game, spec) for spec in args.param]
+    except argparse.ArgumentTypeError as e:
+        p.error(str(e))
+    names = [name for name, _ in sweep]
+    settings = [dict(zip(names, values)) for values in itertools.product(*(v for _, v in sweep))]
+    out_path = args.out or f"{args.game}-farm.jsonl"
+
+    done = set()
+    if args.resume and os.path.exists(out_path):
+        for r in read_records(out_path):
+            done.add((json.dumps(r["params"], sort_keys=True), r["seed"]))
+    tasks = [(args.game, params, args.seed + i, args.max_seconds, args.fps)
+             for params in settings for i in range(args.episodes)
+             if (json.dumps(params, sort_keys=True), args.seed + i) not in done]
+
+    workers = max(1, args.workers or 1)
+    chunk = max(1, len(tasks) // (workers * 16))  # big enough to amortize IPC, small enough to balance
+    print(f"🎮 {len(tasks)} {args.game} episodes ({len(settings)} settings) on {workers} processes")
+    start = time.perf_counter()
+    # Exit through the with-blocks on SIGTERM too, so the pool takes its workers down with it
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    ctx = multiprocessing.get_context("spawn")
+    with open(out_path, "a" if args.resume else "w") as out, ctx.Pool(workers, _init_worker) as pool:
+        for count, record in enumerate(pool.imap_unordered(run_episode, tasks, chunksize=chunk), 1):
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+            if count % 500 == 0:
+                out.flush()
+                rate = count / (time.perf_counter() - start)
+                print(f"  {count}/{len(tasks)} ({rate:.0f} episodes/s)")
+    elapsed = time.perf_counter() - start
+    print(f"Done in {elapsed:.1f}s -> {out_path}")
+
+    records = [r for r in read_records(out_path) if r["game"] == args.game]
+    if not records:
+        return 0
+    summary = summarize(records, args.max_seconds)
+    print_summary(args.game, summary)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump({"game": args.game, "max_seconds": args.max_seconds, "configs": summary}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+from collections import deque
+
+
+def _pick(data, p):
+    # Nearest-rank percentile over already sorted data
+    return data[min(len(data) - 1, max(0, int(round(p / 100.0 * (len(data) - 1)))))]
+
+
+# -----------------------------
+# Tiny latency/jitter bookkeeping (no pygame, safe to use from any thread)
+# -----------------------------
+class LatencyStats:
+    def __init__(self, window=4096):
+        # Rolling window of samples in seconds; deque.append is atomic so
+        # producers on other threads don't need a lock.
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def clear(self):
+        self.samples.clear()
+        self.count = 0
+
+    def percentile(self, p):
+        data = sorted(self.samples)
+        return _pick(data, p) if data else 0.0
+
+    def summary(self):
+        """Percentiles in milliseconds over the current window."""
+        data = sorted(self.samples)
+        if not data:
+            return {"count": self.count, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "count": self.count,
+            "p50": _pick(data, 50) * 1000.0,
+            "p95": _pick(data, 95) * 1000.0,
+            "p99": _pick(data, 99) * 1000.0,
+            "max": data[-1] * 1000.0,
+        }
+
+    def format(self, label):
+        s = self.summary()
+        return (f"{label}: n={s['count']} p50={s['p50']:.2f}ms p95={s['p95']:.2f}ms "
+                f"p99={s['p99']:.2f}ms max={s['max']:.2f}ms")
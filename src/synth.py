@@ -0,0 +1,252 @@
+import math
+import threading
+import time
+from array import array
+import pygame
+from global_vars import MIXER_FREQ, MIXER_BUFFER
+
+# -----------------------------
+# Built-in software synth (fallback when no FluidSynth is running)
+# -----------------------------
+# Quacks like a mido output port (send/close), so PianoMidiGame can use it
+# as self.midi_output and every _send_* helper keeps working unchanged.
+
+TABLE_SIZE = 2048
+TABLE_MASK = TABLE_SIZE - 1
+MAX_VOICES = 16
+BEND_RANGE = 2.0  # semitones
+
+_reserved_channels = 0  # mixer channels 0..n-1 belong to synths, Sound.play() skips them
+
+
+def _additive_table(partials):
+    """Build one cycle of a waveform from (harmonic, amplitude) pairs, normalized to -1..1."""
+    table = [0.0] * TABLE_SIZE
+    for harmonic, amp in partials:
+        step = 2.0 * math.pi * harmonic / TABLE_SIZE
+        for i in range(TABLE_SIZE):
+            table[i] += amp * math.sin(i * step)
+    peak = max(abs(s) for s in table) or 1.0
+    return [s / peak for s in table]
+
+
+# Band-limited so the higher keys don't alias into mush
+WAVETABLES = {
+    "sine": _additive_table([(1, 1.0)]),
+    "square": _additive_table([(h, 1.0 / h) for h in range(1, 16, 2)]),
+    "saw": _additive_table([(h, 1.0 / h) for h in range(1, 16)]),
+    "organ": _additive_table([(1, 1.0), (2, 0.6), (3, 0.4), (4, 0.25), (6, 0.15), (8, 0.1)]),
+    "piano": _additive_table([(1, 1.0), (2, 0.45), (3, 0.25), (4, 0.12), (5, 0.06)]),
+}
+
+# (wavetable, attack, decay, sustain level, release) per timbre -- times in seconds
+TIMBRES = {
+    "piano": ("piano", 0.005, 0.9, 0.25, 0.25),
+    "bell": ("sine", 0.002, 1.2, 0.0, 0.6),
+    "organ": ("organ", 0.01, 0.05, 0.9, 0.08),
+    "strings": ("saw", 0.12, 0.3, 0.8, 0.35),
+    "lead": ("square", 0.01, 0.1, 0.75, 0.12),
+    "pad": ("saw", 0.4, 0.5, 0.7, 0.8),
+}
+
+
+def timbre_for_program(program):
+    # Coarse General MIDI families -> the handful of voices we actually have
+    family = program // 8
+    if family in (0, 3, 4):        # pianos, guitars, basses
+        return "piano"
+    if family == 1:                # chromatic percussion
+        return "bell"
+    if family == 2:                # organs
+        return "organ"
+    if family in (5, 6, 11):       # strings, ensembles, pads
+        return "pad" if family == 11 else "strings"
+    return "lead"                  # brass, reeds, pipes, synth leads, fx...
+
+
+class _Voice:
+    __slots__ = ("note", "channel", "table", "step", "phase", "velocity",
+                 "attack", "decay", "sustain", "release", "age", "level", "held", "released",
+                 "release_from", "age_at_release")
+
+    def __init__(self, note, channel, velocity, timbre, sample_rate=MIXER_FREQ):
+        table_name, attack, decay, sustain, release = TIMBRES[timbre]
+        self.note = note
+        self.channel = channel
+        self.table = WAVETABLES[table_name]
+        freq = 440.0 * 2 ** ((note - 69) / 12.0)
+        self.step = freq * TABLE_SIZE / sample_rate
+        self.phase = 0.0
+        self.velocity = velocity / 127.0
+        self.attack, self.decay, self.sustain, self.release = attack, decay, sustain, release
+        self.age = 0.0
+        self.level = 0.0
+        self.held = True
+        self.released = False
+        self.release_from = 0.0
+        self.age_at_release = 0.0
+
+    def envelope(self, t):
+        # ADSR while held; linear fade from wherever we were once released
+        if self.released:
+            if self.release <= 0:
+                return 0.0
+            return max(0.0, self.release_from * (1.0 - (t - self.age_at_release) / self.release))
+        if t < self.attack:
+            return t / self.attack
+        t -= self.attack
+        if t < self.decay:
+            return 1.0 - (1.0 - self.sustain) * (t / self.decay)
+        return self.sustain
+
+    def note_off(self):
+        # Only lifts the gate; the release starts at the next block edge, from
+        # the level the attack has reached by then (so a note released before
+        # its first block still sounds instead of fading out from zero)
+        self.held = False
+
+    def advance(self, dt):
+        self.age += dt
+        level = self.envelope(self.age)
+        if not self.held and not self.released:
+            self.released = True
+            self.release_from = level
+            self.age_at_release = self.age
+        self.level = level
+        return level
+
+    @property
+    def finished(self):
+        return self.level <= 0.0 and (self.released or (self.sustain <= 0.0 and self.age > self.attack))
+
+
+class SoftSynth:
+    def __init__(self, gain=0.3):
+        init = pygame.mixer.get_init()
+        if init is None:
+            raise RuntimeError("pygame.mixer is not initialized")
+        freq, size, channels = init
+        if abs(size) != 16:
+            raise RuntimeError(f"unsupported mixer sample size {size}")
+        self.name = "GOOBCUBE SoftSynth"
+        self.sample_rate = freq
+        self.out_channels = channels
+        self.gain = gain
+        # Block == mixer buffer, so at most one playing + one queued block of latency
+        self.block = MIXER_BUFFER
+        self.block_time = self.block / float(freq)
+
+        self.programs = [80] * 16
+        self.bend = [1.0] * 16
+        self.voices = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+        # Grab our own mixer channel so sound effects can't steal it. SDL_mixer
+        # reserves the lowest channels, so take the next one from the bottom and
+        # add a channel to make up for it.
+        global _reserved_channels
+        n = _reserved_channels
+        _reserved_channels += 1
+        pygame.mixer.set_num_channels(pygame.mixer.get_num_channels() + 1)
+        pygame.mixer.set_reserved(_reserved_channels)
+        self.channel = pygame.mixer.Channel(n)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._stream, daemon=True)
+        self._thread.start()
+
+    # ---------- mido port interface ----------
+
+    def send(self, msg):
+        channel = getattr(msg, "channel", 0)
+        with self._lock:
+            if msg.type == "note_on" and msg.velocity > 0:
+                self._note_on(msg.note, msg.velocity, channel)
+            elif msg.type == "note_off" or msg.type == "note_on":
+                for v in self.voices:
+                    if v.note == msg.note and v.channel == channel:
+                        v.note_off()
+            elif msg.type == "program_change":
+                self.programs[channel] = msg.program
+            elif msg.type == "pitchwheel":
+                self.bend[channel] = 2 ** ((msg.pitch / 8192.0) * BEND_RANGE / 12.0)
+            elif msg.type == "control_change" and msg.control in (120, 123):
+                # All sound off / all notes off
+                for v in self.voices:
+                    if v.channel == channel:
+                        v.note_off()
+        self._wake.set()
+
+    def close(self):
+        self._running = False
+        self._wake.set()
+        try:
+            self.channel.stop()
+        except Exception:
+            pass
+
+    # ---------- Voices ----------
+
+    def _note_on(self, note, velocity, channel):
+        for v in self.voices:
+            if v.note == note and v.channel == channel:
+                v.note_off()
+        if len(self.voices) >= MAX_VOICES:
+            # Steal the oldest voice, preferring ones already releasing
+            victim = min(self.voices, key=lambda v: (v.held, -v.age))
+            self.voices.remove(victim)
+        timbre = timbre_for_program(self.programs[channel])
+        self.voices.append(_Voice(note, channel, velocity, timbre, self.sample_rate))
+
+    # ---------- Streaming ----------
+
+    def _stream(self):
+        while self._running:
+            with self._lock:
+                idle = not self.voices
+            if idle:
+                # Nothing sounding: sleep until the next message instead of pumping silence
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            if self.channel.get_queue() is None:
+                sound = pygame.mixer.Sound(buffer=self._render_block())
+                if self.channel.get_busy():
+                    self.channel.queue(sound)
+                else:
+                    self.channel.play(sound)
+            else:
+                time.sleep(self.block_time / 4)
+
+    def _render_block(self):
+        n = self.block
+        mix = [0.0] * n
+        dt = self.block_time
+        # Under the lock only advance envelopes and snapshot what the block
+        # needs; the per-sample loop runs unlocked so send() never waits on it
+        with self._lock:
+            work = []
+            for v in self.voices:
+                # Envelope is evaluated at block edges and ramped linearly in between
+                start = v.level
+                end = v.advance(dt)
+                gain = v.velocity * self.gain
+                work.append((v, v.table, v.phase, v.step * self.bend[v.channel],
+                             start * gain, (end - start) * gain / n))
+            self.voices = [v for v in self.voices if not v.finished]
+
+        for v, table, phase, step, amp, damp in work:
+            for i in range(n):
+                mix[i] += table[int(phase) & TABLE_MASK] * amp
+                phase += step
+                amp += damp
+            v.phase = phase % TABLE_SIZE  # only this thread touches phase
+
+        samples = array("h", (int(max(-1.0, min(1.0, s)) * 32767) for s in mix))
+        if self.out_channels > 1:
+            frames = array("h", [0]) * (n * self.out_channels)
+            for c in range(self.out_channels):
+                frames[c::self.out_channels] = samples
+            samples = frames
+        return samples.tobytes()
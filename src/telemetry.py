@@ -0,0 +1,150 @@
+import atexit
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+# -----------------------------
+# Session telemetry
+# -----------------------------
+# emit("death", game="snake", score=12) from anywhere, any thread. The call
+# only appends a tuple to a bounded deque (about a microsecond, never blocks,
+# never touches disk); when the deque is full, events are counted and dropped.
+# A background thread wakes once a second, turns the backlog into JSON lines
+# and appends them to a gzip file, rotating to a new file past max_bytes
+# (compressed) and keeping the newest `keep` files. Each flush is a gzip sync
+# point, so a kiosk that loses power keeps everything up to the last second.
+#
+# Off unless started: goobcube.py --telemetry (or GOOBCUBE_TELEMETRY=1).
+# Files: ../telemetry/telemetry-<start time>-<n>.jsonl.gz, one JSON object per
+# line: {"t": unix time, "kind": ..., "session": ..., **fields}.
+
+TELEMETRY_DIR = os.environ.get("GOOBCUBE_TELEMETRY_DIR", "../telemetry")
+CAPACITY = 16384
+FLUSH_INTERVAL = 1.0
+MAX_BYTES = 1 << 20
+KEEP_FILES = 50
+
+
+class Telemetry:
+    def __init__(self, directory=TELEMETRY_DIR, capacity=CAPACITY, max_bytes=MAX_BYTES,
+                 keep=KEEP_FILES, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.flush_interval = flush_interval
+        self.session = uuid.uuid4().hex[:12]
+        self.dropped = 0
+        self._queue = deque()
+        self._prefix = time.strftime("telemetry-%Y%m%d-%H%M%S")
+        self._part = 0
+        self._raw = self._gz = None
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def emit(self, kind, fields):
+        # Hot path: one length check and one append (deque.append is atomic)
+        if len(self._queue) >= self.capacity:
+            self.dropped += 1
+            return
+        self._queue.append((time.time(), kind, fields))
+
+    # ---------- Writer thread ----------
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+
+    def _flush(self):
+        queue = self._queue
+        lines = []
+        session = self.session
+        while True:
+            try:
+                t, kind, fields = queue.popleft()
+            except IndexError:
+                break
+            record = {"t": round(t, 3), "kind": kind, "session": session}
+            record.update(fields)
+            lines.append(json.dumps(record, separators=(",", ":"), default=str))
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            lines.append(json.dumps({"t": round(time.time(), 3), "kind": "telemetry_dropped",
+                                     "session": session, "count": dropped}))
+        if not lines:
+            return
+        try:
+            if self._gz is None:
+                self._open()
+            self._gz.write(("\n".join(lines) + "\n").encode())
+            self._gz.flush()  # sync point: readable up to here even if we die
+            if self._raw.tell() >= self.max_bytes:
+                self._close_file()
+                self._prune()
+        except OSError as e:
+            print(f"⚠️ Telemetry write failed: {e}")
+            self._close_file()
+
+    def _open(self):
+        self._part += 1
+        path = os.path.join(self.directory, f"{self._prefix}-{self._part:03d}.jsonl.gz")
+        self._raw = open(path, "ab")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="ab", compresslevel=6)
+
+    def _close_file(self):
+        try:
+            if self._gz is not None:
+                self._gz.close()
+            if self._raw is not None:
+                self._raw.close()
+        except OSError:
+            pass
+        self._gz = self._raw = None
+
+    def _prune(self):
+        files = sorted(glob.glob(os.path.join(self.directory, "telemetry-*.jsonl.gz")))
+        for path in files[:-self.keep]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._flush()
+        self._close_file()
+
+
+_sink = None
+
+
+def start(directory=TELEMETRY_DIR, **options):
+    global _sink
+    if _sink is None:
+        _sink = Telemetry(directory, **options)
+        atexit.register(_sink.close)
+    return _sink
+
+
+def emit(kind, **fields):
+    """Record an event; a no-op until start() is called."""
+    sink = _sink
+    if sink is not None:
+        sink.emit(kind, fields)
+
+
+def stop():
+    global _sink
+    if _sink is not None:
+        _sink.close()
+        _sink = None
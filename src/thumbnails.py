@@ -0,0 +1,154 @@
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+import pygame
+
+from global_vars import WIDTH, HEIGHT, FPS
+from bots import BotKeys
+
+# -----------------------------
+# Live menu thumbnails
+# -----------------------------
+# Each menu card shows a miniature of its game: the game's own draw() into a
+# full-size scratch surface, smoothscaled into the card. Refreshing one costs
+# about as much as a frame of that game, so the menu refreshes at most one per
+# frame, round-robin, and each at most every THUMB_INTERVAL seconds. A refresh
+# that takes longer than THUMB_BUDGET_MS doubles that thumbnail's interval (up
+# to MAX_INTERVAL); cheap ones drift back.
+#
+# The games you play aren't touched: a thumbnail is either a Demo (its own
+# instance of the game, played by a bot from bots.py) or anything else with a
+# draw(surf), like the piano. Demos only advance when their thumbnail is
+# refreshed, in fixed 1/FPS steps, with sound, music, telemetry and the
+# keyboard switched off for the duration (see _muted).
+
+THUMB_INTERVAL = 0.25
+MAX_INTERVAL = 2.0
+THUMB_BUDGET_MS = 4.0
+
+
+class _Silent:
+    def play(self, *args, **kwargs):
+        return None
+
+
+def _nothing(*args, **kwargs):
+    return None
+
+
+_missing = object()
+
+
+@contextmanager
+def _muted(module):
+    """Switch off what a game's update()/reset() can reach: beeps, music, telemetry, prints, keys."""
+    # Same trick as alloc_track.py / input_latency.py: the games use these
+    # through module globals, so swap them there and put them back afterwards
+    swaps = [(module, "WALL_BEEP", _Silent()), (module, "emit", _nothing),
+             (module, "load_music", _nothing), (module, "print", _nothing),
+             (pygame.mixer.music, "play", _nothing), (pygame.mixer.music, "stop", _nothing),
+             (pygame.key, "get_pressed", lambda: BotKeys())]
+    saved = []
+    for owner, name, value in swaps:
+        saved.append((owner, name, owner.__dict__.get(name, _missing)))
+        setattr(owner, name, value)
+    try:
+        yield
+    finally:
+        for owner, name, value in saved:
+            if value is _missing:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, value)
+
+
+class Demo:
+    """A thumbnail-only instance of a game, played by a bot."""
+
+    def __init__(self, game_class, bot=None):
+        self.game_class = game_class
+        self.bot = bot  # bots.py signature; None just lets update(dt) run
+        self.game = None
+        self.rng = random.Random()
+        self.state = {}
+        self._module = sys.modules[game_class.__module__]
+
+    def _restart(self):
+        # Fresh game; also makes sure draw() never sees one that was never reset
+        self.state = {}
+        game = self.game
+        game.new_game() if hasattr(game, "new_game") else game.reset()
+
+    def step(self, seconds):
+        with _muted(self._module):
+            if self.game is None:
+                self.game = self.game_class()
+                self._restart()
+            dt = 1.0 / FPS
+            for _ in range(max(1, int(seconds * FPS))):
+                keys = self.bot(self.game, self.rng, dt, self.state) if self.bot is not None else None
+                if keys is None:
+                    self.game.update(dt)
+                else:
+                    self.game.update(dt, keys)
+                if not getattr(self.game, "alive", True):
+                    self._restart()
+
+    def draw(self, surf):
+        self.game.draw(surf)
+
+
+class Thumbnails:
+    def __init__(self, sources, size):
+        self.names = list(sources)
+        self.sources = sources                   # game name -> Demo or object with draw(surf)
+        self.size = size
+        n = len(self.names)
+        self.images = {}                         # game name -> latest thumbnail
+        self.intervals = [THUMB_INTERVAL] * n
+        self._due = [0.0] * n
+        self._last = [None] * n                  # when each was last refreshed
+        self._next = 0
+        self._canvas = None                      # full-size scratch, made on first use
+
+    def get(self, name):
+        return self.images.get(name)
+
+    def update(self, now=None):
+        """Refresh the next thumbnail that's due, if any; returns its name."""
+        if now is None:
+            now = time.perf_counter()
+        n = len(self.names)
+        for step in range(n):
+            i = (self._next + step) % n
+            if now >= self._due[i]:
+                self._next = (i + 1) % n
+                self._refresh(i, now)
+                return self.names[i]
+        return None
+
+    def _refresh(self, i, now):
+        start = time.perf_counter()
+        name = self.names[i]
+        source = self.sources[name]
+        if isinstance(source, Demo):
+            # Catch up on the time since the last refresh, but not on a long absence
+            last = self._last[i]
+            source.step(THUMB_INTERVAL if last is None else min(now - last, MAX_INTERVAL))
+        self._last[i] = now
+        if self._canvas is None:
+            self._canvas = pygame.Surface((WIDTH, HEIGHT))
+        image = self.images.get(name)
+        if image is None:
+            image = self.images[name] = pygame.Surface(self.size)
+        source.draw(self._canvas)
+        pygame.transform.smoothscale(self._canvas, self.size, image)
+
+        ms = (time.perf_counter() - start) * 1000.0
+        if ms > THUMB_BUDGET_MS:
+            self.intervals[i] = min(MAX_INTERVAL, self.intervals[i] * 2)
+        else:
+            self.intervals[i] = max(THUMB_INTERVAL, self.intervals[i] * 0.9)
+        self._due[i] = now + self.intervals[i]
@@ -1,7 +1,9 @@
 import pygame
 import math
+import time
 from global_vars import MIXER_FREQ
 from array import array
+from telemetry import emit
 
 # -----------------------------
 # Helpers
@@ -37,5 +39,11 @@ def draw_shadowed_text(surface, text, font, color, pos, shadow_offset=(2,2), sha
     img = font.render(text, True, color)
     surface.blit(img, pos)
 
+def load_music(path):
+    """pygame.mixer.music.load, timed for telemetry (decoding the start of an mp3 isn't free)."""
+    start = time.perf_counter()
+    pygame.mixer.music.load(path)
+    emit("music_load", path=path, ms=round((time.perf_counter() - start) * 1000.0, 2))
+
 # Sounds
 WALL_BEEP = make_beep_sound(freq=880, duration=0.06, volume=0.35)
@@ -0,0 +1,153 @@
+import math
+from functools import lru_cache
+
+import pygame
+
+# -----------------------------
+# Wireframe 3D
+# -----------------------------
+# Small convex meshes drawn as lines: the boot cube and the menu icons.
+# Per frame: rotation() builds one 3x3 matrix (six trig calls, not nine per
+# vertex), project() transforms and projects every vertex in one pass, and
+# draw() sorts the edges back to front so near edges are drawn over far ones.
+# With cull=True, edges whose faces all face away from the viewer are skipped
+# (hidden lines on a convex mesh). Meshes are built once and cached (box(),
+# octahedron(), ...), including the face normals and edge->face lookup.
+#
+# Coordinates: x right, y down (like the screen), z into the screen; the
+# viewer sits at z = -dist looking at the origin.
+
+
+class Mesh:
+    def __init__(self, vertices, edges=None, faces=()):
+        self.vertices = tuple(tuple(float(c) for c in v) for v in vertices)
+        self.faces = tuple(self._outward(f) for f in faces)
+        if edges is None:
+            edges = {tuple(sorted((f[i], f[(i + 1) % len(f)]))) for f in self.faces for i in range(len(f))}
+            edges = sorted(edges)
+        self.edges = tuple(edges)
+        # edge -> faces it borders; an edge without faces is always drawn
+        border = {edge: [] for edge in self.edges}
+        for n, face in enumerate(self.faces):
+            for i in range(len(face)):
+                key = tuple(sorted((face[i], face[(i + 1) % len(face)])))
+                if key in border:
+                    border[key].append(n)
+        self.edge_faces = tuple(tuple(border[edge]) for edge in self.edges)
+        self.radius = max(math.sqrt(x * x + y * y + z * z) for x, y, z in self.vertices)
+
+    def _outward(self, face):
+        # Wind each face so its normal points away from the centre (meshes are
+        # convex and centred on the origin); front-facing is then one sign test.
+        a, b, c = (self.vertices[i] for i in face[:3])
+        ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+        vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+        normal = (uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx)
+        centre = [sum(self.vertices[i][k] for i in face) for k in range(3)]
+        if sum(n * c for n, c in zip(normal, centre)) < 0:
+            return tuple(reversed(face))
+        return tuple(face)
+
+
+# ---------- Cached meshes ----------
+
+BOX_FACES = ((0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 5, 4), (2, 3, 7, 6), (1, 2, 6, 5), (0, 3, 7, 4))
+
+
+@lru_cache(maxsize=None)
+def box(w, h, d):
+    hw, hh, hd = w / 2, h / 2, d / 2
+    vertices = [
+        (-hw, -hh, -hd), (hw, -hh, -hd), (hw, hh, -hd), (-hw, hh, -hd),
+        (-hw, -hh, hd), (hw, -hh, hd), (hw, hh, hd), (-hw, hh, hd),
+    ]
+    return Mesh(vertices, faces=BOX_FACES)
+
+
+def cube(size):
+    return box(size, size, size)
+
+
+@lru_cache(maxsize=None)
+def octahedron(size):
+    r = size / 2
+    vertices = [(r, 0, 0), (-r, 0, 0), (0, r, 0), (0, -r, 0), (0, 0, r), (0, 0, -r)]
+    faces = [(x, y, z) for x in (0, 1) for y in (2, 3) for z in (4, 5)]
+    return Mesh(vertices, faces=faces)
+
+
+@lru_cache(maxsize=None)
+def tetrahedron(size):
+    r = size / 2 / math.sqrt(3)
+    vertices = [(r, r, r), (r, -r, -r), (-r, r, -r), (-r, -r, r)]
+    return Mesh(vertices, faces=[(0, 1, 2), (0, 1, 3), (0, 2, 3), (1, 2, 3)])
+
+
+# ---------- Per frame ----------
+
+def rotation(ax, ay, az):
+    """Rz @ Ry @ Rx as row tuples: rotate about X, then Y, then Z."""
+    sx, cx = math.sin(ax), math.cos(ax)
+    sy, cy = math.sin(ay), math.cos(ay)
+    sz, cz = math.sin(az), math.cos(az)
+    return (
+        (cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx),
+        (sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx),
+        (-sy, cy * sx, cy * cx),
+    )
+
+
+def project(mesh, matrix, center, dist):
+    """Screen points and view-space depths for every vertex, in one pass."""
+    (a, b, c), (d, e, f), (g, h, i) = matrix
+    cx, cy = center
+    points, depths = [], []
+    for x, y, z in mesh.vertices:
+        rz = g * x + h * y + i * z
+        k = dist / (rz + dist + 1e-5)
+        points.append((cx + (a * x + b * y + c * z) * k, cy + (d * x + e * y + f * z) * k))
+        depths.append(rz)
+    return points, depths
+
+
+def front_faces(mesh, points):
+    """Which faces point at the viewer, from the winding of their projection."""
+    front = []
+    for face in mesh.faces:
+        area = 0.0
+        x0, y0 = points[face[-1]]
+        for n in face:
+            x1, y1 = points[n]
+            area += x0 * y1 - x1 * y0
+            x0, y0 = x1, y1
+        front.append(area < 0)
+    return front
+
+
+def draw(surf, mesh, matrix, center, color, width=1, dist=None, cull=False, fade=0.0):
+    """Draw `mesh` rotated by `matrix` around screen point `center`.
+
+    dist is the viewer distance (default 3x the mesh radius, like the boot
+    cube); fade in 0..1 darkens edges towards the back, for depth.
+    """
+    if dist is None:
+        dist = 3 * mesh.radius
+    points, depths = project(mesh, matrix, center, dist)
+    front = front_faces(mesh, points) if cull and mesh.faces else None
+
+    visible = []
+    for (i, j), faces in zip(mesh.edges, mesh.edge_faces):
+        if front is not None and faces and not any(front[n] for n in faces):
+            continue
+        visible.append((depths[i] + depths[j], i, j))
+    visible.sort(reverse=True)  # farthest first
+
+    radius = mesh.radius or 1.0
+    for depth, i, j in visible:
+        edge_color = color
+        if fade:
+            # depth/2 runs -radius (nearest) .. +radius (farthest)
+            shade = 1.0 - fade * (depth / 2 + radius) / (2 * radius)
+            edge_color = (int(color[0] * shade), int(color[1] * shade), int(color[2] * shade))
+        pygame.draw.line(surf, edge_color, points[i], points[j], width)
+    return len(visible)
@@ -0,0 +1,423 @@
+import ast
+import hashlib
+import json
+import math
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+
+# -----------------------------
+# GoobCAD model compiler (server side)
+# -----------------------------
+# Evaluates the same model format as 3d.html ({variables, solids}) and writes
+# binary STL or glTF (.glb). Solids are placed exactly like buildGeometry +
+# setPositionAndAxis do in the browser. Output is streamed solid by solid;
+# only the distinct local meshes (by type + evaluated size) are ever held,
+# in a small LRU, so big parametric models don't need the whole mesh in RAM.
+#
+#   python goobcad.py model.json out.stl      (or out.glb)
+
+SEGMENTS = 32   # matches CylinderGeometry(…, 32) / SphereGeometry(r, 32, 16)
+RINGS = 16
+DEFAULT_COLOR = "#93c5fd"
+
+# ===== Expression evaluation (safe) =====
+# Same language as evalExpr in 3d.html: numbers, + - * / **, parentheses,
+# variable names, plus Math.<name> which the browser resolves through `with`.
+
+_MATH = {
+    "PI": math.pi, "E": math.e, "sqrt": math.sqrt, "abs": abs,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "floor": math.floor, "ceil": math.ceil, "round": round,
+}
+_ALLOWED = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+            ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd,
+            ast.Attribute, ast.Call)
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=4096)
+def compile_expr(expr):
+    """Validate once, compile once; cached by source text like compileExpr in 3d.html."""
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError:
+        raise ExpressionError(f"Bad expression: {expr!r}") from None
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED):
+            raise ExpressionError(f"Unsupported syntax in expression: {expr!r}")
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise ExpressionError(f"Only numbers allowed in expression: {expr!r}")
+            node.value = float(node.value)  # JS numbers: 9**9**9 overflows instead of running forever
+        if isinstance(node, ast.Attribute):
+            if not (isinstance(node.value, ast.Name) and node.value.id == "Math" and node.attr in _MATH):
+                raise ExpressionError(f"Unknown attribute in expression: {expr!r}")
+        if isinstance(node, ast.Call) and (node.keywords or not isinstance(node.func, ast.Attribute)):
+            raise ExpressionError(f"Only Math.<fn>(x) calls allowed: {expr!r}")
+    return compile(tree, "<expr>", "eval")
+
+
+class _Math:
+    pass
+
+
+for _name, _value in _MATH.items():
+    setattr(_Math, _name, _value)
+
+
+def numeric(value, scope):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        result = value
+    else:
+        try:
+            result = eval(compile_expr(str(value)), {"__builtins__": {}, "Math": _Math}, scope)
+        except ExpressionError:
+            raise
+        except (NameError, ArithmeticError, TypeError, ValueError) as e:
+            raise ExpressionError(f"{e} in expression: {value!r}") from None
+    if not isinstance(result, (int, float)) or not math.isfinite(result):
+        raise ExpressionError(f"Expression did not resolve to finite number: {value}")
+    return float(result)
+
+
+def variable_scope(variables):
+    # Accept both the 3d.html definition ({min, max, step, value}) and plain numbers
+    return {name: float(spec["value"] if isinstance(spec, dict) else spec)
+            for name, spec in (variables or {}).items()}
+
+
+# ===== Placement =====
+
+Placed = namedtuple("Placed", "id name kind params translation axis color")
+
+
+def size_params(defn, scope):
+    size = defn.get("size") or {}
+    kind = defn.get("type")
+    try:
+        if kind == "box":
+            keys = ("dx", "dy", "dz")
+        elif kind == "sphere":
+            keys = ("radius",)
+        elif kind == "cylinder":
+            keys = ("radiusTop", "radiusBottom", "height")
+        elif kind == "triangular_prism":
+            keys = ("w", "d", "h")
+        else:
+            raise ExpressionError(f"Unknown solid type: {kind}")
+        return tuple(numeric(size[k], scope) for k in keys)
+    except KeyError as e:
+        raise ExpressionError(f"Solid {defn.get('id')!r} is missing size {e}") from None
+
+
+def placed_solids(model):
+    """Every visible leaf solid with its evaluated size and world placement."""
+    scope = variable_scope(model.get("variables"))
+
+    def walk(items, origin, visible):
+        for defn in items:
+            pos = defn.get("position") or {}
+            px = numeric(pos.get("x", 0), scope) + origin[0]
+            py = numeric(pos.get("y", 0), scope) + origin[1]
+            pz = numeric(pos.get("z", 0), scope) + origin[2]
+            shown = visible and bool(defn.get("visible"))
+            if defn.get("type") == "group":
+                yield from walk(defn.get("objects") or [], (px, py, pz), shown)
+                continue
+            if not shown:
+                continue
+            params = size_params(defn, scope)
+            if not local_mesh(defn["type"], params)[0]:
+                continue  # zero-sized: nothing to export
+            if defn["type"] == "box":
+                # Boxes are positioned by their min corner
+                px, py, pz = px + params[0] / 2, py + params[1] / 2, pz + params[2] / 2
+            axis = (defn.get("axis") or "y").lower() if defn["type"] == "cylinder" else "y"
+            yield Placed(defn.get("id"), defn.get("name") or defn.get("id"), defn["type"], params,
+                         (px, py, pz), axis, color_of(defn.get("material") or {}))
+
+    return list(walk(model.get("solids") or [], (0.0, 0.0, 0.0), True))
+
+
+# ===== Colors (glTF wants linear RGB) =====
+
+_NAMED = {
+    "red": "#ff0000", "black": "#000000", "yellow": "#ffff00", "white": "#ffffff",
+    "gray": "#808080", "grey": "#808080", "green": "#008000", "blue": "#0000ff",
+    "orange": "#ffa500", "purple": "#800080", "pink": "#ffc0cb",
+}
+
+
+def color_of(material):
+    if material.get("texture"):
+        return "#b0b0b0"  # textures aren't exported; a neutral stand-in
+    color = str(material.get("color") or DEFAULT_COLOR).lower()
+    color = _NAMED.get(color, color)
+    if len(color) == 4 and color.startswith("#"):
+        color = "#" + "".join(c * 2 for c in color[1:])
+    try:
+        int(color[1:], 16)
+    except ValueError:
+        return DEFAULT_COLOR
+    return color if len(color) == 7 and color.startswith("#") else DEFAULT_COLOR
+
+
+def linear_rgb(color):
+    def channel(c):
+        c /= 255
+        return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+    return [round(channel(int(color[i:i + 2], 16)), 5) for i in (1, 3, 5)]
+
+
+# ===== Tessellation =====
+# Local meshes are centered like the three.js geometries. Triangles are oriented
+# outward against an interior point, so every primitive gets consistent winding.
+
+@lru_cache(maxsize=None)
+def _ring(segments):
+    return [(math.cos(2 * math.pi * j / segments), math.sin(2 * math.pi * j / segments))
+            for j in range(segments + 1)]
+
+
+def _emit(pos, nrm, a, b, c, inside):
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+    length = math.sqrt(nx * nx + ny * ny + nz * nz)
+    if length < 1e-12:
+        return  # degenerate (sphere poles, cone tips, zero sizes)
+    if nx * (a[0] - inside[0]) + ny * (a[1] - inside[1]) + nz * (a[2] - inside[2]) < 0:
+        b, c = c, b
+        nx, ny, nz = -nx, -ny, -nz
+    pos.extend(a)
+    pos.extend(b)
+    pos.extend(c)
+    n = (nx / length, ny / length, nz / length)
+    nrm.extend(n * 3)
+
+
+def _quad(pos, nrm, a, b, c, d, inside):
+    _emit(pos, nrm, a, b, c, inside)
+    _emit(pos, nrm, a, c, d, inside)
+
+
+@lru_cache(maxsize=64)
+def local_mesh(kind, params):
+    """(positions, normals) as flat float arrays, 9 floats per triangle."""
+    pos, nrm = array("f"), array("f")
+    origin = (0.0, 0.0, 0.0)
+    if kind == "box":
+        hx, hy, hz = params[0] / 2, params[1] / 2, params[2] / 2
+        for n in range(3):
+            u, v = (n + 1) % 3, (n + 2) % 3
+            half = (hx, hy, hz)
+            for sign in (-1, 1):
+                corners = []
+                for su, sv in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+                    p = [0.0, 0.0, 0.0]
+                    p[n] = sign * half[n]
+                    p[u] = su * half[u]
+                    p[v] = sv * half[v]
+                    corners.append(tuple(p))
+                _quad(pos, nrm, *corners, origin)
+    elif kind == "sphere":
+        r = params[0]
+        ring = _ring(SEGMENTS)
+        rows = []
+        for i in range(RINGS + 1):
+            theta = math.pi * i / RINGS
+            y, s = r * math.cos(theta), r * math.sin(theta)
+            rows.append([(s * c, y, s * sn) for c, sn in ring])
+        for i in range(RINGS):
+            top, bottom = rows[i], rows[i + 1]
+            for j in range(SEGMENTS):
+                _quad(pos, nrm, top[j], top[j + 1], bottom[j + 1], bottom[j], origin)
+    elif kind == "cylinder":
+        r_top, r_bottom, h = params
+        ring = _ring(SEGMENTS)
+        top = [(r_top * c, h / 2, r_top * s) for c, s in ring]
+        bottom = [(r_bottom * c, -h / 2, r_bottom * s) for c, s in ring]
+        top_center, bottom_center = (0.0, h / 2, 0.0), (0.0, -h / 2, 0.0)
+        for j in range(SEGMENTS):
+            _quad(pos, nrm, top[j], top[j + 1], bottom[j + 1], bottom[j], origin)
+            _emit(pos, nrm, top_center, top[j], top[j + 1], origin)
+            _emit(pos, nrm, bottom_center, bottom[j], bottom[j + 1], origin)
+    elif kind == "triangular_prism":
+        w, d, h = params
+        # Shape in XY, extruded along Z, centered, then rotateX(PI/2): (x, y, z) -> (x, -z, y)
+        shape = ((-w / 2, -d / 2), (w / 2, -d / 2), (-w / 2, d / 2))
+        low = [(x, h / 2, y) for x, y in shape]
+        high = [(x, -h / 2, y) for x, y in shape]
+        inside = (-w / 6, 0.0, -d / 6)
+        _emit(pos, nrm, *low, inside)
+        _emit(pos, nrm, *high, inside)
+        for j in range(3):
+            k = (j + 1) % 3
+            _quad(pos, nrm, low[j], low[k], high[k], high[j], inside)
+    else:
+        raise ExpressionError(f"Unknown solid type: {kind}")
+    return pos, nrm
+
+
+def _bounds(positions):
+    xs, ys, zs = positions[0::3], positions[1::3], positions[2::3]
+    return [min(xs), min(ys), min(zs)], [max(xs), max(ys), max(zs)]
+
+
+# Cylinder axis rotations from setPositionAndAxis: rotation.z or rotation.x = PI/2
+_ROTATE = {
+    "y": None,
+    "x": lambda x, y, z: (-y, x, z),
+    "z": lambda x, y, z: (x, -z, y),
+}
+_QUATERNION = {"x": [0, 0, math.sqrt(0.5), math.sqrt(0.5)], "z": [math.sqrt(0.5), 0, 0, math.sqrt(0.5)]}
+
+
+def world_mesh(placed):
+    pos, nrm = local_mesh(placed.kind, placed.params)
+    rotate = _ROTATE.get(placed.axis)
+    tx, ty, tz = placed.translation
+    out_pos, out_nrm = array("f", pos), array("f", nrm)
+    if rotate is not None:
+        for i in range(0, len(pos), 3):
+            out_pos[i:i + 3] = array("f", rotate(pos[i], pos[i + 1], pos[i + 2]))
+            out_nrm[i:i + 3] = array("f", rotate(nrm[i], nrm[i + 1], nrm[i + 2]))
+    # Translation as three strided passes over the whole mesh
+    for axis, offset in enumerate((tx, ty, tz)):
+        if offset:
+            out_pos[axis::3] = array("f", [v + offset for v in out_pos[axis::3]])
+    return out_pos, out_nrm
+
+
+# ===== Writers =====
+
+def model_hash(model, fmt):
+    canonical = json.dumps(model, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(f"{fmt}:{canonical}".encode()).hexdigest()
+
+
+class StlExport:
+    """Binary STL. The triangle count is known up front, so `size` is exact before writing."""
+    extension = "stl"
+    content_type = "model/stl"
+
+    def __init__(self, model):
+        self.solids = placed_solids(model)
+        self.triangles = sum(len(local_mesh(p.kind, p.params)[0]) // 9 for p in self.solids)
+        self.size = 84 + 50 * self.triangles
+
+    def write(self, out):
+        out.write(b"GoobCAD binary STL".ljust(80, b"\0"))
+        out.write(struct.pack("<I", self.triangles))
+        for placed in self.solids:
+            pos, nrm = world_mesh(placed)
+            records = bytearray()
+            # Per triangle: normal, three vertices, 16-bit attribute
+            for t in range(len(pos) // 9):
+                records += nrm[t * 9:t * 9 + 3].tobytes()
+                records += pos[t * 9:t * 9 + 9].tobytes()
+                records += b"\0\0"
+            out.write(records)
+
+
+class GlbExport:
+    """Binary glTF 2.0. One node per solid; solids with the same geometry share its buffers."""
+    extension = "glb"
+    content_type = "model/gltf-binary"
+
+    def __init__(self, model):
+        self.solids = placed_solids(model)
+        self.geometries = {}  # (kind, params) -> accessor index of POSITION
+        materials, meshes, nodes = {}, {}, []
+        accessors, views = [], []
+        offset = 0
+        for placed in self.solids:
+            key = (placed.kind, placed.params)
+            if key not in self.geometries:
+                pos, _ = local_mesh(*key)
+                lo, hi = _bounds(pos)
+                count = len(pos) // 3
+                self.geometries[key] = len(accessors)
+                for extra in ({"min": lo, "max": hi}, {}):
+                    views.append({"buffer": 0, "byteOffset": offset, "byteLength": count * 12, "target": 34962})
+                    accessors.append({"bufferView": len(views) - 1, "componentType": 5126,
+                                      "count": count, "type": "VEC3", **extra})
+                    offset += count * 12
+            if placed.color not in materials:
+                materials[placed.color] = len(materials)
+            mesh_key = (key, placed.color)
+            if mesh_key not in meshes:
+                meshes[mesh_key] = len(meshes)
+            node = {"name": str(placed.name), "mesh": meshes[mesh_key],
+                    "translation": list(placed.translation)}
+            if placed.axis in _QUATERNION:
+                node["rotation"] = _QUATERNION[placed.axis]
+            nodes.append(node)
+
+        self.bin_length = offset
+        gltf = {
+            "asset": {"version": "2.0", "generator": "GoobCAD"},
+            "scene": 0,
+            "scenes": [{"nodes": list(range(len(nodes)))}],
+            "nodes": nodes,
+            "meshes": [{"primitives": [{"attributes": {"POSITION": self.geometries[key],
+                                                       "NORMAL": self.geometries[key] + 1},
+                                        "material": materials[color]}]}
+                       for (key, color) in meshes],
+            "materials": [{"pbrMetallicRoughness": {"baseColorFactor": linear_rgb(color) + [1.0],
+                                                    "metallicFactor": 0.1, "roughnessFactor": 0.85}}
+                          for color in materials],
+            "accessors": accessors,
+            "bufferViews": views,
+            "buffers": [{"byteLength": offset}],
+        }
+        self.json = json.dumps(gltf, separators=(",", ":")).encode()
+        self.json += b" " * (-len(self.json) % 4)
+        self.size = 12 + 8 + len(self.json) + 8 + self.bin_length
+
+    def write(self, out):
+        out.write(struct.pack("<4sII", b"glTF", 2, self.size))
+        out.write(struct.pack("<I4s", len(self.json), b"JSON"))
+        out.write(self.json)
+        out.write(struct.pack("<I4s", self.bin_length, b"BIN\0"))
+        # Same order the buffer views were laid out in
+        for key in self.geometries:
+            pos, nrm = local_mesh(*key)
+            out.write(pos.tobytes())
+            out.write(nrm.tobytes())
+
+
+EXPORTERS = {"stl": StlExport, "glb": GlbExport}
+
+
+def export(model, fmt):
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if sys.byteorder != "little":
+        raise RuntimeError("STL/glTF are little-endian; array.tobytes() here isn't")
+    return EXPORTERS[fmt](model)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python goobcad.py model.json out.stl|out.glb", file=sys.stderr)
+        return 2
+    src, dst = argv
+    with open(src) as f:
+        model = json.load(f)
+    exp = export(model, dst.rsplit(".", 1)[-1].lower())
+    with open(dst, "wb") as f:
+        exp.write(f)
+    print(f"Wrote {dst} ({exp.size} bytes, {len(exp.solids)} solids)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,322 @@
 import http.server
-import socketserver
+import email.utils
+import gzip
+import hashlib
+import json
 import os
+import sys
+import tempfile
+import threading
+
+# goobcad.py sits next to this file; find it whatever the working directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import goobcad
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
 
 PORT = 8000
 # The directory containing your web files (3d.html, textures, etc.)
 WEB_DIR = '.'
 
+# Files up to this size are kept in memory (plus compressed copies);
+# anything bigger is streamed from disk with sendfile. Sized so every asset
+# here fits, the ~530 KB plywood texture included.
+CACHE_MAX_FILE = 1024 * 1024
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+# POST /export.stl or /export.glb with the model JSON; results are kept here by model hash
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.export-cache')
+MAX_MODEL_BYTES = 8 * 1024 * 1024
+
+
+class CachedFile:
+    def __init__(self, path, st, ctype):
+        self.path = path
+        self.mtime = st.st_mtime_ns
+        self.size = st.st_size
+        self.ctype = ctype
+        self.last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        self.data = None
+        self.variants = {}  # content-coding -> bytes, only when smaller than the original
+
+        if self.size <= CACHE_MAX_FILE:
+            with open(path, 'rb') as f:
+                self.data = f.read()
+            self.size = len(self.data)
+            self.etag = '"%s"' % hashlib.sha1(self.data).hexdigest()
+            if ctype.startswith(COMPRESSIBLE) and self.size > 512:
+                self._precompress()
+        else:
+            # Too big to hash on every change; size + mtime is still a strong validator here
+            self.etag = '"%x-%x"' % (self.size, self.mtime)
+
+    def _precompress(self):
+        packed = {'gzip': gzip.compress(self.data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            packed['br'] = brotli.compress(self.data)
+        self.variants = {k: v for k, v in packed.items() if len(v) < self.size}
+
+    def etag_for(self, coding):
+        # Each encoding is a different representation, so it gets its own strong tag
+        return self.etag[:-1] + '-' + coding + '"' if coding else self.etag
+
+    def fresh(self, st):
+        return st.st_mtime_ns == self.mtime and st.st_size == self.size
+
+
+class FileCache:
+    """Path -> CachedFile, re-read whenever the file's mtime or size changes."""
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, ctype):
+        st = os.stat(path)
+        with self._lock:
+            entry = self._files.get(path)
+        if entry is not None and entry.fresh(st):
+            return entry
+        # Built outside the lock: two threads may both load a changed file, which is harmless
+        entry = CachedFile(path, st, ctype)
+        with self._lock:
+            self._files[path] = entry
+        return entry
+
+
+CACHE = FileCache()
+
+
+def parse_range(header, size):
+    """Single 'bytes=' range -> (start, end) inclusive, None to ignore, or False if unsatisfiable."""
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None  # multipart ranges aren't worth it here; send the whole file
+    first, _, last = header[6:].strip().partition('-')
+    try:
+        if first == '':
+            length = int(last)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def etag_matches(header, etag):
+    if header is None:
+        return False
+    if header.strip() == '*':
+        return True
+    tags = [t.strip() for t in header.split(',')]
+    return etag in tags or ('W/' + etag) in tags
+
+
+def accepted_codings(header):
+    """Accept-Encoding -> {coding: q}, exact tokens only; '*' covers anything unlisted."""
+    codings = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[name] = q
+    return codings
+
+
+def pick_coding(header, available):
+    """Best of `available` (in our order of preference) the client accepts with q > 0, else None."""
+    codings = accepted_codings(header)
+    best, best_q = None, 0.0
+    for name in available:
+        q = codings.get(name, codings.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
 # In Python 3.7+ you can use the directory argument.
 # For older versions, you might need to os.chdir into the directory.
 class Handler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive: one browser loading 3d.html + texture reuses a single connection
+    protocol_version = 'HTTP/1.1'
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=WEB_DIR, **kwargs)
 
-with socketserver.TCPServer(("", PORT), Handler) as httpd:
-    print(f"Serving GoobCAD at http://localhost:{PORT}/3d.html")
-    print("Press Ctrl+C to stop the server.")
-    try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        pass
-    httpd.server_close()
-    print("Server stopped.")
+    def do_GET(self):
+        self.serve_file(head=False)
+
+    def do_HEAD(self):
+        self.serve_file(head=True)
+
+    def do_POST(self):
+        name = self.path.split('?', 1)[0].lstrip('/')
+        fmt = name[len('export.'):] if name.startswith('export.') else None
+        if fmt not in goobcad.EXPORTERS:
+            self.send_error(404, "Unknown export")
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400, "Bad Content-Length")
+            return
+        if not 0 < length <= MAX_MODEL_BYTES:
+            self.send_error(413 if length else 411, "Model missing or too large")
+            return
+        try:
+            model = json.loads(self.rfile.read(length))
+        except ValueError:
+            self.send_error(400, "Model is not valid JSON")
+            return
+
+        key = goobcad.model_hash(model, fmt)
+        cached = os.path.join(EXPORT_DIR, f'{key}.{fmt}')
+        exporter = goobcad.EXPORTERS[fmt]
+        if os.path.isfile(cached):
+            self.send_export_headers(exporter.content_type, os.path.getsize(cached), key, fmt)
+            with open(cached, 'rb') as f:
+                self.wfile.flush()
+                self.connection.sendfile(f)
+            return
+
+        try:
+            export = goobcad.export(model, fmt)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.send_error(400, f"Bad model: {e}")
+            return
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=EXPORT_DIR, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self.send_export_headers(export.content_type, export.size, key, fmt)
+                export.write(Tee(self.wfile, f))
+            os.replace(tmp, cached)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def send_export_headers(self, ctype, size, key, fmt):
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(size))
+        self.send_header('Content-Disposition', f'attachment; filename="goobcad.{fmt}"')
+        self.send_header('ETag', f'"{key}"')
+        self.end_headers()
+
+    def serve_file(self, head):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) or not os.path.isfile(path):
+            # Directory listings, redirects and 404s: the stock handler does fine
+            return super().do_HEAD() if head else super().do_GET()
+
+        try:
+            entry = CACHE.get(path, self.guess_type(path))
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+
+        inm = self.headers.get('If-None-Match')
+        matched = next((c for c in [None, *entry.variants] if etag_matches(inm, entry.etag_for(c))), False)
+        if matched is not False:
+            self.send_response(304)
+            self.send_header('ETag', entry.etag_for(matched))
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+
+        # Range only applies to the identity encoding; If-Range must still match
+        rng = None
+        if_range = self.headers.get('If-Range')
+        if if_range is None or if_range.strip() == entry.etag:
+            rng = parse_range(self.headers.get('Range'), entry.size)
+        if rng is False:
+            self.send_response(416)
+            self.send_header('Content-Range', 'bytes */%d' % entry.size)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        coding = None
+        if rng is None and entry.variants:
+            available = [name for name in ('br', 'gzip') if name in entry.variants]
+            coding = pick_coding(self.headers.get('Accept-Encoding'), available)
+
+        if rng is not None:
+            start, end = rng
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (start, end, entry.size))
+        else:
+            start, end = 0, entry.size - 1
+            self.send_response(200)
+        body = entry.variants[coding] if coding else None
+        length = len(body) if body is not None else end - start + 1
+
+        self.send_header('Content-Type', entry.ctype)
+        self.send_header('Content-Length', str(length))
+        self.send_header('Last-Modified', entry.last_modified)
+        self.send_header('ETag', entry.etag_for(coding))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Cache-Control', 'no-cache')  # always revalidate; 304s are cheap
+        if entry.variants:
+            self.send_header('Vary', 'Accept-Encoding')
+        if coding:
+            self.send_header('Content-Encoding', coding)
+        self.end_headers()
+        if head or length == 0:
+            return
+
+        if body is not None:
+            self.wfile.write(body)
+        elif entry.data is not None:
+            self.wfile.write(entry.data[start:end + 1])
+        else:
+            self.wfile.flush()
+            with open(path, 'rb') as f:
+                # socket.sendfile uses os.sendfile where available, read/send otherwise
+                self.connection.sendfile(f, start, length)
+
+
+class Tee:
+    """Write to the client and the cache file at the same time."""
+
+    def __init__(self, *outs):
+        self.outs = outs
+
+    def write(self, data):
+        for out in self.outs:
+            out.write(data)
+
+
+class Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
 
+if __name__ == '__main__':
+    with Server(("", PORT), Handler) as httpd:
+        print(f"Serving GoobCAD at http://localhost:{PORT}/3d.html")
+        print("Press Ctrl+C to stop the server.")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        httpd.server_close()
+        print("Server stopped.")